@@ -1,22 +1,36 @@
 """
 Agente principal para questões da ANEEL.
 """
+import threading
+from .common.config import Config
 from .prompts.utils.load_prompt import load_prompt
 from .prompts.utils.set_date_in_prompt import set_atual_date_in_prompt
-from .tools.get_schema_db import get_schema_db
-from .tools.execute_sql_query import execute_sql_query
-from .tools.get_schema_dictionary import get_schema_dictionary
+from .tools.get_schema_dictionary import warm_dictionary_cache
+from .tools.async_tools import ASYNC_TOOLS
 from google.adk.agents import Agent
 
-prompt_loaded = load_prompt("prompt_agent_engineer.txt")
-PROMPT_AGENT_ENGINEER = set_atual_date_in_prompt(prompt_loaded)
+PROMPT_FILE = "prompt_agent_engineer.txt"
+
+
+def prompt_agent_engineer(context=None) -> str:
+    """
+    Instrução do agente, resolvida na primeira requisição e não no import.
+
+    O arquivo do prompt é lido uma única vez (load_prompt é cacheado); só a
+    data do dia é substituída a cada chamada.
+    """
+    return set_atual_date_in_prompt(load_prompt(PROMPT_FILE))
+
+
+if Config.DICTIONARY_PREWARM:
+    threading.Thread(target=warm_dictionary_cache, daemon=True).start()
 
 agent = Agent(
     name="cemig_agent",
     model="gemini-2.0-flash",
     description="Agente especializado em questões da ANEEL com suporte a ferramentas.",
-    instruction=PROMPT_AGENT_ENGINEER,
-    tools=[get_schema_db, execute_sql_query, get_schema_dictionary],
+    instruction=prompt_agent_engineer,
+    tools=ASYNC_TOOLS,
 )
 
 root_agent = agent
\ No newline at end of file
@@ -0,0 +1,149 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class LRUCache:
+    """
+    Cache LRU em memória, seguro para uso entre threads.
+
+    Suporta expiração por TTL e um orçamento de memória opcional, medido pela
+    função `sizeof` (por padrão, sys.getsizeof do valor).
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 128,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None
+    ):
+        """
+        Inicializa o cache.
+
+        Args:
+            maxsize: Número máximo de entradas
+            ttl: Segundos até uma entrada expirar (None para não expirar)
+            max_bytes: Orçamento de memória total das entradas (None para ilimitado)
+            sizeof: Função que estima o tamanho em bytes de um valor
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or sys.getsizeof
+        self._data: "OrderedDict[Hashable, Tuple[Any, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def _pop(self, key: Hashable):
+        _, _, size = self._data.pop(key)
+        self._bytes -= size
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Retorna o valor associado à chave, marcando-o como usado recentemente.
+
+        Args:
+            key: Chave da entrada
+            default: Valor retornado se a chave não existir ou tiver expirado
+
+        Returns:
+            Valor em cache ou `default`
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return default
+
+            value, expires_at, _ = entry
+            if expires_at and time.monotonic() > expires_at:
+                self._pop(key)
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return default
+
+            self._data.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        """
+        Armazena um valor, removendo as entradas menos usadas se necessário.
+
+        Valores maiores que o orçamento de memória inteiro não são armazenados.
+
+        Args:
+            key: Chave da entrada
+            value: Valor a ser armazenado
+        """
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+
+        expires_at = time.monotonic() + self.ttl if self.ttl else 0.0
+
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+
+            self._data[key] = (value, expires_at, size)
+            self._bytes += size
+
+            while self._data and (
+                len(self._data) > self.maxsize
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                oldest = next(iter(self._data))
+                self._pop(oldest)
+                self._stats["evictions"] += 1
+
+    def discard(self, key: Hashable):
+        """Remove uma entrada, se existir."""
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+
+    def discard_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """
+        Remove todas as entradas para as quais `predicate(chave, valor)` é verdadeiro.
+
+        Returns:
+            int: Número de entradas removidas
+        """
+        with self._lock:
+            keys = [key for key, (value, _, _) in self._data.items() if predicate(key, value)]
+            for key in keys:
+                self._pop(key)
+            return len(keys)
+
+    def clear(self):
+        """Remove todas as entradas."""
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna estatísticas de uso do cache.
+
+        Returns:
+            Dict: Acertos, falhas, remoções, número de entradas e bytes ocupados
+        """
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+            }
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -13,7 +14,90 @@ class Config:
     POSTGRES_DEFAULT_DB = os.getenv('POSTGRES_DEFAULT_DB', 'postgres')
     POSTGRES_INSTANCE_CONNECTION_NAME = os.getenv('POSTGRES_INSTANCE_CONNECTION_NAME', 'ufg-prd-energygpt:us-central1:your-instance-name')
 
+    # Connection Pool Configuration
+    POSTGRES_POOL_MIN_SIZE = int(os.getenv('POSTGRES_POOL_MIN_SIZE', '1'))
+    POSTGRES_POOL_MAX_SIZE = int(os.getenv('POSTGRES_POOL_MAX_SIZE', '10'))
+    POSTGRES_POOL_IDLE_TIMEOUT = float(os.getenv('POSTGRES_POOL_IDLE_TIMEOUT', '300'))
+    POSTGRES_POOL_HEALTH_CHECK_AFTER = float(os.getenv('POSTGRES_POOL_HEALTH_CHECK_AFTER', '30'))
+    POSTGRES_POOL_ACQUIRE_TIMEOUT = float(os.getenv('POSTGRES_POOL_ACQUIRE_TIMEOUT', '30'))
+
+    # Query Result Limits
+    QUERY_MAX_ROWS = int(os.getenv('QUERY_MAX_ROWS', '1000'))
+    QUERY_MAX_BYTES = int(os.getenv('QUERY_MAX_BYTES', '1000000'))
+    QUERY_FETCH_BATCH_SIZE = int(os.getenv('QUERY_FETCH_BATCH_SIZE', '500'))
+
+    # Query Guard (EXPLAIN pré-execução + statement_timeout)
+    QUERY_STATEMENT_TIMEOUT_MS = int(os.getenv('QUERY_STATEMENT_TIMEOUT_MS', '30000'))
+    QUERY_GUARD_ENABLED = os.getenv('QUERY_GUARD_ENABLED', 'true').lower() == 'true'
+    QUERY_GUARD_MAX_COST = float(os.getenv('QUERY_GUARD_MAX_COST', '10000000'))
+    QUERY_GUARD_MAX_ROWS = int(os.getenv('QUERY_GUARD_MAX_ROWS', os.getenv('QUERY_MAX_ROWS', '1000')))
+    QUERY_GUARD_AUTO_LIMIT = os.getenv('QUERY_GUARD_AUTO_LIMIT', 'true').lower() == 'true'
+
+    # Query Result Cache
+    QUERY_CACHE_ENABLED = os.getenv('QUERY_CACHE_ENABLED', 'true').lower() == 'true'
+    QUERY_CACHE_SIZE = int(os.getenv('QUERY_CACHE_SIZE', '256'))
+    QUERY_CACHE_TTL = float(os.getenv('QUERY_CACHE_TTL', '300'))
+    QUERY_CACHE_MAX_BYTES = int(os.getenv('QUERY_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+    QUERY_CACHE_VERSION_CHECK_INTERVAL = float(os.getenv('QUERY_CACHE_VERSION_CHECK_INTERVAL', '30'))
+
+    # Visões materializadas pré-agregadas (data/materialized_views.yaml) e reescrita de agregações
+    MATERIALIZED_VIEWS_FILE = os.getenv(
+        'MATERIALIZED_VIEWS_FILE',
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'materialized_views.yaml')
+    )
+    AGGREGATE_REWRITE_ENABLED = os.getenv('AGGREGATE_REWRITE_ENABLED', 'true').lower() == 'true'
+    AGGREGATE_REWRITE_CHECK_INTERVAL = float(os.getenv('AGGREGATE_REWRITE_CHECK_INTERVAL', '60'))
+
+    # Estatísticas das consultas do agente (SQLite: fingerprint, duração, linhas, tabelas),
+    # também lidas pelo index advisor; vazio desativa
+    QUERY_STATS_DB = os.getenv('QUERY_STATS_DB', '')
+    QUERY_STATS_MAX_ENTRIES = int(os.getenv('QUERY_STATS_MAX_ENTRIES', '100000'))
+
+    # Telemetria (spans, contadores e histogramas): json, prometheus e/ou otel; vazio desativa
+    TELEMETRY_SINK = os.getenv('TELEMETRY_SINK', '')
+    TELEMETRY_JSON_FILE = os.getenv('TELEMETRY_JSON_FILE', '')
+    TELEMETRY_PROMETHEUS_PORT = int(os.getenv('TELEMETRY_PROMETHEUS_PORT', '0'))
+    TELEMETRY_SERVICE_NAME = os.getenv('TELEMETRY_SERVICE_NAME', 'cemig_agent')
+
+    # Async Tools
+    TOOL_MAX_WORKERS = int(os.getenv('TOOL_MAX_WORKERS', os.getenv('POSTGRES_POOL_MAX_SIZE', '10')))
+
+    # Schema Cache Configuration
+    SCHEMA_CACHE_TTL = float(os.getenv('SCHEMA_CACHE_TTL', '60'))
+
+    # Data Dictionary Cache Configuration
+    DICTIONARY_CACHE_SIZE = int(os.getenv('DICTIONARY_CACHE_SIZE', '32'))
+    DICTIONARY_CACHE_DIR = os.getenv(
+        'DICTIONARY_CACHE_DIR',
+        os.path.join(tempfile.gettempdir(), 'cemig_agent', 'dicionario_de_dados')
+    )
+    DICTIONARY_BUNDLE_PATH = os.getenv(
+        'DICTIONARY_BUNDLE_PATH',
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'dicionario_de_dados.bundle')
+    )
+    DICTIONARY_TOP_K_COLUMNS = int(os.getenv('DICTIONARY_TOP_K_COLUMNS', '10'))
+    DICTIONARY_PREWARM = os.getenv('DICTIONARY_PREWARM', 'false').lower() == 'true'
+
     # Google Cloud Configuration
     GOOGLE_GENAI_USE_VERTEXAI = os.getenv("GOOGLE_GENAI_USE_VERTEXAI", "true").lower() == "true"
     GOOGLE_CLOUD_PROJECT = os.getenv("GOOGLE_CLOUD_PROJECT", "ufg-prd-energygpt")
-    GOOGLE_CLOUD_LOCATION = os.getenv("GOOGLE_CLOUD_LOCATION", "us-central1")
\ No newline at end of file
+    GOOGLE_CLOUD_LOCATION = os.getenv("GOOGLE_CLOUD_LOCATION", "us-central1")
+
+    @classmethod
+    def get_db_config(cls):
+        """Retorna os parâmetros do PostgreSQLConnector usados pelas ferramentas do agente."""
+        return {
+            "host": cls.POSTGRES_HOST,
+            "database": cls.POSTGRES_DATABASE,
+            "user": cls.POSTGRES_USER,
+            "password": cls.POSTGRES_PASSWORD,
+            "port": cls.POSTGRES_PORT,
+            "use_pool": True,
+            "pool_options": {
+                "min_size": cls.POSTGRES_POOL_MIN_SIZE,
+                "max_size": cls.POSTGRES_POOL_MAX_SIZE,
+                "idle_timeout": cls.POSTGRES_POOL_IDLE_TIMEOUT,
+                "health_check_after": cls.POSTGRES_POOL_HEALTH_CHECK_AFTER,
+                "acquire_timeout": cls.POSTGRES_POOL_ACQUIRE_TIMEOUT,
+            },
+        }
\ No newline at end of file
@@ -0,0 +1,399 @@
+"""
+Instrumentação leve dos caminhos quentes: spans, contadores e histogramas.
+
+Os eventos são entregues a um sink plugável, escolhido por TELEMETRY_SINK:
+
+- json: uma linha JSON por span/métrica (TELEMETRY_JSON_FILE ou stderr)
+- prometheus: agrega em memória e expõe no formato texto do Prometheus
+  (GET /metrics em TELEMETRY_PROMETHEUS_PORT, ou via render())
+- otel: repassa para a API do OpenTelemetry (pacote opentelemetry-api,
+  configurado pela aplicação/exporter)
+
+Vários sinks podem ser combinados separados por vírgula. Sem sink a
+telemetria fica desativada: span() devolve um objeto no-op compartilhado e
+increment()/observe() retornam imediatamente, sem medir tempo.
+"""
+import functools
+import json
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .config import Config
+
+DEFAULT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class TelemetrySink:
+    """Interface dos sinks. Implementações sobrescrevem apenas o que exportam."""
+
+    def start_span(self, name: str, attributes: Dict[str, Any]) -> Any:
+        return None
+
+    def end_span(self, name: str, handle: Any, duration_ms: float, attributes: Dict[str, Any], error: Optional[BaseException]):
+        pass
+
+    def increment(self, name: str, value: float, labels: Dict[str, Any]):
+        pass
+
+    def observe(self, name: str, value: float, labels: Dict[str, Any]):
+        pass
+
+
+class JsonLogSink(TelemetrySink):
+    """Escreve cada span e métrica como uma linha JSON."""
+
+    def __init__(self, path: str = ""):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _write(self, entry: Dict[str, Any]):
+        entry["ts"] = round(time.time(), 6)
+        line = json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            if self.path:
+                try:
+                    with open(self.path, "a", encoding="utf-8") as log_file:
+                        log_file.write(line)
+                except OSError:
+                    pass
+            else:
+                sys.stderr.write(line)
+
+    def end_span(self, name, handle, duration_ms, attributes, error):
+        entry = {"type": "span", "name": name, "duration_ms": round(duration_ms, 3), "attributes": attributes}
+        if error is not None:
+            entry["error"] = f"{type(error).__name__}: {error}"
+        self._write(entry)
+
+    def increment(self, name, value, labels):
+        self._write({"type": "counter", "name": name, "value": value, "labels": labels})
+
+    def observe(self, name, value, labels):
+        self._write({"type": "histogram", "name": name, "value": value, "labels": labels})
+
+
+def _metric_name(name: str) -> str:
+    return "cemig_" + "".join(char if char.isalnum() else "_" for char in name)
+
+
+def _label_key(labels: Dict[str, Any]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((str(key), str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    escaped = (
+        f'{key}="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for key, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+class PrometheusSink(TelemetrySink):
+    """
+    Agrega contadores e histogramas em memória e os exporta no formato texto
+    do Prometheus. Spans viram o histograma span_duration_ms{span=...} e o
+    contador span_errors{span=...}.
+    """
+
+    def __init__(self, port: int = 0, buckets: Tuple[float, ...] = DEFAULT_BUCKETS_MS):
+        self.buckets = tuple(sorted(buckets))
+        self._counters: Dict[str, Dict[Tuple, float]] = defaultdict(lambda: defaultdict(float))
+        self._histograms: Dict[str, Dict[Tuple, List[float]]] = defaultdict(dict)
+        self._lock = threading.Lock()
+        self._server = None
+        if port:
+            self.serve(port)
+
+    def end_span(self, name, handle, duration_ms, attributes, error):
+        self.observe("span_duration_ms", duration_ms, {"span": name})
+        if error is not None:
+            self.increment("span_errors", 1, {"span": name})
+
+    def increment(self, name, value, labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._counters[name][key] += value
+
+    def observe(self, name, value, labels):
+        key = _label_key(labels)
+        with self._lock:
+            # contagens por bucket, seguidas de soma e total
+            state = self._histograms[name].get(key)
+            if state is None:
+                state = [0.0] * (len(self.buckets) + 2)
+                self._histograms[name][key] = state
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self) -> str:
+        """Métricas no formato de exposição texto do Prometheus."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                metric = _metric_name(name) + "_total"
+                lines.append(f"# TYPE {metric} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{metric}{_format_labels(labels)} {value:g}")
+            for name, series in sorted(self._histograms.items()):
+                metric = _metric_name(name)
+                lines.append(f"# TYPE {metric} histogram")
+                for labels, state in sorted(series.items()):
+                    for index, bound in enumerate(self.buckets):
+                        lines.append(f"{metric}_bucket{_format_labels(labels, (('le', f'{bound:g}'),))} {state[index]:g}")
+                    lines.append(f"{metric}_bucket{_format_labels(labels, (('le', '+Inf'),))} {state[-1]:g}")
+                    lines.append(f"{metric}_sum{_format_labels(labels)} {state[-2]:g}")
+                    lines.append(f"{metric}_count{_format_labels(labels)} {state[-1]:g}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int):
+        """Expõe render() em http://0.0.0.0:<port>/metrics numa thread daemon."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        sink = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = sink.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("0.0.0.0", port), MetricsHandler)
+        threading.Thread(target=self._server.serve_forever, name="cemig-metrics", daemon=True).start()
+
+
+class OpenTelemetrySink(TelemetrySink):
+    """
+    Repassa spans e métricas para a API do OpenTelemetry.
+
+    O exporter (OTLP, Cloud Trace, ...) é configurado pela aplicação; sem
+    configuração a API do OpenTelemetry descarta os dados.
+    """
+
+    def __init__(self, service_name: str = "cemig_agent"):
+        from opentelemetry import metrics, trace
+        from opentelemetry.trace import Status, StatusCode
+
+        self._trace = trace
+        self._status = Status
+        self._status_code = StatusCode
+        self._tracer = trace.get_tracer(service_name)
+        self._meter = metrics.get_meter(service_name)
+        self._instruments: Dict[Tuple[str, str], Any] = {}
+        self._lock = threading.Lock()
+
+    def _instrument(self, kind: str, name: str):
+        instrument = self._instruments.get((kind, name))
+        if instrument is None:
+            with self._lock:
+                instrument = self._instruments.get((kind, name))
+                if instrument is None:
+                    if kind == "counter":
+                        instrument = self._meter.create_counter(name)
+                    else:
+                        instrument = self._meter.create_histogram(name)
+                    self._instruments[(kind, name)] = instrument
+        return instrument
+
+    def start_span(self, name, attributes):
+        span = self._tracer.start_span(name, attributes=attributes)
+        scope = self._trace.use_span(span, end_on_exit=False)
+        scope.__enter__()
+        return span, scope
+
+    def end_span(self, name, handle, duration_ms, attributes, error):
+        span, scope = handle
+        span.set_attributes({key: value for key, value in attributes.items() if value is not None})
+        if error is not None:
+            span.record_exception(error)
+            span.set_status(self._status(self._status_code.ERROR, str(error)))
+        scope.__exit__(None, None, None)
+        span.end()
+
+    def increment(self, name, value, labels):
+        self._instrument("counter", name).add(value, labels)
+
+    def observe(self, name, value, labels):
+        self._instrument("histogram", name).record(value, labels)
+
+
+class MultiSink(TelemetrySink):
+    """Entrega os eventos a vários sinks."""
+
+    def __init__(self, sinks: List[TelemetrySink]):
+        self.sinks = sinks
+
+    def start_span(self, name, attributes):
+        return [sink.start_span(name, attributes) for sink in self.sinks]
+
+    def end_span(self, name, handle, duration_ms, attributes, error):
+        for sink, sink_handle in zip(self.sinks, handle):
+            sink.end_span(name, sink_handle, duration_ms, attributes, error)
+
+    def increment(self, name, value, labels):
+        for sink in self.sinks:
+            sink.increment(name, value, labels)
+
+    def observe(self, name, value, labels):
+        for sink in self.sinks:
+            sink.observe(name, value, labels)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """Span ativo: mede o tempo entre __enter__ e __exit__ e o entrega ao sink."""
+
+    __slots__ = ("_sink", "name", "attributes", "_handle", "_started")
+
+    def __init__(self, sink: TelemetrySink, name: str, attributes: Dict[str, Any]):
+        self._sink = sink
+        self.name = name
+        self.attributes = attributes
+        self._handle = None
+        self._started = 0.0
+
+    def __enter__(self):
+        self._handle = self._sink.start_span(self.name, self.attributes)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        duration_ms = (time.perf_counter() - self._started) * 1000
+        try:
+            self._sink.end_span(self.name, self._handle, duration_ms, self.attributes, exc)
+        except Exception:
+            pass
+        return False
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+
+class Telemetry:
+    """
+    Fachada usada pelo código instrumentado.
+
+    Exemplo:
+        with telemetry.span("db.execute", pooled=True) as span:
+            cursor.execute(query)
+            span.set_attribute("rows", cursor.rowcount)
+        telemetry.increment("dictionary.lookups", source="bundle")
+    """
+
+    def __init__(self, sink: Optional[TelemetrySink] = None):
+        self.sink = sink
+
+    @property
+    def enabled(self) -> bool:
+        return self.sink is not None
+
+    def configure(self, sink: Optional[TelemetrySink]):
+        self.sink = sink
+
+    def span(self, name: str, **attributes):
+        sink = self.sink
+        if sink is None:
+            return _NOOP_SPAN
+        return Span(sink, name, attributes)
+
+    def increment(self, name: str, value: float = 1, **labels):
+        sink = self.sink
+        if sink is None:
+            return
+        try:
+            sink.increment(name, value, labels)
+        except Exception:
+            pass
+
+    def observe(self, name: str, value: float, **labels):
+        sink = self.sink
+        if sink is None:
+            return
+        try:
+            sink.observe(name, value, labels)
+        except Exception:
+            pass
+
+    def traced(self, name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        """Decorador que envolve a função em um span."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if self.sink is None:
+                    return func(*args, **kwargs)
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+
+def create_sink(
+    names: str,
+    json_file: str = "",
+    prometheus_port: int = 0,
+    service_name: str = "cemig_agent"
+) -> Optional[TelemetrySink]:
+    """
+    Cria o sink a partir de uma lista separada por vírgulas (json, prometheus, otel).
+
+    Returns:
+        Sink configurado ou None (telemetria desativada)
+    """
+    sinks = []
+    for name in (part.strip().lower() for part in (names or "").split(",")):
+        if not name:
+            continue
+        if name == "json":
+            sinks.append(JsonLogSink(json_file))
+        elif name == "prometheus":
+            sinks.append(PrometheusSink(port=prometheus_port))
+        elif name in ("otel", "opentelemetry"):
+            try:
+                sinks.append(OpenTelemetrySink(service_name))
+            except ImportError:
+                print("Aviso: TELEMETRY_SINK=otel requer o pacote opentelemetry-api; sink ignorado")
+        else:
+            print(f"Aviso: sink de telemetria desconhecido: {name}")
+    if not sinks:
+        return None
+    return sinks[0] if len(sinks) == 1 else MultiSink(sinks)
+
+
+telemetry = Telemetry(create_sink(
+    Config.TELEMETRY_SINK,
+    json_file=Config.TELEMETRY_JSON_FILE,
+    prometheus_port=Config.TELEMETRY_PROMETHEUS_PORT,
+    service_name=Config.TELEMETRY_SERVICE_NAME,
+))
@@ -0,0 +1,217 @@
+import csv
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+import chardet
+
+DELIMITERS = [';', ',', '\t', '|']
+DEFAULT_SAMPLE_SIZE = 256 * 1024
+
+
+class ReadProfile:
+    """Parâmetros de leitura de um CSV descobertos pela amostragem"""
+
+    def __init__(self, encoding, delimiter, quotechar='"', quoting=csv.QUOTE_MINIMAL, has_header=True):
+        self.encoding = encoding
+        self.delimiter = delimiter
+        self.quotechar = quotechar
+        self.quoting = quoting
+        self.has_header = has_header
+
+    def read_csv_kwargs(self):
+        """Argumentos equivalentes para pandas.read_csv (engine C)"""
+        kwargs = {
+            'encoding': self.encoding,
+            'sep': self.delimiter,
+            'quoting': self.quoting,
+            'header': 0 if self.has_header else None,
+            'engine': 'c',
+        }
+        if self.quoting != csv.QUOTE_NONE:
+            kwargs['quotechar'] = self.quotechar
+        return kwargs
+
+    def to_dict(self):
+        return {
+            'encoding': self.encoding,
+            'delimiter': self.delimiter,
+            'quotechar': self.quotechar,
+            'quoting': self.quoting,
+            'has_header': self.has_header,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def __repr__(self):
+        return (
+            f"ReadProfile(encoding={self.encoding!r}, delimiter={self.delimiter!r}, "
+            f"quoting={self.quoting}, has_header={self.has_header})"
+        )
+
+
+def detect_encoding_from_bytes(sample):
+    """Detecta o encoding de uma amostra: BOM, UTF-8 estrito, chardet e por fim cp1252/latin-1"""
+    if sample.startswith(b'\xef\xbb\xbf'):
+        return 'utf-8-sig'
+    if sample.startswith((b'\xff\xfe', b'\xfe\xff')):
+        return 'utf-16'
+
+    # a amostra pode terminar no meio de um caractere multibyte
+    for cut in range(4):
+        try:
+            sample[:len(sample) - cut].decode('utf-8')
+            return 'utf-8'
+        except UnicodeDecodeError:
+            continue
+
+    detected = chardet.detect(sample).get('encoding')
+    if detected and detected.lower() not in ('ascii', 'utf-8'):
+        try:
+            sample.decode(detected)
+            return detected
+        except (UnicodeDecodeError, LookupError):
+            pass
+
+    # bytes 0x80-0x9F são caracteres imprimíveis em cp1252 e de controle em latin-1
+    if any(0x80 <= byte <= 0x9F for byte in sample):
+        return 'cp1252'
+    return 'latin-1'
+
+
+def _consistent_delimiter(lines):
+    """Escolhe o delimitador que aparece o mesmo número de vezes no maior número de linhas"""
+    best, best_score = None, 0
+    for delimiter in DELIMITERS:
+        counts = [line.count(delimiter) for line in lines]
+        nonzero = [count for count in counts if count > 0]
+        if not nonzero:
+            continue
+        mode = max(set(nonzero), key=nonzero.count)
+        score = nonzero.count(mode) * mode
+        if score > best_score:
+            best, best_score = delimiter, score
+    return best or ','
+
+
+def _looks_like_header(fields):
+    if not fields:
+        return False
+    def is_number(value):
+        try:
+            float(value.replace(',', '.'))
+            return True
+        except ValueError:
+            return False
+    non_empty = [field.strip() for field in fields if field.strip()]
+    return bool(non_empty) and len(set(non_empty)) == len(non_empty) and not any(is_number(f) for f in non_empty)
+
+
+def sniff_csv(csv_path, sample_size=DEFAULT_SAMPLE_SIZE):
+    """
+    Lê uma amostra limitada do arquivo uma única vez e determina encoding,
+    delimitador, aspas e cabeçalho.
+    """
+    with open(csv_path, 'rb') as file:
+        sample = file.read(sample_size)
+
+    encoding = detect_encoding_from_bytes(sample)
+    text_sample = sample.decode(encoding, errors='ignore')
+    if len(sample) == sample_size and '\n' in text_sample:
+        # descarta a última linha, possivelmente cortada pela amostra
+        text_sample = text_sample.rsplit('\n', 1)[0]
+
+    lines = [line for line in text_sample.splitlines() if line.strip()][:200]
+    sniff_text = '\n'.join(lines)
+
+    try:
+        dialect = csv.Sniffer().sniff(sniff_text, delimiters=''.join(DELIMITERS))
+        delimiter = dialect.delimiter
+        quotechar = dialect.quotechar or '"'
+    except csv.Error:
+        delimiter = _consistent_delimiter(lines)
+        quotechar = '"'
+
+    uses_quotes = any(quotechar in line for line in lines)
+    quoting = csv.QUOTE_MINIMAL if uses_quotes else csv.QUOTE_NONE
+
+    header_fields = next(csv.reader(lines[:1], delimiter=delimiter, quotechar=quotechar), [])
+    has_header = _looks_like_header(header_fields)
+
+    return ReadProfile(
+        encoding=encoding,
+        delimiter=delimiter,
+        quotechar=quotechar,
+        quoting=quoting,
+        has_header=has_header,
+    )
+
+
+class ReadProfileCache:
+    """
+    Cache de ReadProfile por arquivo, em memória e opcionalmente em disco (JSON).
+
+    A entrada é reutilizada enquanto tamanho, data de modificação e hash do
+    início do arquivo não mudarem.
+    """
+
+    def __init__(self, cache_file=None, sample_size=DEFAULT_SAMPLE_SIZE):
+        self.cache_file = Path(cache_file) if cache_file else None
+        self.sample_size = sample_size
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    def _load(self):
+        if not self.cache_file or not self.cache_file.exists():
+            return {}
+        try:
+            return json.loads(self.cache_file.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        if not self.cache_file:
+            return
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = self.cache_file.with_suffix(f'.{os.getpid()}.tmp')
+            temp_file.write_text(json.dumps(self._entries, indent=2), encoding='utf-8')
+            os.replace(temp_file, self.cache_file)
+        except OSError as e:
+            print(f"  Aviso: não foi possível gravar o cache de perfis de leitura: {e}")
+
+    def fingerprint(self, csv_path):
+        """Identifica o conteúdo do arquivo sem lê-lo por inteiro"""
+        stat = os.stat(csv_path)
+        digest = hashlib.sha1()
+        with open(csv_path, 'rb') as file:
+            digest.update(file.read(self.sample_size))
+        return f"{stat.st_size}:{stat.st_mtime_ns}:{digest.hexdigest()}"
+
+    def get(self, csv_path):
+        """Retorna o perfil do arquivo, amostrando-o apenas se ainda não estiver em cache"""
+        key = str(Path(csv_path).resolve())
+        fingerprint = self.fingerprint(csv_path)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry.get('fingerprint') == fingerprint:
+                return ReadProfile.from_dict(entry['profile'])
+
+        profile = sniff_csv(csv_path, self.sample_size)
+
+        with self._lock:
+            self._entries[key] = {'fingerprint': fingerprint, 'profile': profile.to_dict()}
+            self._save()
+        return profile
+
+    def invalidate(self, csv_path):
+        """Remove o perfil de um arquivo, forçando nova amostragem"""
+        key = str(Path(csv_path).resolve())
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._save()
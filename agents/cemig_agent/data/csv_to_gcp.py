@@ -1,15 +1,49 @@
 import os
+import io
+import time
+import hashlib
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
 import pandas as pd
 import psycopg2
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from pathlib import Path
 import chardet
 from src.config import Config
+from .csv_sniffer import ReadProfileCache
+from .index_advisor import apply_table_indexes, build_advisor, load_index_config
+from ..tools.connector.materialized_views import load_view_definitions
+from .schema_inference import enum_extension_sql, infer_schema, quote_literal
+
+LOAD_MODES = ('replace', 'append', 'upsert')
+
+DEFAULT_VIEWS_FILE = Path(__file__).parent / 'materialized_views.yaml'
+
+# Leitura com todas as colunas como texto: os tipos são definidos pela inferência de schema
+TEXT_READ_OPTIONS = {'dtype': str, 'keep_default_na': False, 'na_values': ['']}
 
 
 class CSVToGCP:
-    def __init__(self):
+    def __init__(self, profile_cache_file=None, index_config_file=None, views_file=None):
         self.config = Config()
+        # repassados aos processos do pool, para que o modo paralelo use a mesma configuração
+        self.init_options = {
+            'profile_cache_file': profile_cache_file,
+            'index_config_file': index_config_file,
+            'views_file': views_file,
+        }
+        if profile_cache_file is None:
+            profile_cache_file = Path(tempfile.gettempdir()) / 'cemig_agent' / 'csv_read_profiles.json'
+        self.read_profiles = ReadProfileCache(profile_cache_file)
+        self.writer_semaphore = None
+        self.last_load_stats = None
+        self.index_config_file = index_config_file
+        self._index_config = None
+        self._index_advisor = None
+        self.views_file = views_file or DEFAULT_VIEWS_FILE
+        self._view_definitions = None
         
     def create_database(self):
         """Cria o banco de dados se não existir"""
@@ -33,6 +67,188 @@ class CSVToGCP:
         """Retorna engine do SQLAlchemy"""
         return create_engine(self.config.get_connection_string())
 
+    def record_table_load(self, engine, table_name):
+        """Incrementa a versão da tabela em cemig_meta.table_versions, invalidando o cache de consultas do agente"""
+        with engine.begin() as conn:
+            conn.execute(text("CREATE SCHEMA IF NOT EXISTS cemig_meta"))
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS cemig_meta.table_versions (
+                    table_name TEXT PRIMARY KEY,
+                    version BIGINT NOT NULL DEFAULT 1,
+                    loaded_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                )
+            """))
+            conn.execute(
+                text("""
+                    INSERT INTO cemig_meta.table_versions (table_name) VALUES (:table_name)
+                    ON CONFLICT (table_name) DO UPDATE
+                    SET version = cemig_meta.table_versions.version + 1, loaded_at = now()
+                """),
+                {"table_name": table_name}
+            )
+
+    def ensure_load_manifest(self, conn):
+        """Cria a tabela cemig_meta.load_manifest, com os arquivos já carregados em cada tabela"""
+        conn.execute(text("CREATE SCHEMA IF NOT EXISTS cemig_meta"))
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS cemig_meta.load_manifest (
+                table_name TEXT NOT NULL,
+                file_name TEXT NOT NULL,
+                checksum TEXT NOT NULL,
+                row_count BIGINT NOT NULL,
+                rows_changed BIGINT NOT NULL,
+                load_mode TEXT NOT NULL,
+                loaded_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                PRIMARY KEY (table_name, file_name)
+            )
+        """))
+
+    def is_file_loaded(self, engine, table_name, file_name, checksum):
+        """Indica se o arquivo, com o mesmo checksum, já foi carregado na tabela e a tabela ainda existe"""
+        with engine.begin() as conn:
+            self.ensure_load_manifest(conn)
+            row = conn.execute(
+                text("""
+                    SELECT 1 FROM cemig_meta.load_manifest
+                    WHERE table_name = :table_name AND file_name = :file_name AND checksum = :checksum
+                      AND to_regclass(:qualified_name) IS NOT NULL
+                """),
+                {
+                    "table_name": table_name,
+                    "file_name": file_name,
+                    "checksum": checksum,
+                    "qualified_name": self.quote_identifier(table_name),
+                }
+            ).first()
+        return row is not None
+
+    def record_manifest(self, engine, table_name, file_name, checksum, row_count, rows_changed, mode):
+        """Registra no manifesto o checksum, o número de linhas e o horário da carga do arquivo"""
+        with engine.begin() as conn:
+            self.ensure_load_manifest(conn)
+            conn.execute(
+                text("""
+                    INSERT INTO cemig_meta.load_manifest
+                        (table_name, file_name, checksum, row_count, rows_changed, load_mode)
+                    VALUES (:table_name, :file_name, :checksum, :row_count, :rows_changed, :load_mode)
+                    ON CONFLICT (table_name, file_name) DO UPDATE
+                    SET checksum = EXCLUDED.checksum, row_count = EXCLUDED.row_count,
+                        rows_changed = EXCLUDED.rows_changed, load_mode = EXCLUDED.load_mode,
+                        loaded_at = now()
+                """),
+                {
+                    "table_name": table_name,
+                    "file_name": file_name,
+                    "checksum": checksum,
+                    "row_count": row_count,
+                    "rows_changed": rows_changed,
+                    "load_mode": mode,
+                }
+            )
+
+    def file_checksum(self, csv_path, block_size=1024 * 1024):
+        """SHA-256 do conteúdo do arquivo, lido em blocos"""
+        digest = hashlib.sha256()
+        with open(csv_path, 'rb') as file:
+            for block in iter(lambda: file.read(block_size), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def table_exists(self, engine, table_name):
+        """Verifica se a tabela existe no banco"""
+        with engine.connect() as conn:
+            return conn.execute(
+                text("SELECT to_regclass(:qualified_name) IS NOT NULL"),
+                {"qualified_name": self.quote_identifier(table_name)}
+            ).scalar()
+
+    def get_index_advisor(self):
+        """Carrega index_config.yaml e a carga de trabalho do advisor uma única vez por instância"""
+        if self._index_config is None:
+            self._index_config = load_index_config(self.index_config_file)
+            if self._index_config['advisor']['enabled']:
+                self._index_advisor = build_advisor(self._index_config)
+        return self._index_config, self._index_advisor
+
+    def optimize_table(self, engine, table_name):
+        """
+        Passo pós-carga: ANALYZE e criação dos índices declarados em
+        index_config.yaml e dos recomendados pelo advisor, um a um com
+        CREATE INDEX CONCURRENTLY (sem bloquear escritas na tabela).
+
+        Uma falha aqui não desfaz a carga, apenas é reportada.
+        """
+        try:
+            config, advisor = self.get_index_advisor()
+            started = time.perf_counter()
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                specs = apply_table_indexes(conn, table_name, config, advisor)
+            for spec in specs:
+                print(f"  Índice {spec.method} ({', '.join(spec.columns)}): {spec.reason}")
+            print(f"  Índices e estatísticas: {time.perf_counter() - started:.2f}s")
+            return specs
+        except Exception as e:
+            print(f"  Aviso: falha ao criar índices/estatísticas de {table_name}: {e}")
+            return []
+
+    def dependent_views(self, table_name):
+        """Visões materializadas de materialized_views.yaml que leem a tabela"""
+        if self._view_definitions is None:
+            self._view_definitions = load_view_definitions(str(self.views_file))
+        return [view for view in self._view_definitions if view.source == table_name]
+
+    def drop_materialized_views(self, engine, table_name):
+        """Remove as visões dependentes antes de recriar a tabela de origem (recriadas após a carga)"""
+        views = self.dependent_views(table_name)
+        if not views:
+            return
+        with engine.begin() as conn:
+            for view in views:
+                conn.exec_driver_sql(view.drop_sql())
+
+    def refresh_materialized_views(self, engine, table_name):
+        """
+        Atualiza as visões pré-agregadas da tabela após a carga: REFRESH
+        CONCURRENTLY se a visão existir (consultas concorrentes continuam lendo
+        a versão anterior), ou criação com índice único e ANALYZE.
+
+        Se a atualização de uma visão falhar, ela é removida para que as
+        consultas voltem a ler a tabela de origem; a carga não é desfeita. Se
+        nem a remoção for possível, a carga é reportada como falha.
+        """
+        views = self.dependent_views(table_name)
+        if not views:
+            return
+
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            for view in views:
+                started = time.perf_counter()
+                try:
+                    exists = conn.execute(
+                        text("SELECT 1 FROM pg_matviews WHERE schemaname = current_schema() AND matviewname = :name"),
+                        {"name": view.name}
+                    ).first() is not None
+                    if exists:
+                        conn.exec_driver_sql(view.refresh_sql())
+                        action = "atualizada"
+                    else:
+                        conn.exec_driver_sql(view.create_sql())
+                        if view.unique_index_sql():
+                            conn.exec_driver_sql(view.unique_index_sql())
+                        action = "criada"
+                    conn.exec_driver_sql(f"ANALYZE {self.quote_identifier(view.name)}")
+                    print(f"  Visão {view.name} {action}: {time.perf_counter() - started:.2f}s")
+                except Exception as e:
+                    print(f"  Aviso: falha ao atualizar a visão {view.name}: {e}")
+                    # uma visão desatualizada continuaria atendendo as consultas reescritas
+                    # com dados anteriores à carga; sem ela, o agente lê a tabela de origem
+                    try:
+                        conn.exec_driver_sql(view.drop_sql())
+                        print(f"  Visão {view.name} removida; as consultas usarão {table_name}")
+                    except Exception as drop_error:
+                        print(f"  ERRO: não foi possível remover a visão desatualizada {view.name}: {drop_error}")
+                        raise
+
     def clean_table_name(self, filename, folder):
         """Limpa e formata o nome da tabela"""
         table_name = filename.replace('.csv', '')
@@ -47,9 +263,112 @@ class CSVToGCP:
             result = chardet.detect(raw_data)
             return result['encoding']
 
-    def try_read_csv(self, csv_path):
-        """Tenta ler o CSV com diferentes métodos"""
+    def iter_csv_chunks(self, csv_path, chunksize):
+        """
+        Lê o CSV em blocos com o engine C do pandas, usando o perfil de leitura
+        (encoding, separador, aspas, cabeçalho) obtido por amostragem. Todas as
+        colunas são lidas como texto para que os blocos tenham o mesmo schema;
+        campos vazios viram NULL.
+        """
+        profile = self.read_profiles.get(csv_path)
+        print(f"  Perfil de leitura: {profile}")
+        return pd.read_csv(
+            csv_path,
+            **profile.read_csv_kwargs(),
+            **TEXT_READ_OPTIONS,
+            chunksize=chunksize,
+            on_bad_lines='skip'
+        )
+
+    def load_csv_streaming(
+        self,
+        engine,
+        csv_path,
+        table_name,
+        chunksize,
+        use_staging=True,
+        infer_types=False,
+        normalize_categories=False,
+        key_columns=None
+    ):
+        """
+        Carrega o CSV bloco a bloco via COPY, sem materializar o arquivo inteiro.
+
+        O pico de memória é limitado pelo tamanho do bloco. A tabela (de staging,
+        com use_staging=True) é criada na mesma transação das cópias e da troca
+        pela tabela final, então uma falha não deixa tabelas parciais no banco.
+        Com infer_types=True os tipos são inferidos a partir do primeiro bloco.
+        Com key_columns, o índice único da chave natural também é criado nessa
+        transação: uma chave duplicada no arquivo desfaz a carga inteira.
+
+        Returns:
+            Tupla (linhas carregadas, número de colunas)
+        """
+        target_table = self.staging_table_name(table_name) if use_staging else table_name
+        total_rows = 0
+        total_columns = 0
+        schema = None
+
+        raw_connection = engine.raw_connection()
+        try:
+            cursor = raw_connection.cursor()
+            for index, chunk in enumerate(self.iter_csv_chunks(csv_path, chunksize)):
+                if index == 0:
+                    if infer_types:
+                        schema = infer_schema(chunk, table_name, normalize_categories=normalize_categories)
+                        print(f"  Tipos inferidos: {schema.summary()}")
+                        self.ensure_enum_types(engine, schema)
+                    self.create_empty_table(cursor, engine, target_table, df=chunk, schema=schema)
+                    total_columns = len(chunk.columns)
+                if schema is not None:
+                    chunk = schema.prepare(chunk)
+                    self.ensure_enum_types(engine, schema, chunk)
+                with self.db_writer_slot():
+                    self.copy_dataframe(cursor, chunk, target_table)
+                total_rows += len(chunk)
+                print(f"  Bloco {index + 1}: {total_rows} linhas carregadas")
+
+            if total_columns == 0:
+                raise ValueError("Arquivo CSV vazio")
+
+            with self.db_writer_slot():
+                if use_staging:
+                    self.swap_tables(cursor, target_table, table_name)
+                if key_columns:
+                    cursor.execute(self.natural_key_index_sql(table_name, key_columns))
+                raw_connection.commit()
+            cursor.close()
+        except Exception:
+            raw_connection.rollback()
+            raise
+        finally:
+            raw_connection.close()
+
+        return total_rows, total_columns
+
+    def try_read_csv(self, csv_path, **read_options):
+        """
+        Lê o CSV com o perfil de leitura detectado por amostragem (uma única leitura completa)
+
+        read_options: argumentos extras para pandas.read_csv (ex.: TEXT_READ_OPTIONS)
+        """
         print(f"  Tentando ler: {csv_path}")
+
+        try:
+            profile = self.read_profiles.get(csv_path)
+            print(f"  Perfil de leitura: {profile}")
+            df = pd.read_csv(csv_path, on_bad_lines='skip', **profile.read_csv_kwargs(), **read_options)
+            if len(df.columns) > 1 or len(df) > 0:
+                return df
+        except Exception as e:
+            print(f"  Falha com o perfil detectado: {e}")
+            self.read_profiles.invalidate(csv_path)
+
+        return self.try_read_csv_fallback(csv_path, **read_options)
+
+    def try_read_csv_fallback(self, csv_path, **read_options):
+        """Tenta ler o CSV com diferentes métodos"""
+        print("  Usando leitura por tentativas de encoding/separador")
         
         # Primeiro, tenta detectar o encoding automaticamente
         try:
@@ -61,7 +380,8 @@ class CSVToGCP:
                     encoding=detected_encoding,
                     sep=None,
                     engine='python',
-                    on_bad_lines='skip'
+                    on_bad_lines='skip',
+                    **read_options
                 )
                 print(f"  Sucesso com encoding detectado: {detected_encoding}")
                 return df
@@ -83,7 +403,8 @@ class CSVToGCP:
                         sep=sep,
                         engine='python',
                         on_bad_lines='skip',
-                        quoting=3
+                        quoting=3,
+                        **read_options
                     )
                     if len(df.columns) > 1 or len(df) > 0:
                         print(f"  Sucesso - Encoding: {encoding}, Separador: {sep}")
@@ -93,7 +414,7 @@ class CSVToGCP:
         
         #ultimo recurso
         try:
-            df = pd.read_table(csv_path, encoding='utf-8', on_bad_lines='skip')
+            df = pd.read_table(csv_path, encoding='utf-8', on_bad_lines='skip', **read_options)
             print("  Sucesso com read_table")
             return df
         except:
@@ -101,56 +422,575 @@ class CSVToGCP:
         
         raise Exception("Não foi possível ler o arquivo com nenhum encoding/separador")
 
-    def process_csv(self, csv_path, table_name=None):
-        """Processa um arquivo CSV específico"""
+    def quote_identifier(self, name):
+        """Coloca um identificador entre aspas duplas para uso em SQL"""
+        return '"' + str(name).replace('"', '""') + '"'
+
+    def staging_table_name(self, table_name, suffix="__staging"):
+        """Nome da tabela temporária usada na carga com troca atômica"""
+        return table_name[:63 - len(suffix)] + suffix
+
+    def create_empty_table(self, cursor, engine, table_name, df=None, schema=None):
+        """
+        Cria (ou recria) a tabela sem dados na transação do cursor, com os tipos
+        do schema inferido ou, sem ele, os que o pandas usaria para o DataFrame
+        """
+        if schema is not None:
+            create_sql = schema.create_table_sql(table_name)
+        else:
+            create_sql = pd.io.sql.get_schema(df.head(0), table_name, con=engine)
+        cursor.execute(f"DROP TABLE IF EXISTS {self.quote_identifier(table_name)}")
+        cursor.execute(create_sql)
+
+    def create_table_with_schema(self, engine, schema, table_name):
+        """Cria (ou recria) a tabela com os tipos do schema inferido, sem dados"""
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {self.quote_identifier(table_name)}"))
+            conn.exec_driver_sql(schema.create_table_sql(table_name))
+
+    def ensure_enum_types(self, engine, schema, frame=None):
+        """
+        Cria os tipos ENUM das colunas categóricas ou acrescenta os valores
+        novos encontrados no bloco.
+
+        Roda em autocommit, fora da transação da carga: um valor de ENUM só pode
+        ser usado depois que o ALTER TYPE que o criou for confirmado.
+        """
+        enum_columns = schema.enum_columns()
+        if not enum_columns:
+            return
+
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            for column in enum_columns:
+                labels = set(column.categories)
+                if frame is not None and column.name in frame.columns:
+                    labels.update(frame[column.name].dropna().astype(str).unique())
+                existing = [
+                    row[0] for row in conn.execute(
+                        text("""
+                            SELECT e.enumlabel
+                            FROM pg_type t
+                            JOIN pg_enum e ON e.enumtypid = t.oid
+                            WHERE t.typname = :type_name
+                            ORDER BY e.enumsortorder
+                        """),
+                        {"type_name": column.sql_type}
+                    )
+                ]
+                if not existing:
+                    values = ", ".join(quote_literal(label) for label in sorted(labels))
+                    conn.exec_driver_sql(f"CREATE TYPE {self.quote_identifier(column.sql_type)} AS ENUM ({values})")
+                    continue
+                for statement in enum_extension_sql(column.sql_type, existing, labels):
+                    conn.exec_driver_sql(statement)
+
+    def copy_dataframe(self, cursor, df, table_name):
+        """Envia o DataFrame para a tabela via COPY FROM STDIN (formato CSV)"""
+        buffer = io.StringIO()
+        df.to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+
+        columns = ", ".join(self.quote_identifier(column) for column in df.columns)
+        cursor.copy_expert(
+            f"COPY {self.quote_identifier(table_name)} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '')",
+            buffer
+        )
+
+    def swap_tables(self, cursor, staging_table, table_name):
+        """
+        Substitui a tabela final pela tabela de staging (executar dentro de uma transação)
+
+        As visões materializadas dependentes são removidas na mesma transação e
+        recriadas após a carga.
+        """
+        for view in self.dependent_views(table_name):
+            cursor.execute(view.drop_sql())
+        cursor.execute(f"DROP TABLE IF EXISTS {self.quote_identifier(table_name)}")
+        cursor.execute(
+            f"ALTER TABLE {self.quote_identifier(staging_table)} RENAME TO {self.quote_identifier(table_name)}"
+        )
+
+    def load_with_copy(self, engine, df, table_name, use_staging=True, schema=None, key_columns=None):
+        """
+        Carrega o DataFrame com COPY FROM STDIN.
+
+        Com use_staging=True os dados vão para uma tabela de staging, que
+        substitui a tabela final em uma única transação: consultas concorrentes
+        veem a versão antiga até o fim da carga, e uma falha não deixa a tabela
+        final pela metade nem a de staging no banco. Com schema, a tabela é
+        criada com os tipos inferidos (o DataFrame deve ter passado por
+        schema.prepare). Com key_columns, o índice único da chave natural é
+        criado na mesma transação, então uma chave duplicada desfaz a troca.
+        """
+        target_table = self.staging_table_name(table_name) if use_staging else table_name
+        if schema is not None:
+            self.ensure_enum_types(engine, schema)
+
+        raw_connection = engine.raw_connection()
+        try:
+            cursor = raw_connection.cursor()
+            self.create_empty_table(cursor, engine, target_table, df=df, schema=schema)
+            self.copy_dataframe(cursor, df, target_table)
+            if use_staging:
+                self.swap_tables(cursor, target_table, table_name)
+            if key_columns:
+                cursor.execute(self.natural_key_index_sql(table_name, key_columns))
+            raw_connection.commit()
+            cursor.close()
+        except Exception:
+            raw_connection.rollback()
+            raise
+        finally:
+            raw_connection.close()
+
+    def load_with_to_sql(self, engine, df, table_name, schema=None):
+        """Carrega o DataFrame com INSERTs multi-linha do pandas (método antigo)"""
+        if schema is not None:
+            self.ensure_enum_types(engine, schema)
+            self.create_table_with_schema(engine, schema, table_name)
+        df.to_sql(
+            name=table_name,
+            con=engine,
+            if_exists='append' if schema is not None else 'replace',
+            index=False,
+            method='multi',
+            chunksize=1000
+        )
+
+    def natural_key_index_sql(self, table_name, key_columns):
+        """CREATE UNIQUE INDEX da chave natural, exigido pelo ON CONFLICT das cargas incrementais"""
+        index_name = self.staging_table_name(table_name, suffix="__natural_key")
+        columns = ", ".join(self.quote_identifier(column) for column in key_columns)
+        return (
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {self.quote_identifier(index_name)} "
+            f"ON {self.quote_identifier(table_name)} ({columns})"
+        )
+
+    def create_natural_key_index(self, engine, table_name, key_columns):
+        """Cria o índice único da chave natural na tabela"""
+        with engine.begin() as conn:
+            conn.execute(text(self.natural_key_index_sql(table_name, key_columns)))
+
+    def merge_sql(self, source_table, table_name, columns, mode, key_columns=None):
+        """
+        Monta o INSERT que mescla a tabela de entrada na tabela final.
+
+        append com chave: ON CONFLICT DO NOTHING (só linhas com chave nova)
+        append sem chave: INSERT ... EXCEPT ALL (diferença de multiconjuntos: linhas
+                          repetidas no arquivo são mantidas, descontadas as cópias
+                          que já existem inteiras na tabela; NULLs comparam como iguais)
+        upsert: ON CONFLICT DO UPDATE, alterando apenas linhas que mudaram
+        """
+        target = self.quote_identifier(table_name)
+        source = self.quote_identifier(source_table)
+        column_list = ", ".join(self.quote_identifier(column) for column in columns)
+
+        if not key_columns:
+            if mode == 'upsert':
+                raise ValueError("O modo 'upsert' exige key_columns")
+            return (
+                f"INSERT INTO {target} ({column_list}) "
+                f"SELECT {column_list} FROM {source} EXCEPT ALL SELECT {column_list} FROM {target}"
+            )
+
+        keys = ", ".join(self.quote_identifier(column) for column in key_columns)
+        # DISTINCT ON evita que a mesma chave apareça duas vezes no mesmo INSERT ... ON CONFLICT
+        statement = (
+            f"INSERT INTO {target} ({column_list}) "
+            f"SELECT DISTINCT ON ({keys}) {column_list} FROM {source} "
+            f"ON CONFLICT ({keys}) "
+        )
+        update_columns = [column for column in columns if column not in key_columns]
+        if mode == 'append' or not update_columns:
+            return statement + "DO NOTHING"
+
+        assignments = ", ".join(
+            f"{self.quote_identifier(column)} = EXCLUDED.{self.quote_identifier(column)}"
+            for column in update_columns
+        )
+        current = ", ".join(f"{target}.{self.quote_identifier(column)}" for column in update_columns)
+        incoming = ", ".join(f"EXCLUDED.{self.quote_identifier(column)}" for column in update_columns)
+        return statement + f"DO UPDATE SET {assignments} WHERE ({current}) IS DISTINCT FROM ({incoming})"
+
+    def load_incremental(self, engine, frames, table_name, mode, key_columns=None, infer_types=False):
+        """
+        Mescla os dados na tabela existente sem recriá-la (modos 'append' e 'upsert').
+
+        Os blocos vão via COPY para uma tabela temporária com a mesma estrutura
+        da tabela final (os valores são convertidos para os tipos dela) e são
+        mesclados em uma única transação. Tabela, índices e estatísticas são
+        mantidos; só as linhas novas ou alteradas são gravadas. Com infer_types,
+        números e datas são convertidos conforme os tipos da tabela final.
+
+        Returns:
+            Tupla (linhas lidas, número de colunas, linhas inseridas/atualizadas)
+        """
+        incoming_table = self.staging_table_name(table_name, suffix="__incoming")
+        total_rows = 0
+        columns = None
+        schema = None
+
+        raw_connection = engine.raw_connection()
+        try:
+            cursor = raw_connection.cursor()
+            cursor.execute(f"SELECT * FROM {self.quote_identifier(table_name)} LIMIT 0")
+            target_columns = [column.name for column in cursor.description]
+            cursor.execute(
+                f"CREATE TEMP TABLE {self.quote_identifier(incoming_table)} "
+                f"(LIKE {self.quote_identifier(table_name)} INCLUDING DEFAULTS) ON COMMIT DROP"
+            )
+
+            for frame in frames:
+                if columns is None:
+                    columns = [str(column) for column in frame.columns]
+                    unknown = [column for column in columns if column not in target_columns]
+                    if unknown:
+                        raise ValueError(f"Colunas inexistentes na tabela {table_name}: {', '.join(unknown)}")
+                    missing_keys = [column for column in key_columns or [] if column not in columns]
+                    if missing_keys:
+                        raise ValueError(f"Colunas da chave ausentes no arquivo: {', '.join(missing_keys)}")
+                    if infer_types:
+                        cursor.execute(
+                            """
+                            SELECT column_name, data_type, udt_name
+                            FROM information_schema.columns
+                            WHERE table_schema = current_schema() AND table_name = %s
+                            """,
+                            (table_name,)
+                        )
+                        target_types = {name: (data_type, udt_name) for name, data_type, udt_name in cursor.fetchall()}
+                        schema = infer_schema(frame, table_name).restrict_to(target_types)
+                if schema is not None:
+                    frame = schema.prepare(frame)
+                    self.ensure_enum_types(engine, schema, frame)
+                with self.db_writer_slot():
+                    self.copy_dataframe(cursor, frame, incoming_table)
+                total_rows += len(frame)
+
+            if columns is None:
+                raise ValueError("Arquivo CSV vazio")
+
+            with self.db_writer_slot():
+                if key_columns:
+                    cursor.execute(self.natural_key_index_sql(table_name, key_columns))
+                cursor.execute(self.merge_sql(incoming_table, table_name, columns, mode, key_columns))
+                rows_changed = cursor.rowcount
+                raw_connection.commit()
+            cursor.close()
+        except Exception:
+            raw_connection.rollback()
+            raise
+        finally:
+            raw_connection.close()
+
+        return total_rows, len(columns), rows_changed
+
+    @contextmanager
+    def db_writer_slot(self):
+        """
+        Limita o número de processos escrevendo no banco ao mesmo tempo (modo paralelo).
+
+        Envolve só as escritas (COPY, merge/troca de tabelas e manutenção pós-carga);
+        a leitura e o parsing do CSV ficam fora, sobrepondo-se às escritas dos outros arquivos.
+        """
+        if self.writer_semaphore is None:
+            yield
+            return
+        self.writer_semaphore.acquire()
+        try:
+            yield
+        finally:
+            self.writer_semaphore.release()
+
+    def process_csv(
+        self,
+        csv_path,
+        table_name=None,
+        load_method='copy',
+        use_staging=True,
+        chunksize=None,
+        mode='replace',
+        key_columns=None,
+        skip_unchanged=None,
+        infer_types=False,
+        normalize_categories=False,
+        optimize=True,
+        refresh_views=True
+    ):
+        """
+        Processa um arquivo CSV específico
+
+        load_method: 'copy' (COPY FROM STDIN, padrão) ou 'to_sql' (INSERTs do pandas)
+        use_staging: com 'copy', carrega em uma tabela de staging e troca de forma atômica
+        chunksize: com 'copy', lê e carrega o arquivo em blocos desse número de linhas
+                   (memória limitada pelo bloco; colunas carregadas como texto)
+        mode: 'replace' recria a tabela; 'append' insere só as linhas novas;
+              'upsert' insere as novas e atualiza as existentes pela chave natural.
+              Se a tabela ainda não existir, a primeira carga é sempre completa.
+        key_columns: colunas da chave natural (obrigatória em 'upsert'; em 'append'
+                     sem chave, entram as cópias de cada linha além das que já
+                     existem idênticas na tabela)
+        skip_unchanged: pula o arquivo se o mesmo conteúdo (checksum) já foi carregado
+                        na tabela; padrão True nos modos incrementais
+        infer_types: lê as colunas como texto e infere DATE/TIMESTAMP/NUMERIC/
+                     SMALLINT/INTEGER/BIGINT (inclusive números no formato 1.234,56);
+                     com chunksize, a inferência usa o primeiro bloco. Desativado por
+                     padrão: as consultas de evals/data_for_benchmark e o prompt do
+                     agente tratam colunas como VlrTE e DtCriacao como texto
+                     (REPLACE(...)::numeric, TO_DATE(...)), o que falha em colunas tipadas.
+                     Sem inferência, cargas com chunksize criam todas as colunas como
+                     TEXT, enquanto cargas sem chunksize usam os tipos deduzidos pelo
+                     pandas (BIGINT, FLOAT etc.); a mesma tabela pode ter tipos
+                     diferentes conforme o modo de carga
+        normalize_categories: armazena colunas repetitivas de baixa cardinalidade
+                              (ex.: SigUF) como ENUM; filtros com LIKE nessas
+                              colunas exigem cast para text, e ORDER BY segue a
+                              ordem do ENUM, não a collation do banco
+        optimize: após a carga, roda ANALYZE e cria os índices configurados e
+                  recomendados pelo advisor (data/index_config.yaml)
+        refresh_views: após a carga, atualiza as visões materializadas da tabela
+                       (data/materialized_views.yaml)
+
+        As métricas da execução ficam em self.last_load_stats.
+        """
         csv_path = Path(csv_path)
+        self.last_load_stats = {
+            'file': str(csv_path),
+            'table': table_name,
+            'success': False,
+            'skipped': False,
+            'rows': 0,
+            'rows_changed': 0,
+            'columns': 0,
+            'seconds': 0.0,
+            'load_seconds': 0.0,
+            'rows_per_second': 0.0,
+            'error': None,
+        }
         
         if not csv_path.exists():
             print(f"ERRO: Arquivo não encontrado: {csv_path}")
+            self.last_load_stats['error'] = "Arquivo não encontrado"
             return False
         
         if not csv_path.is_file():
             print(f"ERRO: O path não é um arquivo: {csv_path}")
+            self.last_load_stats['error'] = "O path não é um arquivo"
             return False
         
         if table_name is None:
             table_name = self.clean_table_name(csv_path.name, csv_path.parent.name)
+        self.last_load_stats['table'] = table_name
+        if skip_unchanged is None:
+            skip_unchanged = mode != 'replace'
         
         print(f"Processando: {csv_path}")
+        started = time.perf_counter()
+        engine = None
         
         try:
-            df = self.try_read_csv(csv_path)
-            
-            # Remove valores vazios
-            df = df.replace({'': None})
-            
-            # Conecta ao banco e salva
+            if mode not in LOAD_MODES:
+                raise ValueError(f"Modo de carga inválido: {mode}. Use um de {', '.join(LOAD_MODES)}")
+            if mode == 'upsert' and not key_columns:
+                raise ValueError("O modo 'upsert' exige key_columns")
+
             engine = self.get_engine()
-            df.to_sql(
-                name=table_name,
-                con=engine,
-                if_exists='replace',
-                index=False,
-                method='multi',
-                chunksize=1000
-            )
+            checksum = self.file_checksum(csv_path)
+            if skip_unchanged and self.is_file_loaded(engine, table_name, csv_path.name, checksum):
+                print(f"  SEM ALTERAÇÕES: {csv_path.name} já carregado em {table_name} (checksum {checksum[:12]})")
+                self.last_load_stats.update({'success': True, 'skipped': True})
+                return True
+
+            incremental = mode != 'replace' and self.table_exists(engine, table_name)
+            streaming = bool(chunksize) and (load_method == 'copy' or incremental)
+
+            schema = None
+            if not streaming:
+                df = self.try_read_csv(csv_path, **(TEXT_READ_OPTIONS if infer_types else {}))
+                
+                # Remove valores vazios
+                df = df.replace({'': None})
+
+                if infer_types and not incremental:
+                    schema = infer_schema(df, table_name, normalize_categories=normalize_categories)
+                    print(f"  Tipos inferidos: {schema.summary()}")
+                    df = schema.prepare(df)
+
+            if not incremental and (not use_staging or load_method == 'to_sql'):
+                self.drop_materialized_views(engine, table_name)
+            load_start = time.perf_counter()
+            if incremental:
+                frames = self.iter_csv_chunks(csv_path, chunksize) if streaming else [df]
+                total_rows, total_columns, rows_changed = self.load_incremental(
+                    engine, frames, table_name, mode, key_columns, infer_types=infer_types
+                )
+                load_label = f"{mode} incremental"
+            elif streaming:
+                total_rows, total_columns = self.load_csv_streaming(
+                    engine,
+                    csv_path,
+                    table_name,
+                    chunksize,
+                    use_staging=use_staging,
+                    infer_types=infer_types,
+                    normalize_categories=normalize_categories,
+                    key_columns=key_columns
+                )
+                rows_changed = total_rows
+                load_label = f"copy em blocos de {chunksize}"
+            else:
+                with self.db_writer_slot():
+                    if load_method == 'copy':
+                        self.load_with_copy(
+                            engine, df, table_name, use_staging=use_staging, schema=schema, key_columns=key_columns
+                        )
+                    elif load_method == 'to_sql':
+                        self.load_with_to_sql(engine, df, table_name, schema=schema)
+                    else:
+                        raise ValueError(f"Método de carga inválido: {load_method}")
+                total_rows = rows_changed = len(df)
+                total_columns = len(df.columns)
+                load_label = load_method
+
+            load_elapsed = time.perf_counter() - load_start
+            # a nova versão invalida o cache de consultas antes dos passos pós-carga,
+            # que podem falhar com os dados já trocados
+            if rows_changed:
+                self.record_table_load(engine, table_name)
+            if key_columns and not incremental and not streaming and load_method == 'to_sql':
+                # nas cargas com COPY o índice é criado na transação da troca
+                with self.db_writer_slot():
+                    self.create_natural_key_index(engine, table_name, key_columns)
+            with self.db_writer_slot():
+                if optimize and rows_changed:
+                    self.optimize_table(engine, table_name)
+                if refresh_views and rows_changed:
+                    self.refresh_materialized_views(engine, table_name)
+            self.record_manifest(engine, table_name, csv_path.name, checksum, total_rows, rows_changed, mode)
             
-            print(f"  SUCESSO: {table_name} ({len(df)} linhas, {len(df.columns)} colunas)")
-            engine.dispose()
+            rows_per_second = total_rows / load_elapsed if load_elapsed > 0 else float(total_rows)
+            print(f"  SUCESSO: {table_name} ({total_rows} linhas, {total_columns} colunas)")
+            if incremental:
+                print(f"  {rows_changed} linhas inseridas/atualizadas")
+            print(f"  Carga ({load_label}): {load_elapsed:.2f}s, {rows_per_second:,.0f} linhas/s")
+
+            self.last_load_stats.update({
+                'success': True,
+                'rows': total_rows,
+                'rows_changed': rows_changed,
+                'columns': total_columns,
+                'load_seconds': load_elapsed,
+                'rows_per_second': rows_per_second,
+            })
             return True
             
         except Exception as e:
             print(f"  ERRO ao processar {csv_path.name}: {e}")
+            self.last_load_stats['error'] = str(e)
             return False
 
-    def process_multiple_csvs(self, csv_paths):
-        """Processa múltiplos arquivos CSV"""
+        finally:
+            if engine is not None:
+                engine.dispose()
+            self.last_load_stats['seconds'] = time.perf_counter() - started
+
+    def process_multiple_csvs(self, csv_paths, workers=1, max_db_writers=None, **load_options):
+        """
+        Processa múltiplos arquivos CSV
+
+        workers: número de processos; com 1, os arquivos são processados em sequência
+        max_db_writers: máximo de processos carregando no banco ao mesmo tempo (padrão: workers)
+        load_options: repassadas para process_csv (load_method, use_staging, chunksize,
+                      mode, key_columns, skip_unchanged, infer_types,
+                      normalize_categories, optimize, refresh_views)
+
+        Uma falha em um arquivo não interrompe os demais. Retorna um relatório
+        por arquivo (sucesso, linhas, tempo total, tempo e linhas/s da carga, erro).
+        """
+        csv_paths = list(csv_paths)
+        started = time.perf_counter()
         results = {}
-        for csv_path in csv_paths:
-            results[csv_path] = self.process_csv(csv_path)
+
+        if workers <= 1:
+            for csv_path in csv_paths:
+                self.process_csv(csv_path, **load_options)
+                results[csv_path] = dict(self.last_load_stats)
+        else:
+            writer_semaphore = multiprocessing.BoundedSemaphore(max_db_writers or workers)
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(writer_semaphore, self.init_options)
+            ) as executor:
+                futures = {
+                    executor.submit(_process_csv_worker, str(csv_path), load_options): csv_path
+                    for csv_path in csv_paths
+                }
+                for future in as_completed(futures):
+                    csv_path = futures[future]
+                    try:
+                        results[csv_path] = future.result()
+                    except Exception as e:
+                        print(f"  ERRO no processo de {csv_path}: {e}")
+                        results[csv_path] = {
+                            'file': str(csv_path), 'table': None, 'success': False, 'skipped': False,
+                            'rows': 0, 'rows_changed': 0, 'columns': 0, 'seconds': 0.0,
+                            'load_seconds': 0.0, 'rows_per_second': 0.0, 'error': str(e),
+                        }
+            results = {csv_path: results[csv_path] for csv_path in csv_paths}
+
+        self.print_load_report(results, time.perf_counter() - started)
         return results
 
+    def print_load_report(self, results, wall_seconds):
+        """Imprime o relatório de tempo e vazão por arquivo"""
+        print(f"\n{'='*101}")
+        print(
+            f"{'Arquivo':<38} {'Status':<6} {'Linhas':>10} {'Alteradas':>10} "
+            f"{'Tempo (s)':>10} {'Carga (s)':>10} {'Linhas/s':>12}"
+        )
+        print(f"{'='*101}")
+        total_rows = 0
+        for stats in results.values():
+            if stats['skipped']:
+                status = "PULADO"
+            else:
+                status = "OK" if stats['success'] else "ERRO"
+            total_rows += stats['rows']
+            print(
+                f"{Path(stats['file']).name[:38]:<38} {status:<6} {stats['rows']:>10} {stats['rows_changed']:>10} "
+                f"{stats['seconds']:>10.2f} {stats['load_seconds']:>10.2f} {stats['rows_per_second']:>12,.0f}"
+            )
+            if stats['error']:
+                print(f"    {stats['error']}")
+        failures = sum(1 for stats in results.values() if not stats['success'])
+        throughput = total_rows / wall_seconds if wall_seconds > 0 else 0.0
+        print(f"{'='*101}")
+        print(f"Total: {len(results)} arquivos, {failures} com erro, {total_rows} linhas em {wall_seconds:.2f}s ({throughput:,.0f} linhas/s)")
+
     def run(self, csv_file, table_name=None):
         """Método principal para executar o processo completo"""
         self.create_database()
-        return self.process_csv(csv_file, table_name)
\ No newline at end of file
+        return self.process_csv(csv_file, table_name)
+
+
+_worker_semaphore = None
+_worker_init_options = {}
+
+
+def _init_worker(writer_semaphore, init_options):
+    """
+    Inicializa um processo do pool com o semáforo de escritores do banco e os
+    argumentos do CSVToGCP do processo principal
+    """
+    global _worker_semaphore, _worker_init_options
+    _worker_semaphore = writer_semaphore
+    _worker_init_options = init_options
+
+
+def _process_csv_worker(csv_path, load_options):
+    """Processa um CSV em um processo do pool e retorna suas métricas"""
+    loader = CSVToGCP(**_worker_init_options)
+    loader.writer_semaphore = _worker_semaphore
+    loader.process_csv(csv_path, **load_options)
+    return loader.last_load_stats
\ No newline at end of file
@@ -0,0 +1,495 @@
+"""
+Índices e estatísticas pós-carga das tabelas da ANEEL.
+
+Combina índices declarados em index_config.yaml com recomendações derivadas
+da carga de trabalho: as consultas do benchmark (evals/data_for_benchmark/
+queries.csv) e as consultas registradas pelo agente (QUERY_STATS_DB, com
+peso igual ao número de execuções de cada fingerprint). Colunas usadas
+em filtros de igualdade e joins viram índices B-tree (compostos quando
+aparecem juntas); filtros de intervalo em colunas fisicamente ordenadas de
+tabelas grandes viram BRIN.
+"""
+import csv
+import hashlib
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import yaml
+from sqlalchemy import text
+
+from ..tools.connector.query_stats import read_query_stats_workload
+from ..tools.connector.sql_utils import extract_tables, mask_literals, normalize_sql
+
+DEFAULT_CONFIG_FILE = Path(__file__).parent / 'index_config.yaml'
+INDEX_METHODS = ('btree', 'brin')
+
+DEFAULT_ADVISOR_OPTIONS = {
+    'enabled': True,
+    'min_occurrences': 1,
+    'max_indexes_per_table': 5,
+    'max_selectivity': 0.2,
+    'brin_min_rows': 100000,
+    'brin_min_correlation': 0.9,
+}
+
+_QUALIFIER = r'(?:(?:"(?:[^"]|"")+"|[a-z_][a-z0-9_$]*)\s*\.\s*)?'
+_COLUMN = _QUALIFIER + r'("(?:[^"]|"")+"|[a-z_][a-z0-9_$]*)'
+_CAST = r'(?:\s*::\s*[a-z_][a-z0-9_ ]*?)?'
+
+_CLAUSE = re.compile(
+    r'\b(where|group by|order by|having|limit|offset|window|union|intersect|except|on|select|from|join)\b'
+)
+# o lookbehind impede que o tipo de um cast (ex.: ::numeric > 500) seja lido como coluna
+_NOT_INSIDE_TOKEN = r'(?<![\w$".:])'
+_PREDICATE = re.compile(_NOT_INSIDE_TOKEN + _COLUMN + _CAST + r'\s*(<=|>=|<>|!=|=|<|>|\bin\b|\bbetween\b)')
+_JOIN_CONDITION = re.compile(_NOT_INSIDE_TOKEN + _COLUMN + _CAST + r'\s*=\s*' + _COLUMN)
+_ORDER_SUFFIX = re.compile(r'\s+(asc|desc|nulls\s+first|nulls\s+last)\b.*$')
+
+_KEYWORDS = {
+    'and', 'or', 'not', 'null', 'true', 'false', 'case', 'when', 'then', 'else', 'end',
+    'select', 'distinct', 'exists', 'any', 'all', 'some', 'interval',
+}
+
+RANGE_OPERATORS = ('<', '>', '<=', '>=', 'between')
+EQUALITY_OPERATORS = ('=', 'in')
+
+
+def quote_identifier(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _unquote(identifier):
+    if identifier.startswith('"') and identifier.endswith('"'):
+        return identifier[1:-1].replace('""', '"')
+    return identifier
+
+
+@dataclass(frozen=True)
+class ParsedQuery:
+    """Uso de colunas de uma consulta, por cláusula"""
+
+    tables: Tuple[str, ...]
+    equality: Tuple[str, ...] = ()
+    range: Tuple[str, ...] = ()
+    join: Tuple[str, ...] = ()
+    group: Tuple[str, ...] = ()
+    order: Tuple[str, ...] = ()
+
+
+@dataclass
+class ColumnStatistics:
+    n_distinct: float
+    correlation: Optional[float]
+
+
+@dataclass
+class TableStatistics:
+    """Estatísticas do planejador usadas pelo advisor"""
+
+    rows: float = 0.0
+    columns: Set[str] = field(default_factory=set)
+    column_stats: Dict[str, ColumnStatistics] = field(default_factory=dict)
+    existing_indexes: List[Tuple[str, ...]] = field(default_factory=list)
+
+    def distinct_values(self, column):
+        stats = self.column_stats.get(column)
+        if stats is None or stats.n_distinct == 0:
+            return None
+        if stats.n_distinct < 0:
+            return -stats.n_distinct * max(self.rows, 1.0)
+        return stats.n_distinct
+
+
+@dataclass
+class IndexSpec:
+    """Índice a criar"""
+
+    table: str
+    columns: Tuple[str, ...]
+    method: str = 'btree'
+    reason: str = ''
+
+    @property
+    def name(self):
+        name = f"ix_{self.table}_{'_'.join(self.columns)}".lower()
+        if self.method != 'btree':
+            name += f"_{self.method}"
+        if len(name) <= 63:
+            return name
+        digest = hashlib.sha1(name.encode('utf-8')).hexdigest()[:8]
+        return f"{name[:54]}_{digest}"
+
+    def create_sql(self, concurrently=False):
+        columns = ", ".join(quote_identifier(column) for column in self.columns)
+        mode = "CONCURRENTLY " if concurrently else ""
+        return (
+            f"CREATE INDEX {mode}IF NOT EXISTS {quote_identifier(self.name)} "
+            f"ON {quote_identifier(self.table)} USING {self.method} ({columns})"
+        )
+
+    def drop_sql(self, concurrently=False):
+        mode = "CONCURRENTLY " if concurrently else ""
+        return f"DROP INDEX {mode}IF EXISTS {quote_identifier(self.name)}"
+
+
+def _clauses(masked_sql):
+    """Divide a consulta em trechos (palavra-chave, texto até a próxima palavra-chave)"""
+    matches = list(_CLAUSE.finditer(masked_sql))
+    for index, match in enumerate(matches):
+        end = matches[index + 1].start() if index + 1 < len(matches) else len(masked_sql)
+        yield match.group(1), masked_sql[match.end():end]
+
+
+def _column_name(token):
+    name = _unquote(token)
+    return None if name in _KEYWORDS else name
+
+
+def _column_list(segment):
+    columns = []
+    for item in segment.split(','):
+        item = _ORDER_SUFFIX.sub('', item.strip())
+        match = re.fullmatch(_COLUMN, item)
+        if match:
+            name = _column_name(match.group(1))
+            if name:
+                columns.append(name)
+    return columns
+
+
+def _unique(values):
+    return tuple(dict.fromkeys(values))
+
+
+def parse_query(sql):
+    """
+    Extrai tabelas e colunas usadas em filtros, joins, GROUP BY e ORDER BY.
+
+    Heurística baseada em expressões regulares sobre a consulta normalizada;
+    expressões (funções, casts de texto para número etc.) são ignoradas.
+    """
+    masked = mask_literals(normalize_sql(sql))
+    equality, ranges, joins, group, order = [], [], [], [], []
+
+    for keyword, segment in _clauses(masked):
+        if keyword == 'on':
+            for match in _JOIN_CONDITION.finditer(segment):
+                joins.extend(name for name in (_column_name(match.group(1)), _column_name(match.group(2))) if name)
+        elif keyword == 'where':
+            for match in _PREDICATE.finditer(segment):
+                name = _column_name(match.group(1))
+                if not name:
+                    continue
+                operator = match.group(2)
+                if operator in EQUALITY_OPERATORS:
+                    equality.append(name)
+                elif operator in RANGE_OPERATORS:
+                    ranges.append(name)
+        elif keyword == 'group by':
+            group.extend(_column_list(segment))
+        elif keyword == 'order by':
+            order.extend(_column_list(segment))
+
+    return ParsedQuery(
+        tables=tuple(sorted(extract_tables(sql))),
+        equality=_unique(equality),
+        range=_unique(ranges),
+        join=_unique(joins),
+        group=_unique(group),
+        order=_unique(order),
+    )
+
+
+def read_benchmark_queries(csv_path):
+    """Lê a coluna query_sql do queries.csv do benchmark (separado por ';')"""
+    queries = []
+    with open(csv_path, 'r', encoding='utf-8') as file:
+        reader = csv.reader(file, delimiter=';')
+        header = next(reader, None)
+        if not header:
+            return queries
+        column = header.index('query_sql') if 'query_sql' in header else 1
+        for row in reader:
+            if len(row) > column and row[column].strip():
+                queries.append(row[column])
+    return queries
+
+
+class IndexAdvisor:
+    """Recomenda índices a partir de uma carga de trabalho de consultas SQL"""
+
+    def __init__(self, **options):
+        self.options = {**DEFAULT_ADVISOR_OPTIONS, **options}
+        self.queries = Counter()
+
+    def add_query(self, sql, weight=1):
+        try:
+            parsed = parse_query(sql)
+        except Exception:
+            return
+        if parsed.tables:
+            self.queries[parsed] += weight
+
+    def add_queries(self, queries: Iterable[str]):
+        for sql in queries:
+            self.add_query(sql)
+        return self
+
+    def add_weighted_queries(self, queries: Iterable[Tuple[str, int]]):
+        for sql, weight in queries:
+            self.add_query(sql, weight)
+        return self
+
+    def _resolve(self, parsed, table_name, columns, names):
+        if columns:
+            return [name for name in names if name in columns]
+        return list(names) if parsed.tables == (table_name,) else []
+
+    def candidate_keys(self, table_name, columns=None):
+        """
+        Chaves de índice candidatas e quantas consultas as usariam.
+
+        Cada consulta contribui com (colunas de igualdade/join, em ordem) seguidas
+        da primeira coluna de intervalo, a ordem que um B-tree composto atende.
+        """
+        candidates = Counter()
+        usage = {}
+        for parsed, count in self.queries.items():
+            if table_name not in parsed.tables:
+                continue
+            equality = self._resolve(parsed, table_name, columns, _unique(parsed.equality + parsed.join))
+            ranges = [name for name in self._resolve(parsed, table_name, columns, parsed.range) if name not in equality]
+            key = tuple(equality) + tuple(ranges[:1])
+            if not key:
+                continue
+            candidates[key] += count
+            usage[key] = (tuple(equality), tuple(ranges[:1]))
+        return candidates, usage
+
+    def recommend(
+        self,
+        table_name: str,
+        stats: Optional[TableStatistics] = None,
+        existing: Sequence[Tuple[str, ...]] = ()
+    ) -> List[IndexSpec]:
+        """
+        Recomenda índices para a tabela.
+
+        Args:
+            table_name: Tabela
+            stats: Estatísticas do planejador (após ANALYZE); sem elas, nenhuma
+                   chave é descartada por seletividade e não há BRIN
+            existing: Chaves dos índices existentes ou já planejados
+
+        Returns:
+            Lista de IndexSpec, da mais usada para a menos usada
+        """
+        options = self.options
+        columns = stats.columns if stats is not None and stats.columns else None
+        candidates, usage = self.candidate_keys(table_name, columns)
+
+        covered = [tuple(key) for key in existing]
+        recommendations = []
+        ranked = sorted(candidates.items(), key=lambda item: (-item[1], -len(item[0]), item[0]))
+
+        for key, count in ranked:
+            if len(recommendations) >= options['max_indexes_per_table']:
+                break
+            if count < options['min_occurrences']:
+                continue
+            if any(index[:len(key)] == key for index in covered):
+                continue
+
+            equality, ranges = usage[key]
+            if stats is not None and equality and not ranges:
+                selectivity = 1.0
+                for column in equality:
+                    distinct = stats.distinct_values(column)
+                    if distinct:
+                        selectivity /= distinct
+                if selectivity > options['max_selectivity']:
+                    continue
+
+            method = 'btree'
+            if stats is not None and not equality and len(key) == 1:
+                column_stats = stats.column_stats.get(key[0])
+                if (
+                    stats.rows >= options['brin_min_rows']
+                    and column_stats is not None
+                    and column_stats.correlation is not None
+                    and abs(column_stats.correlation) >= options['brin_min_correlation']
+                ):
+                    method = 'brin'
+
+            parts = []
+            if equality:
+                parts.append(f"igualdade/join em {', '.join(equality)}")
+            if ranges:
+                parts.append(f"intervalo em {', '.join(ranges)}")
+            reason = f"{count} consulta(s): {'; '.join(parts)}"
+
+            recommendations.append(IndexSpec(table=table_name, columns=key, method=method, reason=reason))
+            covered.append(key)
+
+        return recommendations
+
+
+def load_index_config(config_file=None):
+    """Lê index_config.yaml: opções do advisor, carga de trabalho e índices declarados por tabela"""
+    config_file = Path(config_file or DEFAULT_CONFIG_FILE)
+    config = {}
+    if config_file.exists():
+        with open(config_file, 'r', encoding='utf-8') as file:
+            config = yaml.safe_load(file) or {}
+
+    return {
+        'base_dir': config_file.parent,
+        'advisor': {**DEFAULT_ADVISOR_OPTIONS, **(config.get('advisor') or {})},
+        'workload': config.get('workload') or {},
+        'tables': config.get('tables') or {},
+    }
+
+
+def _workload_paths(config, key):
+    paths = config['workload'].get(key) or []
+    if isinstance(paths, str):
+        paths = [paths]
+    for path in paths:
+        expanded = os.path.expandvars(str(path))
+        if not expanded or '$' in expanded:
+            continue
+        resolved = Path(expanded)
+        if not resolved.is_absolute():
+            resolved = config['base_dir'] / resolved
+        if resolved.exists():
+            yield resolved
+
+
+def load_workload(config):
+    """
+    Consultas do benchmark (peso 1) e dos registros de estatísticas do agente
+    (peso = número de execuções) listados em workload, como pares (sql, peso)
+    """
+    queries = []
+    for path in _workload_paths(config, 'benchmark_queries'):
+        queries.extend((sql, 1) for sql in read_benchmark_queries(path))
+    for path in _workload_paths(config, 'query_stats'):
+        queries.extend(read_query_stats_workload(str(path)))
+    return queries
+
+
+def build_advisor(config):
+    """Cria o IndexAdvisor com a carga de trabalho configurada"""
+    options = {key: value for key, value in config['advisor'].items() if key != 'enabled'}
+    return IndexAdvisor(**options).add_weighted_queries(load_workload(config))
+
+
+def table_statistics(conn, table_name):
+    """Lê linhas estimadas, colunas, n_distinct/correlation (pg_stats) e índices existentes"""
+    qualified_name = quote_identifier(table_name)
+    stats = TableStatistics()
+    stats.rows = float(conn.execute(
+        text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:qualified_name)"),
+        {"qualified_name": qualified_name}
+    ).scalar() or 0.0)
+    stats.columns = {
+        row[0] for row in conn.execute(
+            text("""
+                SELECT attname FROM pg_attribute
+                WHERE attrelid = to_regclass(:qualified_name) AND attnum > 0 AND NOT attisdropped
+            """),
+            {"qualified_name": qualified_name}
+        )
+    }
+    stats.column_stats = {
+        row[0]: ColumnStatistics(n_distinct=float(row[1]), correlation=row[2])
+        for row in conn.execute(
+            text("""
+                SELECT attname, n_distinct, correlation FROM pg_stats
+                WHERE schemaname = current_schema() AND tablename = :table_name
+            """),
+            {"table_name": table_name}
+        )
+    }
+    stats.existing_indexes = [
+        tuple(row[0]) for row in conn.execute(
+            text("""
+                SELECT ARRAY(
+                    SELECT a.attname
+                    FROM unnest(i.indkey) WITH ORDINALITY AS k(attnum, position)
+                    JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+                    ORDER BY k.position
+                )
+                FROM pg_index i
+                WHERE i.indrelid = to_regclass(:qualified_name)
+            """),
+            {"qualified_name": qualified_name}
+        )
+    ]
+    return stats
+
+
+def configured_indexes(config, table_name):
+    """Índices declarados para a tabela em index_config.yaml"""
+    specs = []
+    for entry in (config['tables'].get(table_name) or {}).get('indexes') or []:
+        method = entry.get('method', 'btree')
+        if method not in INDEX_METHODS:
+            raise ValueError(f"Método de índice inválido para {table_name}: {method}")
+        specs.append(IndexSpec(
+            table=table_name,
+            columns=tuple(entry['columns']),
+            method=method,
+            reason='configurado'
+        ))
+    return specs
+
+
+def apply_table_indexes(conn, table_name, config, advisor=None):
+    """
+    Atualiza as estatísticas (ANALYZE) e cria os índices configurados e recomendados.
+
+    O ANALYZE roda antes das recomendações porque o advisor usa n_distinct e
+    correlation de pg_stats; índices em colunas simples não exigem um novo
+    ANALYZE depois de criados.
+
+    `conn` deve estar em AUTOCOMMIT: cada índice é criado com CREATE INDEX
+    CONCURRENTLY em um comando próprio, sem bloquear escritas na tabela. A
+    falha de um índice é reportada e o índice inválido deixado pelo
+    CONCURRENTLY é removido, sem afetar os demais.
+
+    Returns:
+        Lista de IndexSpec criados (ou já existentes)
+    """
+    conn.exec_driver_sql(f"ANALYZE {quote_identifier(table_name)}")
+    stats = table_statistics(conn, table_name)
+
+    specs = []
+    for spec in configured_indexes(config, table_name):
+        missing = [column for column in spec.columns if column not in stats.columns]
+        if missing:
+            print(f"  Aviso: índice configurado ignorado, colunas inexistentes em {table_name}: {', '.join(missing)}")
+            continue
+        specs.append(spec)
+
+    table_config = config['tables'].get(table_name) or {}
+    if advisor is not None and table_config.get('advisor', config['advisor']['enabled']):
+        existing = stats.existing_indexes + [spec.columns for spec in specs]
+        specs.extend(advisor.recommend(table_name, stats=stats, existing=existing))
+
+    created = []
+    for spec in specs:
+        try:
+            conn.exec_driver_sql(spec.create_sql(concurrently=True))
+            created.append(spec)
+        except Exception as e:
+            print(f"  Aviso: falha ao criar o índice {spec.name} em {table_name}: {e}")
+            try:
+                conn.exec_driver_sql(spec.drop_sql(concurrently=True))
+            except Exception as drop_error:
+                print(f"  Aviso: não foi possível remover o índice inválido {spec.name}: {drop_error}")
+    return created
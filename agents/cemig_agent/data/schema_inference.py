@@ -0,0 +1,277 @@
+import hashlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+INTEGER_PATTERN = r'[+-]?\d+'
+# 1.234,56 / 1234,56 / 1234 (vírgula decimal, ponto opcional de milhar)
+BR_NUMBER_PATTERN = r'[+-]?(?:\d{1,3}(?:\.\d{3})+|\d+)(?:,\d+)?'
+DOT_NUMBER_PATTERN = r'[+-]?\d+(?:\.\d+)?'
+LEADING_ZERO_PATTERN = r'[+-]?0\d'
+
+# (formato para pandas.to_datetime, padrão que os valores devem seguir)
+DATE_FORMATS = [
+    ('%Y-%m-%d', r'\d{4}-\d{2}-\d{2}'),
+    ('%d/%m/%Y', r'\d{2}/\d{2}/\d{4}'),
+]
+TIMESTAMP_FORMATS = [
+    ('%Y-%m-%d %H:%M:%S', r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}'),
+    ('%Y-%m-%dT%H:%M:%S', r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}'),
+    ('%d/%m/%Y %H:%M:%S', r'\d{2}/\d{2}/\d{4} \d{2}:\d{2}:\d{2}'),
+    ('%d/%m/%Y %H:%M', r'\d{2}/\d{2}/\d{4} \d{2}:\d{2}'),
+]
+
+INTEGER_TYPES = [
+    ('SMALLINT', 32767),
+    ('INTEGER', 2147483647),
+    ('BIGINT', 9223372036854775807),
+]
+
+TEXT_TYPES = ('text', 'character varying', 'character')
+
+
+class SchemaMismatchError(ValueError):
+    """Erro levantado quando um bloco de dados não respeita o schema inferido"""
+
+
+@dataclass
+class ColumnSchema:
+    """Tipo inferido de uma coluna e como converter seus valores para o COPY"""
+
+    name: str
+    kind: str = 'text'
+    sql_type: str = 'TEXT'
+    number_format: Optional[str] = None
+    date_format: Optional[str] = None
+    categories: List[str] = field(default_factory=list)
+
+
+@dataclass
+class TableSchema:
+    """Schema inferido de uma tabela"""
+
+    table_name: str
+    columns: List[ColumnSchema]
+
+    def column_types(self) -> Dict[str, str]:
+        return {column.name: column.sql_type for column in self.columns}
+
+    def create_table_sql(self, table_name=None):
+        """CREATE TABLE com os tipos inferidos"""
+        definitions = ",\n    ".join(
+            f"{quote_identifier(column.name)} {column_sql_type(column)}" for column in self.columns
+        )
+        return f"CREATE TABLE {quote_identifier(table_name or self.table_name)} (\n    {definitions}\n)"
+
+    def summary(self):
+        """Resumo dos tipos inferidos, ex.: '2 DATE, 3 NUMERIC, 5 TEXT'"""
+        counts = {}
+        for column in self.columns:
+            label = 'ENUM' if column.kind == 'category' else column.sql_type
+            counts[label] = counts.get(label, 0) + 1
+        return ", ".join(f"{count} {label}" for label, count in sorted(counts.items()))
+
+    def enum_columns(self):
+        return [column for column in self.columns if column.kind == 'category']
+
+    def restrict_to(self, target_types):
+        """
+        Ajusta o schema a uma tabela já existente: colunas que lá são texto
+        não têm seus valores convertidos e colunas ENUM passam a usar o tipo
+        da tabela.
+
+        Args:
+            target_types: Coluna -> (data_type, udt_name) do information_schema da tabela final
+        """
+        for column in self.columns:
+            data_type, udt_name = target_types.get(column.name, ('text', 'text'))
+            if data_type == 'USER-DEFINED':
+                column.kind, column.sql_type, column.categories = 'category', udt_name, []
+            elif data_type in TEXT_TYPES:
+                column.kind, column.sql_type = 'text', 'TEXT'
+            else:
+                continue
+            column.number_format = column.date_format = None
+        return self
+
+    def prepare(self, frame):
+        """
+        Converte os valores do bloco para a representação aceita pelo COPY
+        (números com ponto decimal, datas ISO) e valida que todos respeitam o
+        tipo inferido.
+
+        Raises:
+            SchemaMismatchError: Se algum valor não puder ser convertido
+        """
+        prepared = frame.copy()
+        for column in self.columns:
+            if column.name not in prepared.columns or column.kind == 'text':
+                continue
+            prepared[column.name] = _convert_column(column, prepared[column.name])
+        return prepared
+
+
+def quote_identifier(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def enum_type_name(table_name, column_name):
+    """Nome do tipo ENUM de uma coluna categórica (limitado a 63 caracteres)"""
+    name = f"{table_name}__{column_name}"
+    if len(name) <= 63:
+        return name
+    digest = hashlib.sha1(name.encode('utf-8')).hexdigest()[:8]
+    return f"{name[:54]}_{digest}"
+
+
+def column_sql_type(column):
+    if column.kind == 'category':
+        return quote_identifier(column.sql_type)
+    return column.sql_type
+
+
+def _non_empty(series):
+    values = series.dropna().astype(str).str.strip()
+    return values[values != '']
+
+
+def _integer_type(values):
+    numbers = pd.to_numeric(values, errors='coerce')
+    if numbers.isna().any():
+        return 'NUMERIC'
+    largest = max(abs(int(numbers.max())), abs(int(numbers.min())))
+    for sql_type, limit in INTEGER_TYPES:
+        if largest <= limit:
+            return sql_type
+    return 'NUMERIC'
+
+
+def _parses_with_format(values, date_format):
+    return pd.to_datetime(values, format=date_format, errors='coerce').notna().all()
+
+
+def infer_column(name, series, normalize_categories=False, max_categories=64, max_category_ratio=0.05):
+    """
+    Infere o tipo de uma coluna lida como texto.
+
+    Ordem: inteiro (SMALLINT/INTEGER/BIGINT), NUMERIC (vírgula ou ponto
+    decimal), DATE, TIMESTAMP e, opcionalmente, categoria (ENUM). Valores com
+    zero à esquerda (códigos, CEP, CNPJ) permanecem texto.
+    """
+    values = _non_empty(series)
+    if values.empty:
+        return ColumnSchema(name=name)
+
+    if not values.str.match(LEADING_ZERO_PATTERN).any():
+        if values.str.fullmatch(INTEGER_PATTERN).all():
+            sql_type = _integer_type(values)
+            kind = 'integer' if sql_type != 'NUMERIC' else 'numeric'
+            return ColumnSchema(name=name, kind=kind, sql_type=sql_type, number_format='dot')
+        if values.str.contains(',', regex=False).any() and values.str.fullmatch(BR_NUMBER_PATTERN).all():
+            return ColumnSchema(name=name, kind='numeric', sql_type='NUMERIC', number_format='br')
+        if values.str.fullmatch(DOT_NUMBER_PATTERN).all():
+            return ColumnSchema(name=name, kind='numeric', sql_type='NUMERIC', number_format='dot')
+
+    for date_format, pattern in DATE_FORMATS:
+        if values.str.fullmatch(pattern).all() and _parses_with_format(values, date_format):
+            return ColumnSchema(name=name, kind='date', sql_type='DATE', date_format=date_format)
+
+    for date_format, pattern in TIMESTAMP_FORMATS:
+        if values.str.fullmatch(pattern).all() and _parses_with_format(values, date_format):
+            return ColumnSchema(name=name, kind='timestamp', sql_type='TIMESTAMP', date_format=date_format)
+
+    if normalize_categories:
+        distinct = values.unique()
+        if len(distinct) <= max_categories and len(distinct) <= max(1, len(values) * max_category_ratio):
+            return ColumnSchema(name=name, kind='category', categories=sorted(distinct))
+
+    return ColumnSchema(name=name)
+
+
+def infer_schema(frame, table_name, normalize_categories=False, max_categories=64, max_category_ratio=0.05):
+    """
+    Infere o schema de uma amostra (DataFrame com todas as colunas como texto).
+
+    Args:
+        frame: Amostra dos dados
+        table_name: Tabela de destino (usada no nome dos tipos ENUM)
+        normalize_categories: Armazena colunas repetitivas de baixa cardinalidade
+                              como ENUM (4 bytes por linha em vez do texto completo)
+        max_categories: Máximo de valores distintos de uma coluna categórica
+        max_category_ratio: Máximo de valores distintos em relação ao número de linhas
+
+    Returns:
+        TableSchema
+    """
+    columns = []
+    for name in frame.columns:
+        column = infer_column(
+            str(name),
+            frame[name],
+            normalize_categories=normalize_categories,
+            max_categories=max_categories,
+            max_category_ratio=max_category_ratio
+        )
+        if column.kind == 'category':
+            column.sql_type = enum_type_name(table_name, column.name)
+        columns.append(column)
+    return TableSchema(table_name=table_name, columns=columns)
+
+
+def _convert_column(column, series):
+    values = series.astype('string').str.strip()
+    present = values.notna() & (values != '')
+    values = values.where(present, None)
+
+    if column.kind == 'category':
+        return values.astype(object).where(present, None)
+
+    if column.kind in ('integer', 'numeric'):
+        if column.kind == 'integer':
+            pattern = INTEGER_PATTERN
+        elif column.number_format == 'br':
+            pattern = BR_NUMBER_PATTERN
+        else:
+            pattern = DOT_NUMBER_PATTERN
+        invalid = present & ~values.str.fullmatch(pattern).fillna(False)
+        if column.number_format == 'br':
+            values = values.str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+    else:
+        parsed = pd.to_datetime(values, format=column.date_format, errors='coerce')
+        invalid = present & parsed.isna()
+        output_format = '%Y-%m-%d' if column.kind == 'date' else '%Y-%m-%d %H:%M:%S'
+        values = parsed.dt.strftime(output_format).where(present, None)
+
+    if invalid.any():
+        sample = series[invalid].iloc[0]
+        raise SchemaMismatchError(
+            f"Valor {sample!r} da coluna {column.name} não é compatível com o tipo inferido "
+            f"{column.sql_type}; aumente a amostra (chunksize) ou carregue com infer_types=False"
+        )
+    return values.astype(object).where(present, None)
+
+
+def enum_extension_sql(type_name, existing_labels, new_labels):
+    """
+    Comandos ALTER TYPE que acrescentam valores a um ENUM mantendo os rótulos
+    em ordem de codepoint (sorted do Python). ORDER BY na coluna segue essa
+    ordem, não a collation do banco (ex.: pt_BR com acentos e maiúsculas);
+    para a ordenação do texto, use ORDER BY coluna::text.
+
+    Devem ser executados fora da transação que usa os novos valores.
+    """
+    labels = list(existing_labels)
+    statements = []
+    for label in sorted(set(new_labels) - set(labels)):
+        position = next((existing for existing in sorted(labels) if existing > label), None)
+        statement = f"ALTER TYPE {quote_identifier(type_name)} ADD VALUE IF NOT EXISTS {quote_literal(label)}"
+        if position is not None:
+            statement += f" BEFORE {quote_literal(position)}"
+        statements.append(statement)
+        labels.append(label)
+    return statements
+
+
+def quote_literal(value):
+    return "'" + str(value).replace("'", "''") + "'"
@@ -0,0 +1,412 @@
+"""
+Benchmark de latência ponta a ponta do agente.
+
+Executa os casos do eval set (arquivos *.test.json / *.evalset.json) no
+root_agent via Runner do ADK e registra, por caso, o tempo total, o número de
+chamadas de ferramentas, o tempo gasto em cada ferramenta e no modelo e os
+tokens consumidos. Os tempos vêm de callbacks before/after de modelo e de
+ferramenta adicionados a uma cópia do agente.
+
+Por padrão o modelo é substituído por um stub determinístico (ScriptedLlm)
+que segue o roteiro get_schema_db -> get_schema_dictionary ->
+execute_sql_query com a SQL de referência de queries.csv, então o benchmark
+roda offline contra um Postgres local (POSTGRES_HOST/POSTGRES_PORT) e o
+pacote de dicionários (DICTIONARY_BUNDLE_PATH). Com --model o modelo real é
+usado.
+
+Uso:
+    python agents/cemig_agent/evals/utils/benchmark_agent_latency.py
+    python agents/cemig_agent/evals/utils/benchmark_agent_latency.py --repeat 3 --output agent_latency.json
+    python agents/cemig_agent/evals/utils/benchmark_agent_latency.py --model gemini-2.0-flash
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from glob import glob
+from pathlib import Path
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+
+current_file = Path(__file__).resolve()
+utils_dir = current_file.parent
+evals_dir = utils_dir.parent
+cemig_agent_dir = evals_dir.parent
+agents_dir = cemig_agent_dir.parent
+project_root = agents_dir.parent
+
+sys.path.insert(0, str(project_root))
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from agents.cemig_agent.agent import root_agent
+from agents.cemig_agent.evals.utils.benchmark_sql_latency import percentile
+
+DEFAULT_EVAL_DIR = project_root / "tests" / "final_response"
+DEFAULT_QUERIES_CSV = evals_dir / "data_for_benchmark" / "queries.csv"
+
+TOOL_NAMES = ("get_schema_db", "get_schema_dictionary", "get_schema_columns", "execute_sql_query")
+
+
+def estimate_tokens(text: str) -> int:
+    """Aproximação de tokens (bytes / 4) usada pelo modelo stub."""
+    return max(1, len(text.encode("utf-8")) // 4) if text else 0
+
+
+def load_reference_queries(csv_path: Path) -> Dict[str, Tuple[str, str]]:
+    """Pergunta em linguagem natural -> (tabela, SQL de referência), a partir de queries.csv."""
+    if not csv_path.exists():
+        return {}
+    with open(csv_path, "r", encoding="utf-8") as csv_file:
+        return {
+            row["query_lang"].strip(): (row["table_name"].strip(), row["query_sql"].strip())
+            for row in csv.DictReader(csv_file, delimiter=";")
+            if row.get("query_lang")
+        }
+
+
+def load_eval_cases(paths: List[str]) -> List[Dict[str, str]]:
+    """
+    Lê os casos dos arquivos de eval (formato do AgentEvaluator).
+
+    Returns:
+        Lista de {"eval_id", "question"} com a primeira pergunta de cada caso
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob(os.path.join(path, "*.test.json"))))
+            files.extend(sorted(glob(os.path.join(path, "*.evalset.json"))))
+        else:
+            files.append(path)
+
+    cases = []
+    for file_path in files:
+        with open(file_path, "r", encoding="utf-8") as eval_file:
+            data = json.load(eval_file)
+        for eval_case in data.get("eval_cases", []):
+            for invocation in eval_case.get("conversation", [])[:1]:
+                parts = invocation.get("user_content", {}).get("parts", [])
+                question = "".join(part.get("text") or "" for part in parts).strip()
+                if question:
+                    cases.append({
+                        "eval_id": f"{Path(file_path).name}:{eval_case.get('eval_id')}",
+                        "question": question,
+                    })
+    return cases
+
+
+class ScriptedLlm(BaseLlm):
+    """
+    Modelo stub para rodar o agente sem acesso à API do Gemini.
+
+    A cada turno segue o roteiro de ferramentas de um agente bem-comportado
+    (schema do banco, dicionário da tabela, consulta SQL) usando a tabela e a
+    SQL de referência da pergunta; perguntas sem referência recebem resposta
+    após o get_schema_db. Os tokens são estimados pelo tamanho do texto.
+    """
+
+    model: str = "scripted-llm"
+    references: Dict[str, Tuple[str, str]] = {}
+
+    @classmethod
+    def supported_models(cls) -> List[str]:
+        return [r"scripted-llm"]
+
+    @staticmethod
+    def _current_turn(llm_request: LlmRequest) -> Tuple[str, List[types.FunctionResponse]]:
+        """Pergunta do usuário e respostas de ferramentas do turno corrente."""
+        contents = llm_request.contents or []
+        start = 0
+        question = ""
+        for index, content in enumerate(contents):
+            parts = content.parts or []
+            if content.role == "user" and not any(part.function_response for part in parts):
+                text = "".join(part.text or "" for part in parts).strip()
+                if text:
+                    start, question = index + 1, text
+        responses = [
+            part.function_response
+            for content in contents[start:]
+            for part in content.parts or []
+            if part.function_response
+        ]
+        return question, responses
+
+    def _next_call(self, question: str, called: List[str]) -> Optional[types.FunctionCall]:
+        reference = self.references.get(question)
+        plan = [("get_schema_db", {})]
+        if reference:
+            table_name, query_sql = reference
+            plan.append(("get_schema_dictionary", {"table_name": table_name}))
+            plan.append(("execute_sql_query", {"query_sql": query_sql}))
+        for name, args in plan:
+            if name not in called:
+                return types.FunctionCall(name=name, args=args)
+        return None
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        question, responses = self._current_turn(llm_request)
+        function_call = self._next_call(question, [response.name for response in responses])
+
+        if function_call:
+            part = types.Part(function_call=function_call)
+            output_text = json.dumps(function_call.args or {}, ensure_ascii=False)
+        else:
+            result = responses[-1].response if responses else {}
+            output_text = "Resultado da consulta: " + json.dumps(result, ensure_ascii=False, default=str)[:500]
+            part = types.Part(text=output_text)
+
+        prompt_text = str(llm_request.config.system_instruction or "") if llm_request.config else ""
+        for content in llm_request.contents or []:
+            for request_part in content.parts or []:
+                if request_part.text:
+                    prompt_text += request_part.text
+                elif request_part.function_response:
+                    prompt_text += json.dumps(request_part.function_response.response, ensure_ascii=False, default=str)
+        prompt_tokens = estimate_tokens(prompt_text)
+        candidate_tokens = estimate_tokens(output_text)
+
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[part]),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=prompt_tokens,
+                candidates_token_count=candidate_tokens,
+                total_token_count=prompt_tokens + candidate_tokens,
+            ),
+        )
+
+
+class LatencyRecorder:
+    """Coleta os tempos de modelo e ferramentas via callbacks do agente."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.model_calls = 0
+        self.model_ms = 0.0
+        self.tool_calls: Dict[str, int] = defaultdict(int)
+        self.tool_ms: Dict[str, float] = defaultdict(float)
+        self.tokens = {"prompt": 0, "candidates": 0, "total": 0}
+        self._model_started: Dict[str, float] = {}
+        self._tool_started: Dict[Tuple[str, str], float] = {}
+
+    def before_model(self, callback_context, llm_request):
+        self._model_started[callback_context.invocation_id] = time.perf_counter()
+        return None
+
+    def after_model(self, callback_context, llm_response):
+        started = self._model_started.pop(callback_context.invocation_id, None)
+        if started is not None:
+            self.model_ms += (time.perf_counter() - started) * 1000
+        self.model_calls += 1
+        usage = llm_response.usage_metadata
+        if usage:
+            self.tokens["prompt"] += usage.prompt_token_count or 0
+            self.tokens["candidates"] += usage.candidates_token_count or 0
+            self.tokens["total"] += usage.total_token_count or 0
+        return None
+
+    def before_tool(self, tool, args, tool_context):
+        self._tool_started[(tool.name, tool_context.function_call_id)] = time.perf_counter()
+        return None
+
+    def after_tool(self, tool, args, tool_context, tool_response):
+        started = self._tool_started.pop((tool.name, tool_context.function_call_id), None)
+        if started is not None:
+            self.tool_ms[tool.name] += (time.perf_counter() - started) * 1000
+        self.tool_calls[tool.name] += 1
+        return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        tools = {
+            name: {"calls": self.tool_calls[name], "ms": round(self.tool_ms[name], 3)}
+            for name in sorted(set(self.tool_calls) | set(TOOL_NAMES))
+        }
+        return {
+            "model_calls": self.model_calls,
+            "model_ms": round(self.model_ms, 3),
+            "tool_calls": sum(self.tool_calls.values()),
+            "tool_ms": round(sum(self.tool_ms.values()), 3),
+            "tools": tools,
+            "tokens": dict(self.tokens),
+        }
+
+
+def build_agent(recorder: LatencyRecorder, model: Any):
+    """Cópia do root_agent com os callbacks de medição (e o modelo do benchmark)."""
+    return root_agent.model_copy(update={
+        "model": model,
+        "before_model_callback": recorder.before_model,
+        "after_model_callback": recorder.after_model,
+        "before_tool_callback": recorder.before_tool,
+        "after_tool_callback": recorder.after_tool,
+    })
+
+
+async def run_case(runner: Runner, session_service: InMemorySessionService, recorder: LatencyRecorder, question: str) -> Dict[str, Any]:
+    """Executa uma pergunta em uma sessão nova e retorna as medições."""
+    recorder.reset()
+    user_id = "benchmark"
+    session = await session_service.create_session(app_name=runner.app_name, user_id=user_id)
+    message = types.Content(role="user", parts=[types.Part(text=question)])
+
+    final_response = ""
+    error = None
+    started = time.perf_counter()
+    try:
+        async for event in runner.run_async(user_id=user_id, session_id=session.id, new_message=message):
+            if event.is_final_response() and event.content and event.content.parts:
+                final_response = "".join(part.text or "" for part in event.content.parts)
+    except Exception as e:
+        error = str(e)
+    wall_ms = (time.perf_counter() - started) * 1000
+
+    measurement = recorder.snapshot()
+    measurement["wall_ms"] = round(wall_ms, 3)
+    measurement["other_ms"] = round(max(0.0, wall_ms - measurement["model_ms"] - measurement["tool_ms"]), 3)
+    measurement["response_chars"] = len(final_response)
+    if error:
+        measurement["error"] = error
+    return measurement
+
+
+def summarize(cases: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Agrega as medições: percentis do tempo total e médias por ferramenta e modelo."""
+    measured = [case for case in cases if "error" not in case]
+    if not measured:
+        return {"cases": len(cases), "errors": len(cases)}
+
+    wall = [case["wall_ms"] for case in measured]
+    total_wall = sum(wall)
+    tools = {}
+    for name in sorted({name for case in measured for name in case["tools"]}):
+        calls = sum(case["tools"][name]["calls"] for case in measured)
+        total_ms = sum(case["tools"][name]["ms"] for case in measured)
+        tools[name] = {
+            "calls": calls,
+            "mean_ms_per_call": round(total_ms / calls, 3) if calls else None,
+            "share": round(total_ms / total_wall, 4) if total_wall else None,
+        }
+    model_ms = sum(case["model_ms"] for case in measured)
+    model_calls = sum(case["model_calls"] for case in measured)
+
+    return {
+        "cases": len(cases),
+        "errors": len(cases) - len(measured),
+        "wall_p50_ms": round(percentile(wall, 0.50), 3),
+        "wall_p95_ms": round(percentile(wall, 0.95), 3),
+        "wall_mean_ms": round(total_wall / len(measured), 3),
+        "tool_calls_per_case": round(sum(case["tool_calls"] for case in measured) / len(measured), 2),
+        "model": {
+            "calls": model_calls,
+            "mean_ms_per_call": round(model_ms / model_calls, 3) if model_calls else None,
+            "share": round(model_ms / total_wall, 4) if total_wall else None,
+        },
+        "tools": tools,
+        "other_share": round(sum(case["other_ms"] for case in measured) / total_wall, 4) if total_wall else None,
+        "tokens_per_case": {
+            key: round(sum(case["tokens"][key] for case in measured) / len(measured), 1)
+            for key in ("prompt", "candidates", "total")
+        },
+    }
+
+
+def print_report(summary: Dict[str, Any]):
+    print(f"\n{'='*60}")
+    print("Latência do agente")
+    print(f"{'='*60}")
+    print(f"Casos: {summary['cases']} | Erros: {summary['errors']}")
+    if "wall_p50_ms" not in summary:
+        return
+    print(f"Tempo total: p50 {summary['wall_p50_ms']:.1f} ms | p95 {summary['wall_p95_ms']:.1f} ms | média {summary['wall_mean_ms']:.1f} ms")
+    print(f"Chamadas de ferramentas por caso: {summary['tool_calls_per_case']}")
+    print(f"Tokens por caso: {summary['tokens_per_case']}")
+    print(f"\n{'Etapa':<26} {'Chamadas':>9} {'ms/chamada':>11} {'% do total':>11}")
+    rows = [("modelo", summary["model"])] + list(summary["tools"].items())
+    for name, entry in rows:
+        mean = f"{entry['mean_ms_per_call']:.1f}" if entry["mean_ms_per_call"] is not None else "-"
+        share = f"{entry['share'] * 100:.1f}%" if entry["share"] is not None else "-"
+        print(f"{name:<26} {entry['calls']:>9} {mean:>11} {share:>11}")
+    if summary["other_share"] is not None:
+        print(f"{'outros (framework)':<26} {'':>9} {'':>11} {summary['other_share'] * 100:>10.1f}%")
+
+
+async def run_benchmark(args) -> Dict[str, Any]:
+    cases = load_eval_cases(args.eval_paths or [str(DEFAULT_EVAL_DIR)])
+    if args.preview:
+        cases = cases[:args.preview]
+    if not cases:
+        raise ValueError("Nenhum caso de eval encontrado")
+
+    if args.model:
+        model = args.model
+    else:
+        model = ScriptedLlm(references=load_reference_queries(Path(args.queries_csv)))
+
+    recorder = LatencyRecorder()
+    agent = build_agent(recorder, model)
+    session_service = InMemorySessionService()
+    runner = Runner(agent=agent, app_name="cemig_agent_benchmark", session_service=session_service)
+
+    results = []
+    total = len(cases) * args.repeat
+    for repetition in range(args.repeat):
+        for case in cases:
+            measurement = await run_case(runner, session_service, recorder, case["question"])
+            results.append({"eval_id": case["eval_id"], "repetition": repetition, **measurement})
+            status = f"Erro: {measurement['error']}" if "error" in measurement else (
+                f"{measurement['wall_ms']:.0f} ms | modelo {measurement['model_ms']:.0f} ms | "
+                f"ferramentas {measurement['tool_ms']:.0f} ms ({measurement['tool_calls']})"
+            )
+            print(f"[{len(results)}/{total}] {case['eval_id']} {status}")
+
+    return {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "config": {
+            "model": args.model or "scripted-llm",
+            "repeat": args.repeat,
+            "eval_paths": args.eval_paths or [str(DEFAULT_EVAL_DIR)],
+        },
+        "summary": summarize(results),
+        "cases": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de latência ponta a ponta do agente')
+    parser.add_argument('eval_paths', nargs='*', help='Arquivos ou diretórios de eval (padrão: tests/final_response)')
+    parser.add_argument('--model', default=None, help='Modelo real (ex.: gemini-2.0-flash); sem a opção usa o stub offline')
+    parser.add_argument('--queries-csv', default=str(DEFAULT_QUERIES_CSV), help='SQL de referência usada pelo stub')
+    parser.add_argument('--repeat', type=int, default=1, help='Execuções de cada caso')
+    parser.add_argument('--preview', type=int, metavar='N', help='Executar apenas os N primeiros casos')
+    parser.add_argument('--output', default=None, help='Arquivo JSON com o relatório')
+    args = parser.parse_args()
+
+    try:
+        report = asyncio.run(run_benchmark(args))
+    except Exception as e:
+        print(f"\nErro: {e}")
+        sys.exit(1)
+
+    print_report(report["summary"])
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(report, output_file, ensure_ascii=False, indent=2)
+        print(f"\nRelatório salvo: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
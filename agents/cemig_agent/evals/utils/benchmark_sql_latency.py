@@ -0,0 +1,390 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+current_file = Path(__file__).resolve()
+utils_dir = current_file.parent
+evals_dir = utils_dir.parent
+cemig_agent_dir = evals_dir.parent
+agents_dir = cemig_agent_dir.parent
+project_root = agents_dir.parent
+
+sys.path.insert(0, str(project_root))
+
+from agents.cemig_agent.tools.connector.database_connector import PostgreSQLConnector
+from agents.cemig_agent.tools.connector.sql_utils import normalize_sql
+from agents.cemig_agent.common.config import Config
+from agents.cemig_agent.evals.utils.execute_query_for_benchmark import QueryTestGenerator
+
+DEFAULT_INPUT = evals_dir / "data_for_benchmark" / "queries.csv"
+DEFAULT_OUTPUT = evals_dir / "data_for_benchmark" / "sql_latency_results.json"
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "mean_ms")
+
+# campos de config que precisam coincidir para a comparação com o baseline fazer sentido
+COMPARED_CONFIG = ("runs", "warmup", "include_connect", "use_pool", "host", "database")
+
+FAILURE_STATUSES = ("REGRESSAO", "ERRO", "AUSENTE")
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Percentil com interpolação linear entre as amostras ordenadas."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return ordered[lower]
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def query_key(query: str) -> str:
+    """Identificador estável da query (hash da SQL normalizada), usado na comparação com o baseline."""
+    return hashlib.sha1(normalize_sql(query).encode("utf-8")).hexdigest()[:12]
+
+
+def payload_bytes(result: List[Dict[str, Any]]) -> int:
+    """Tamanho do resultado serializado em JSON, como é entregue ao agente."""
+    return len(json.dumps(result, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+class SQLLatencyBenchmark:
+    """
+    Mede a latência das queries do benchmark (queries.csv) executando cada
+    uma N vezes após algumas execuções de aquecimento.
+
+    Usa o QueryTestGenerator para ler o CSV e executar as queries com
+    execute_query + conversão das linhas. Não é o caminho da ferramenta do
+    agente (execute_sql_query): não passa pelo QueryGuard, pelo cache de
+    resultados, pela reescrita para visões materializadas nem pelo
+    execute_query_bounded, então mede o custo do banco e da conversão.
+    """
+
+    def __init__(
+        self,
+        generator: QueryTestGenerator,
+        runs: int = 10,
+        warmup: int = 2,
+        timeout: Optional[float] = None,
+        include_connect: bool = False
+    ):
+        """
+        Inicializa o benchmark.
+
+        Args:
+            generator: Gerador com o conector do banco
+            runs: Execuções medidas por query
+            warmup: Execuções descartadas antes da medição
+            timeout: Tempo máximo de cada execução em segundos
+            include_connect: Inclui connect()/close() em cada execução medida
+                             (mostra o ganho do pool de conexões)
+        """
+        if runs < 1:
+            raise ValueError("runs deve ser maior ou igual a 1")
+        self.generator = generator
+        self.runs = runs
+        self.warmup = max(0, warmup)
+        self.timeout = timeout
+        self.include_connect = include_connect
+
+    @property
+    def connector(self) -> PostgreSQLConnector:
+        return self.generator.connector
+
+    def _execute(self, query: str):
+        """Executa a query uma vez e retorna (resultado, duração em ms)."""
+        started = time.perf_counter()
+        if self.include_connect and not self.connector.connect():
+            return [{"error": "Falha ao conectar ao banco de dados"}], 0.0
+        try:
+            result = self.generator.execute_query_safe(query, timeout=self.timeout)
+        finally:
+            if self.include_connect:
+                self.connector.close()
+        return result, (time.perf_counter() - started) * 1000
+
+    def measure_query(self, query: str) -> Dict[str, Any]:
+        """
+        Executa uma query (aquecimento + medições) e resume as latências.
+
+        A medição é interrompida no primeiro erro ou timeout, registrado no
+        campo "error".
+        """
+        for _ in range(self.warmup):
+            result, _ = self._execute(query)
+            if QueryTestGenerator.is_error(result):
+                return {"error": result[0]["error"], "runs": 0}
+
+        durations = []
+        rows = 0
+        size = 0
+        for _ in range(self.runs):
+            result, elapsed = self._execute(query)
+            if QueryTestGenerator.is_error(result):
+                return {"error": result[0]["error"], "runs": len(durations)}
+            durations.append(elapsed)
+            rows = len(result)
+            size = payload_bytes(result)
+
+        return {
+            "runs": len(durations),
+            "p50_ms": round(percentile(durations, 0.50), 3),
+            "p95_ms": round(percentile(durations, 0.95), 3),
+            "p99_ms": round(percentile(durations, 0.99), 3),
+            "mean_ms": round(sum(durations) / len(durations), 3),
+            "min_ms": round(min(durations), 3),
+            "max_ms": round(max(durations), 3),
+            "rows": rows,
+            "bytes": size,
+        }
+
+    def run(self, input_csv: str, limit: Optional[int] = None, delimiter: str = ';') -> Dict[str, Any]:
+        """
+        Executa o benchmark sobre as queries do CSV.
+
+        Returns:
+            Dicionário serializável com a configuração e o resultado de cada query
+        """
+        df = self.generator.parse_csv(input_csv, delimiter)
+        self.generator.validate_dataframe(df)
+        rows_to_process = min(limit, len(df)) if limit else len(df)
+
+        if not self.include_connect and not self.connector.connect():
+            raise ConnectionError("Falha ao conectar ao banco de dados")
+
+        queries = []
+        try:
+            for position, (_, row) in enumerate(df.head(rows_to_process).iterrows(), start=1):
+                query = row['query_sql']
+                print(f"[{position}/{rows_to_process}] {row['table_name']}", end=" ", flush=True)
+                measurement = self.measure_query(query)
+                if "error" in measurement:
+                    print(f"Erro: {measurement['error']}")
+                else:
+                    print(
+                        f"p50 {measurement['p50_ms']:.1f} ms | p95 {measurement['p95_ms']:.1f} ms | "
+                        f"{measurement['rows']} linhas | {measurement['bytes']} bytes"
+                    )
+                queries.append({
+                    "key": query_key(query),
+                    "position": position,
+                    "table_name": row['table_name'],
+                    "query_preview": query[:200],
+                    **measurement,
+                })
+        finally:
+            if self.connector.connection:
+                self.connector.close()
+
+        measured = [query for query in queries if "error" not in query]
+        return {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "config": {
+                "input": str(input_csv),
+                "runs": self.runs,
+                "warmup": self.warmup,
+                "timeout": self.timeout,
+                "include_connect": self.include_connect,
+                "use_pool": self.connector.use_pool,
+                "host": self.connector.host,
+                "database": self.connector.database,
+            },
+            "summary": {
+                "queries": len(queries),
+                "errors": len(queries) - len(measured),
+                "total_p50_ms": round(sum(query["p50_ms"] for query in measured), 3),
+                "total_p95_ms": round(sum(query["p95_ms"] for query in measured), 3),
+            },
+            "queries": queries,
+        }
+
+
+def config_differences(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Campos de COMPARED_CONFIG com valores diferentes entre a execução e o baseline."""
+    current_config = current.get("config", {})
+    baseline_config = baseline.get("config", {})
+    return [
+        f"{field}: {baseline_config.get(field)!r} -> {current_config.get(field)!r}"
+        for field in COMPARED_CONFIG
+        if current_config.get(field) != baseline_config.get(field)
+    ]
+
+
+def compare_with_baseline(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    metric: str = "p95_ms",
+    max_regression: float = 0.2,
+    min_delta_ms: float = 5.0
+) -> List[Dict[str, Any]]:
+    """
+    Compara cada query com o baseline.
+
+    Uma query regride quando a métrica cresce mais que `max_regression`
+    (fração do valor do baseline) e mais que `min_delta_ms` em valor absoluto,
+    o que evita falsos alarmes em queries de poucos milissegundos. Queries que
+    passaram a falhar e queries do baseline que não foram medidas (AUSENTE)
+    também contam como regressão. As queries são casadas pela posição no CSV
+    e pelo hash da SQL, então SQLs repetidas no CSV não colidem.
+
+    Returns:
+        Lista com status REGRESSAO, MELHORA, OK, NOVA, ERRO ou AUSENTE por query
+    """
+    baseline_queries = {
+        (query["position"], query["key"]): query for query in baseline.get("queries", [])
+    }
+    comparison = []
+    for query in current.get("queries", []):
+        reference = baseline_queries.pop((query["position"], query["key"]), None)
+        entry = {
+            "key": query["key"],
+            "table_name": query["table_name"],
+            "position": query["position"],
+            "baseline": reference.get(metric) if reference else None,
+            "current": query.get(metric),
+            "ratio": None,
+        }
+        if "error" in query:
+            entry["status"] = "ERRO"
+        elif reference is None or reference.get(metric) is None:
+            entry["status"] = "NOVA"
+        else:
+            delta = query[metric] - reference[metric]
+            entry["ratio"] = round(query[metric] / reference[metric], 3) if reference[metric] else None
+            if delta > min_delta_ms and delta > reference[metric] * max_regression:
+                entry["status"] = "REGRESSAO"
+            elif -delta > min_delta_ms and -delta > reference[metric] * max_regression:
+                entry["status"] = "MELHORA"
+            else:
+                entry["status"] = "OK"
+        comparison.append(entry)
+
+    for reference in baseline_queries.values():
+        comparison.append({
+            "key": reference["key"],
+            "table_name": reference["table_name"],
+            "position": reference["position"],
+            "baseline": reference.get(metric),
+            "current": None,
+            "ratio": None,
+            "status": "AUSENTE",
+        })
+    return comparison
+
+
+def print_comparison(comparison: List[Dict[str, Any]], metric: str):
+    print(f"\n{'='*60}")
+    print(f"Comparação com o baseline ({metric})")
+    print(f"{'='*60}")
+    for entry in comparison:
+        baseline = f"{entry['baseline']:.2f}" if entry["baseline"] is not None else "-"
+        current = f"{entry['current']:.2f}" if entry["current"] is not None else "-"
+        ratio = f"x{entry['ratio']:.2f}" if entry["ratio"] is not None else ""
+        print(
+            f"{entry['status']:<10} #{entry['position']:<3} {entry['table_name'][:45]:<45} "
+            f"{baseline:>9} -> {current:>9} ms {ratio}"
+        )
+    regressions = sum(1 for entry in comparison if entry["status"] in FAILURE_STATUSES)
+    print(f"\nRegressões: {regressions} de {len(comparison)} queries")
+
+
+def write_json(path: str, data: Dict[str, Any]):
+    directory = os.path.dirname(str(path))
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as output_file:
+        json.dump(data, output_file, ensure_ascii=False, indent=2)
+
+
+def main():
+    """Função principal com parsing de argumentos."""
+    parser = argparse.ArgumentParser(
+        description='Mede a latência das queries SQL do benchmark e compara com um baseline',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemplos de uso:
+  %(prog)s --runs 20 --warmup 3
+  %(prog)s --save-baseline evals/data_for_benchmark/sql_latency_baseline.json
+  %(prog)s --baseline evals/data_for_benchmark/sql_latency_baseline.json --max-regression 0.15
+  %(prog)s --include-connect --no-pool
+        """
+    )
+    parser.add_argument('input_csv', nargs='?', default=str(DEFAULT_INPUT), help='CSV com as queries (padrão: queries.csv)')
+    parser.add_argument('--output', default=str(DEFAULT_OUTPUT), help='Arquivo JSON com os resultados')
+    parser.add_argument('--runs', type=int, default=10, help='Execuções medidas por query (padrão: 10)')
+    parser.add_argument('--warmup', type=int, default=2, help='Execuções de aquecimento por query (padrão: 2)')
+    parser.add_argument('--timeout', type=float, default=None, metavar='SEGUNDOS', help='Tempo máximo de cada execução')
+    parser.add_argument('--preview', type=int, metavar='N', help='Medir apenas as N primeiras queries')
+    parser.add_argument('--delimiter', default=';', help='Delimitador do CSV (padrão: ";")')
+    parser.add_argument('--include-connect', action='store_true', help='Inclui connect()/close() em cada execução medida')
+    parser.add_argument('--no-pool', action='store_true', help='Abre conexões diretas em vez de usar o pool')
+    parser.add_argument('--baseline', help='Resultados anteriores (JSON) para comparação')
+    parser.add_argument('--save-baseline', metavar='ARQUIVO', help='Também grava os resultados como novo baseline')
+    parser.add_argument('--metric', choices=METRICS, default='p95_ms', help='Métrica comparada com o baseline (padrão: p95_ms)')
+    parser.add_argument('--max-regression', type=float, default=0.2, help='Aumento relativo tolerado (padrão: 0.2 = 20%%)')
+    parser.add_argument('--min-delta-ms', type=float, default=5.0, help='Aumento absoluto mínimo para contar como regressão (padrão: 5 ms)')
+    parser.add_argument('--ignore-config', action='store_true',
+                        help='Compara mesmo se o baseline foi gravado com outra configuração (runs, pool, banco...)')
+    parser.add_argument('--host', default=None, help='Override do host do banco (usa Config se não especificado)')
+    parser.add_argument('--port', type=int, default=None, help='Override da porta do banco (usa Config se não especificado)')
+
+    args = parser.parse_args()
+
+    db_config = Config.get_db_config()
+    db_config['host'] = args.host or db_config['host']
+    db_config['port'] = args.port or db_config['port']
+    if args.no_pool:
+        db_config['use_pool'] = False
+
+    benchmark = SQLLatencyBenchmark(
+        QueryTestGenerator(PostgreSQLConnector(**db_config)),
+        runs=args.runs,
+        warmup=args.warmup,
+        timeout=args.timeout,
+        include_connect=args.include_connect
+    )
+
+    try:
+        results = benchmark.run(args.input_csv, limit=args.preview, delimiter=args.delimiter)
+    except Exception as e:
+        print(f"\nErro: {e}")
+        sys.exit(1)
+
+    write_json(args.output, results)
+    print(f"\nResultados salvos: {args.output}")
+    if args.save_baseline:
+        write_json(args.save_baseline, results)
+        print(f"Baseline salvo: {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+        differences = config_differences(results, baseline)
+        if differences:
+            print(f"\nBaseline gravado com outra configuração: {'; '.join(differences)}")
+            if not args.ignore_config:
+                print("Comparação cancelada; grave um novo baseline ou use --ignore-config")
+                sys.exit(1)
+        comparison = compare_with_baseline(
+            results,
+            baseline,
+            metric=args.metric,
+            max_regression=args.max_regression,
+            min_delta_ms=args.min_delta_ms
+        )
+        print_comparison(comparison, args.metric)
+        if any(entry["status"] in FAILURE_STATUSES for entry in comparison):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,10 @@ import json
 import csv
 import sys
 import os
-from typing import List, Dict, Any, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Callable
 from pathlib import Path
 
 current_file = Path(__file__).resolve()
@@ -16,24 +19,32 @@ project_root = agents_dir.parent
 
 sys.path.insert(0, str(project_root))
 
-try:
-    from agents.cemig_agent.tools.connector.database_connector import PostgreSQLConnector
-    from agents.cemig_agent.common.config import Config
-except ImportError:
-    sys.path.insert(0, str(cemig_agent_dir))
-    from tools.connector.database_connector import PostgreSQLConnector
-    from common.config import Config
+from agents.cemig_agent.tools.connector.database_connector import PostgreSQLConnector
+from agents.cemig_agent.common.config import Config
 
 
 class QueryTestGenerator:
     """Classe para gerar dados de teste a partir de queries SQL."""
     
-    def __init__(self, connector: PostgreSQLConnector):
-        """Inicializa o gerador de testes."""
+    def __init__(
+        self,
+        connector: PostgreSQLConnector,
+        connector_factory: Optional[Callable[[], PostgreSQLConnector]] = None
+    ):
+        """
+        Inicializa o gerador de testes.
+
+        Args:
+            connector: Conector usado no modo serial
+            connector_factory: Cria o conector de cada query no modo concorrente
+                               (padrão: conector com pool a partir de `connector`)
+        """
 
         self.connector = connector
+        self.connector_factory = connector_factory
         self.total_processed = 0
         self.total_errors = 0
+        self._lock = threading.Lock()
     
     def parse_csv(self, csv_file_path: str, delimiter: str = ';') -> pd.DataFrame:
         """Lê o CSV com tratamento adequado para diferentes delimitadores."""
@@ -82,54 +93,150 @@ class QueryTestGenerator:
         print(f"Validação OK: {len(df)} queries encontradas")
         return True
     
-    def execute_query_safe(self, query: str) -> List[Dict[str, Any]]:
-        """Executa query com tratamento de erro."""
+    def execute_query_safe(
+        self,
+        query: str,
+        connector: Optional[PostgreSQLConnector] = None,
+        timeout: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Executa query com tratamento de erro.
 
+        Erros e queries canceladas por `timeout` (segundos, aplicado como
+        statement_timeout) voltam como uma linha com a chave "error".
+        """
+
+        connector = connector or self.connector
+        timeout_ms = int(timeout * 1000) if timeout else None
         try:
-            results = self.connector.execute_query(query, fetch_all=True)
+            results = connector.execute_query(query, fetch_all=True, statement_timeout_ms=timeout_ms)
             return results if results else []
         except Exception as e:
-            self.total_errors += 1
+            with self._lock:
+                self.total_errors += 1
             return [{"error": str(e), "query_preview": query[:200]}]
-    
+
+    def _pooled_connector(self, pool_size: int) -> PostgreSQLConnector:
+        """Conector com os mesmos parâmetros de `self.connector`, emprestando do pool do processo."""
+
+        if self.connector_factory:
+            return self.connector_factory()
+        return PostgreSQLConnector(
+            host=self.connector.host,
+            database=self.connector.database,
+            user=self.connector.user,
+            password=self.connector.password,
+            port=self.connector.port,
+            use_proxy=self.connector.use_proxy,
+            instance_connection_name=self.connector.instance_connection_name,
+            use_pool=True,
+            pool_options={
+                **self.connector.pool_options,
+                "min_size": 0,
+                "max_size": max(pool_size, self.connector.pool_options.get("max_size", 0)),
+            }
+        )
+
+    def _execute_pooled(self, query: str, pool_size: int, timeout: Optional[float]) -> List[Dict[str, Any]]:
+        """Executa uma query em uma conexão emprestada do pool (modo concorrente)."""
+
+        connector = self._pooled_connector(pool_size)
+        try:
+            if not connector.connect():
+                with self._lock:
+                    self.total_errors += 1
+                return [{"error": "Falha ao conectar ao banco de dados", "query_preview": query[:200]}]
+            return self.execute_query_safe(query, connector=connector, timeout=timeout)
+        finally:
+            connector.close()
+
+    @staticmethod
+    def is_error(query_result: List[Dict[str, Any]]) -> bool:
+        """Indica se o resultado é a linha de erro devolvida por execute_query_safe."""
+        return bool(query_result) and isinstance(query_result[0], dict) and "error" in query_result[0]
+
+    def _print_progress(self, position: int, total: int, table_name: str, query_result: List[Dict[str, Any]], elapsed: float):
+        status = "Erro" if self.is_error(query_result) else f"✓ {len(query_result)} registros"
+        print(f"[{position}/{total}] {table_name} {status} ({elapsed:.2f}s)")
+
     def process_queries(
         self, 
         df: pd.DataFrame, 
         limit: Optional[int] = None,
-        verbose: bool = True
+        verbose: bool = True,
+        concurrency: int = 1,
+        timeout: Optional[float] = None
     ) -> pd.DataFrame:
-        """Processa as queries do DataFrame."""
+        """
+        Processa as queries do DataFrame.
+
+        Args:
+            df: DataFrame validado (table_name, query_sql, query_lang)
+            limit: Processa apenas as primeiras `limit` queries
+            verbose: Imprime o progresso de cada query
+            concurrency: Número de queries executadas em paralelo, cada uma em
+                         uma conexão do pool; 1 mantém a execução serial
+            timeout: Tempo máximo de cada query em segundos; queries que o
+                     excedem são canceladas e registradas como erro
+
+        Returns:
+            DataFrame com a coluna result_expected, na mesma ordem da entrada
+        """
 
-        results = []
         rows_to_process = min(limit, len(df)) if limit else len(df)
+        rows = df.head(rows_to_process)
         
         print(f"\n{'='*60}")
         print(f"Processando {rows_to_process} de {len(df)} queries")
+        if concurrency > 1:
+            print(f"Concorrência: {concurrency} conexões")
         print(f"{'='*60}\n")
+
+        query_results: List[Optional[List[Dict[str, Any]]]] = [None] * rows_to_process
         
-        for idx, row in df.head(rows_to_process).iterrows():
-            self.total_processed += 1
-            
-            if verbose:
-                print(f"[{self.total_processed}/{rows_to_process}] {row['table_name']}", end=" ")
-            
-            query_result = self.execute_query_safe(row['query_sql'])
-            
-            result_json = json.dumps(
+        if concurrency <= 1:
+            for position, (_, row) in enumerate(rows.iterrows()):
+                self.total_processed += 1
+                started = time.perf_counter()
+                query_results[position] = self.execute_query_safe(row['query_sql'], timeout=timeout)
+                if verbose:
+                    self._print_progress(
+                        self.total_processed, rows_to_process, row['table_name'],
+                        query_results[position], time.perf_counter() - started
+                    )
+        else:
+            def run(position: int, query: str):
+                started = time.perf_counter()
+                query_result = self._execute_pooled(query, concurrency, timeout)
+                return position, query_result, time.perf_counter() - started
+
+            table_names = list(rows['table_name'])
+            with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="benchmark") as executor:
+                futures = [
+                    executor.submit(run, position, query)
+                    for position, query in enumerate(rows['query_sql'])
+                ]
+                for future in as_completed(futures):
+                    position, query_result, elapsed = future.result()
+                    query_results[position] = query_result
+                    self.total_processed += 1
+                    if verbose:
+                        self._print_progress(
+                            self.total_processed, rows_to_process, table_names[position],
+                            query_result, elapsed
+                        )
+
+        results = [
+            json.dumps(
                 query_result, 
                 ensure_ascii=False, 
                 indent=2,
                 default=str  
             )
-            results.append(result_json)
-            
-            if verbose:
-                if query_result and isinstance(query_result[0], dict) and "error" in query_result[0]:
-                    print("Erro")
-                else:
-                    print(f"✓ {len(query_result)} registros")
+            for query_result in query_results
+        ]
         
-        df_result = df.head(rows_to_process).copy()
+        df_result = rows.copy()
         df_result['result_expected'] = results
         
         return df_result
@@ -148,7 +255,14 @@ class QueryTestGenerator:
         print(f"Total processado: {self.total_processed}")
         print(f"Total com erros: {self.total_errors}")
     
-    def generate_test_files(self, input_csv: str, output_csv: str, preview: Optional[int] = None):
+    def generate_test_files(
+        self,
+        input_csv: str,
+        output_csv: str,
+        preview: Optional[int] = None,
+        concurrency: int = 1,
+        timeout: Optional[float] = None
+    ):
         """Método principal para gerar arquivos de teste."""
 
         try:
@@ -164,7 +278,13 @@ class QueryTestGenerator:
             df = self.parse_csv(input_csv)
             self.validate_dataframe(df)
             
-            df_results = self.process_queries(df, limit=preview, verbose=True)
+            df_results = self.process_queries(
+                df,
+                limit=preview,
+                verbose=True,
+                concurrency=concurrency,
+                timeout=timeout
+            )
             
             self.save_results(df_results, output_csv)
             
@@ -193,6 +313,7 @@ Exemplos de uso:
   %(prog)s queries.csv results.csv
   %(prog)s queries.csv results.csv --preview 10
   %(prog)s input.csv output.csv --delimiter ","
+  %(prog)s queries.csv results.csv --concurrency 8 --timeout 60
         """
     )
     
@@ -216,6 +337,20 @@ Exemplos de uso:
         default=';',
         help='Delimitador do CSV (padrão: ";")'
     )
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=1,
+        metavar='N',
+        help='Número de queries executadas em paralelo, com conexões do pool (padrão: 1)'
+    )
+    parser.add_argument(
+        '--timeout',
+        type=float,
+        default=None,
+        metavar='SEGUNDOS',
+        help='Tempo máximo de cada query; as que excederem são registradas como erro'
+    )
     parser.add_argument(
         '--host',
         default=None,
@@ -252,7 +387,9 @@ Exemplos de uso:
         generator.generate_test_files(
             input_csv=args.input_csv,
             output_csv=args.output_csv,
-            preview=args.preview
+            preview=args.preview,
+            concurrency=args.concurrency,
+            timeout=args.timeout
         )
         
     except AttributeError as e:
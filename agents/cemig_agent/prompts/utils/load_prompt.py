@@ -1,11 +1,13 @@
 """
 Utilitário para carregar arquivos de prompt.
 """
+import functools
 import os
 from pathlib import Path
 
+@functools.lru_cache(maxsize=None)
 def load_prompt(filename):
-    """Carrega um arquivo de prompt do diretório prompts"""
+    """Carrega um arquivo de prompt do diretório prompts (lido do disco uma única vez)"""
     current_dir = Path(__file__).parent.parent.parent  
     prompt_path = current_dir / "prompts" / filename
     
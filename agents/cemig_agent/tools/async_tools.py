@@ -0,0 +1,73 @@
+"""
+Versões assíncronas das ferramentas do agente.
+
+As ferramentas fazem I/O bloqueante (PostgreSQL, GCS, leitura de arquivos).
+Executá-las direto no event loop do ADK serializa as sessões concorrentes de
+uma mesma instância. Aqui cada chamada roda em um pool de threads dedicado,
+dimensionado pelo pool de conexões, e o event loop fica livre enquanto a
+consulta ou o download está em andamento.
+"""
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Coroutine
+
+from ..common.config import Config
+from ..common.telemetry import telemetry
+from .execute_sql_query import execute_sql_query
+from .get_schema_columns import get_schema_columns
+from .get_schema_db import get_schema_db
+from .get_schema_dictionary import get_schema_dictionary
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=Config.TOOL_MAX_WORKERS,
+                    thread_name_prefix="cemig-tool"
+                )
+    return _executor
+
+
+def run_in_thread(func: Callable[..., Any]) -> Callable[..., Coroutine[Any, Any, Any]]:
+    """
+    Transforma uma ferramenta síncrona em corrotina executada no pool de threads.
+
+    Nome, docstring e assinatura são preservados (functools.wraps), então o ADK
+    gera a mesma declaração de função para o modelo. Cada chamada gera o span
+    tool.<nome>, incluindo a espera por uma thread livre.
+    """
+    span_name = f"tool.{func.__name__}"
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        with telemetry.span(span_name):
+            return await loop.run_in_executor(
+                _get_executor(),
+                functools.partial(context.run, func, *args, **kwargs)
+            )
+
+    return wrapper
+
+
+get_schema_db_async = run_in_thread(get_schema_db)
+execute_sql_query_async = run_in_thread(execute_sql_query)
+get_schema_dictionary_async = run_in_thread(get_schema_dictionary)
+get_schema_columns_async = run_in_thread(get_schema_columns)
+
+ASYNC_TOOLS = [
+    get_schema_db_async,
+    execute_sql_query_async,
+    get_schema_dictionary_async,
+    get_schema_columns_async,
+]
@@ -0,0 +1,266 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Hashable, Optional, Tuple
+
+import psycopg2
+from psycopg2 import extensions
+
+
+class PoolExhaustedError(psycopg2.Error):
+    """Erro levantado quando não há conexão disponível dentro do tempo de espera."""
+
+
+class ConnectionPool:
+    """
+    Pool de conexões psycopg2 compartilhado entre threads.
+
+    Mantém conexões abertas entre chamadas das ferramentas, evitando o custo de
+    handshake TCP + autenticação a cada consulta. A verificação de saúde
+    (SELECT 1) só é executada quando a conexão ficou ociosa por mais tempo
+    que `health_check_after`.
+    """
+
+    def __init__(
+        self,
+        connection_factory: Callable[[], Any],
+        min_size: int = 1,
+        max_size: int = 10,
+        idle_timeout: float = 300.0,
+        health_check_after: float = 30.0,
+        acquire_timeout: float = 30.0
+    ):
+        """
+        Inicializa o pool de conexões.
+
+        Args:
+            connection_factory: Função sem argumentos que retorna uma nova conexão psycopg2
+            min_size: Número mínimo de conexões mantidas abertas
+            max_size: Número máximo de conexões abertas simultaneamente
+            idle_timeout: Segundos de ociosidade após os quais a conexão é descartada
+            health_check_after: Segundos de ociosidade após os quais a conexão é testada antes do uso
+            acquire_timeout: Segundos de espera por uma conexão livre quando o pool está cheio
+        """
+        if max_size < 1:
+            raise ValueError("max_size deve ser maior ou igual a 1")
+        if min_size < 0 or min_size > max_size:
+            raise ValueError("min_size deve estar entre 0 e max_size")
+
+        self.connection_factory = connection_factory
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+        self.acquire_timeout = acquire_timeout
+
+        self._idle: Deque[Tuple[Any, float]] = deque()
+        self._in_use = set()
+        self._size = 0
+        self._closed = False
+        self._condition = threading.Condition(threading.Lock())
+        self._stats = {
+            "created": 0,
+            "reused": 0,
+            "health_checks": 0,
+            "discarded": 0,
+            "waits": 0,
+            "timeouts": 0,
+        }
+
+    def _open_connection(self) -> Any:
+        connection = self.connection_factory()
+        connection.autocommit = False
+        return connection
+
+    def _discard(self, connection: Any):
+        try:
+            connection.close()
+        except Exception:
+            pass
+        self._stats["discarded"] += 1
+
+    def _is_healthy(self, connection: Any, idle_for: float) -> bool:
+        if connection.closed:
+            return False
+        if idle_for < self.health_check_after:
+            return True
+
+        with self._condition:
+            self._stats["health_checks"] += 1
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def acquire(self) -> Any:
+        """
+        Retira uma conexão do pool, criando uma nova se necessário.
+
+        Returns:
+            Conexão psycopg2 pronta para uso
+
+        Raises:
+            PoolExhaustedError: Se nenhuma conexão ficar livre dentro de `acquire_timeout`
+            psycopg2.Error: Se não for possível abrir uma nova conexão
+        """
+        deadline = time.monotonic() + self.acquire_timeout
+
+        while True:
+            candidate = None
+            with self._condition:
+                if self._closed:
+                    raise PoolExhaustedError("Pool de conexões encerrado")
+
+                while True:
+                    if self._idle:
+                        connection, last_used = self._idle.pop()
+                        # reservada enquanto a saúde é verificada fora do lock
+                        self._in_use.add(connection)
+                        candidate = (connection, time.monotonic() - last_used)
+                        break
+
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolExhaustedError(
+                            f"Nenhuma conexão disponível após {self.acquire_timeout}s "
+                            f"(máximo de {self.max_size} conexões)"
+                        )
+                    self._stats["waits"] += 1
+                    self._condition.wait(remaining)
+
+            if candidate is None:
+                break
+
+            # o SELECT 1 vai à rede; as demais threads seguem usando o pool enquanto isso
+            connection, idle_for = candidate
+            healthy = idle_for <= self.idle_timeout and self._is_healthy(connection, idle_for)
+
+            with self._condition:
+                if healthy:
+                    self._stats["reused"] += 1
+                    return connection
+                self._in_use.discard(connection)
+                self._size -= 1
+                self._discard(connection)
+                self._condition.notify()
+
+        try:
+            connection = self._open_connection()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self._in_use.add(connection)
+            self._stats["created"] += 1
+        return connection
+
+    def release(self, connection: Any):
+        """
+        Devolve uma conexão ao pool, desfazendo transações pendentes.
+
+        Args:
+            connection: Conexão obtida previamente com `acquire()`
+        """
+        with self._condition:
+            if connection not in self._in_use:
+                return
+            self._in_use.discard(connection)
+
+            reusable = not self._closed and not connection.closed
+            if reusable:
+                try:
+                    status = connection.get_transaction_status()
+                    if status != extensions.TRANSACTION_STATUS_IDLE:
+                        connection.rollback()
+                except psycopg2.Error:
+                    reusable = False
+
+            if reusable:
+                self._idle.append((connection, time.monotonic()))
+            else:
+                self._size -= 1
+                self._discard(connection)
+
+            self._prune_idle()
+            self._condition.notify()
+
+    def _prune_idle(self):
+        """Fecha conexões ociosas além do tempo limite, respeitando `min_size`."""
+        now = time.monotonic()
+        while self._idle and self._size > self.min_size:
+            connection, last_used = self._idle[0]
+            if now - last_used <= self.idle_timeout:
+                break
+            self._idle.popleft()
+            self._size -= 1
+            self._discard(connection)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Retorna estatísticas de uso do pool.
+
+        Returns:
+            Dict: Tamanho atual, conexões ociosas/em uso e contadores acumulados
+        """
+        with self._condition:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                **self._stats,
+            }
+
+    def close_all(self):
+        """Fecha todas as conexões ociosas e impede novos empréstimos."""
+        with self._condition:
+            self._closed = True
+            while self._idle:
+                connection, _ = self._idle.pop()
+                self._size -= 1
+                self._discard(connection)
+            self._condition.notify_all()
+
+
+_pools: Dict[Hashable, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key: Hashable, connection_factory: Callable[[], Any], **pool_options) -> ConnectionPool:
+    """
+    Retorna o pool do processo associado a `key`, criando-o na primeira chamada.
+
+    Args:
+        key: Identificador dos parâmetros de conexão (host, porta, banco, usuário)
+        connection_factory: Função usada para abrir novas conexões
+        **pool_options: Opções repassadas ao construtor de ConnectionPool
+
+    Returns:
+        ConnectionPool compartilhado
+    """
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool._closed:
+            pool = ConnectionPool(connection_factory, **pool_options)
+            _pools[key] = pool
+        return pool
+
+
+def close_all_pools():
+    """Fecha todos os pools do processo."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close_all()
+        _pools.clear()
@@ -1,9 +1,29 @@
 import psycopg2
-from psycopg2.extras import RealDictCursor
-from typing import Dict, Any, Optional, List, Union
+from typing import Dict, Any, Optional, List, Union, Callable, Sequence
 from decimal import Decimal
 import json
+import re
+import uuid
 from datetime import datetime, date, time
+from .connection_pool import ConnectionPool, get_pool
+from .query_guard import QueryTimeoutError
+
+from ...common.telemetry import telemetry
+
+QUERY_CANCELED_PGCODE = '57014'
+
+# OIDs de tipos do PostgreSQL usados para escolher o conversor de cada coluna
+NUMERIC_OIDS = {1700}
+TEMPORAL_OIDS = {1082, 1083, 1114, 1184, 1266}
+PASSTHROUGH_OIDS = {16, 17, 18, 19, 20, 21, 23, 25, 26, 114, 700, 701, 705, 790, 1042, 1043, 1186, 2950, 3802}
+
+_LEADING_COMMENTS = re.compile(r'^(\s*(--[^\n]*(\n|$)|/\*.*?\*/))*\s*', re.DOTALL)
+
+def _decimal_to_float(value: Any) -> Any:
+    return None if value is None else float(value)
+
+def _temporal_to_isoformat(value: Any) -> Any:
+    return None if value is None else value.isoformat()
 
 class PostgreSQLConnector:
     """
@@ -19,7 +39,9 @@ class PostgreSQLConnector:
         password: str,
         port: int = 5435,
         use_proxy: bool = False,
-        instance_connection_name: Optional[str] = None
+        instance_connection_name: Optional[str] = None,
+        use_pool: bool = False,
+        pool_options: Optional[Dict[str, Any]] = None
     ):
         """
         Inicializa o conector PostgreSQL.
@@ -32,6 +54,10 @@ class PostgreSQLConnector:
             port: Porta do banco de dados (padrão: 5432)
             use_proxy: Se deve usar o proxy do Cloud SQL (para conexões locais)
             instance_connection_name: Nome da instância do Cloud SQL (formato: project:region:instance)
+            use_pool: Se deve emprestar conexões do pool compartilhado do processo
+                      em vez de abrir uma conexão nova a cada connect()
+            pool_options: Opções do pool (min_size, max_size, idle_timeout,
+                          health_check_after, acquire_timeout)
         """
         self.host = host
         self.database = database
@@ -40,6 +66,8 @@ class PostgreSQLConnector:
         self.port = port
         self.use_proxy = use_proxy
         self.instance_connection_name = instance_connection_name
+        self.use_pool = use_pool
+        self.pool_options = pool_options or {}
         self.connection = None
         
     def _convert_types(self, obj: Any) -> Any:
@@ -64,49 +92,161 @@ class PostgreSQLConnector:
             return [self._convert_types(item) for item in obj]
         else:
             return obj
+
+    def _column_converters(self, description: Sequence[Any]) -> List[Optional[Callable[[Any], Any]]]:
+        """
+        Escolhe, uma única vez por consulta, o conversor de cada coluna a partir
+        do OID do tipo em `cursor.description`.
+
+        Colunas de tipos já serializáveis não recebem conversor (None); tipos
+        desconhecidos usam `_convert_types` para manter o mesmo resultado.
+
+        Args:
+            description: `cursor.description` da consulta executada
+
+        Returns:
+            Lista com um conversor (ou None) por coluna
+        """
+        converters = []
+        for column in description:
+            type_code = column.type_code
+            if type_code in NUMERIC_OIDS:
+                converters.append(_decimal_to_float)
+            elif type_code in TEMPORAL_OIDS:
+                converters.append(_temporal_to_isoformat)
+            elif type_code in PASSTHROUGH_OIDS:
+                converters.append(None)
+            else:
+                converters.append(self._convert_types)
+        return converters
+
+    def _convert_rows(
+        self,
+        description: Sequence[Any],
+        rows: Sequence[Sequence[Any]],
+        as_dicts: bool = True
+    ) -> List[Union[Dict[str, Any], tuple]]:
+        """
+        Converte as linhas (tuplas) de uma consulta coluna a coluna, produzindo
+        o mesmo resultado de `_convert_types(dict(row))` aplicado linha a linha.
+
+        Args:
+            description: `cursor.description` da consulta executada
+            rows: Linhas retornadas pelo cursor
+            as_dicts: Se False, retorna as linhas como tuplas na ordem das colunas
+
+        Returns:
+            Lista de dicionários (ou tuplas) com valores serializáveis em JSON
+        """
+        if not rows:
+            return []
+
+        names = [column.name for column in description]
+        active = [
+            (index, converter)
+            for index, converter in enumerate(self._column_converters(description))
+            if converter is not None
+        ]
+
+        if active:
+            columns = list(zip(*rows))
+            for index, converter in active:
+                columns[index] = list(map(converter, columns[index]))
+            rows = zip(*columns)
+
+        if not as_dicts:
+            return [tuple(row) for row in rows]
+        return [dict(zip(names, row)) for row in rows]
     
+    def _connection_params(self) -> Dict[str, Any]:
+        """
+        Monta os parâmetros de conexão do psycopg2.
+
+        Returns:
+            Dict: Parâmetros aceitos por psycopg2.connect
+        """
+        if self.use_proxy and self.instance_connection_name:
+            return {
+                'dbname': self.database,
+                'user': self.user,
+                'password': self.password,
+                'host': '/cloudsql/' + self.instance_connection_name,
+            }
+        return {
+            'dbname': self.database,
+            'user': self.user,
+            'password': self.password,
+            'host': self.host,
+            'port': self.port
+        }
+
+    def _get_pool(self) -> ConnectionPool:
+        """
+        Retorna o pool compartilhado para estes parâmetros de conexão.
+
+        Returns:
+            ConnectionPool do processo
+        """
+        connection_params = self._connection_params()
+        key = (
+            connection_params['host'],
+            connection_params.get('port'),
+            self.database,
+            self.user,
+        )
+        return get_pool(
+            key,
+            lambda: psycopg2.connect(**connection_params),
+            **self.pool_options
+        )
+
     def connect(self) -> bool:
         """
         Estabelece conexão com o banco de dados PostgreSQL no Google Cloud SQL.
+
+        Com `use_pool=True`, a conexão é emprestada do pool do processo e
+        só é testada se tiver ficado ociosa além do limite configurado.
         
         Returns:
             bool: True se a conexão for bem-sucedida, False caso contrário.
         """
+        if self.connection:
+            return True
+
         try:
-            if self.use_proxy and self.instance_connection_name:
-                connection_params = {
-                    'dbname': self.database,
-                    'user': self.user,
-                    'password': self.password,
-                    'host': '/cloudsql/' + self.instance_connection_name,
-                }
-            else:
-                connection_params = {
-                    'dbname': self.database,
-                    'user': self.user,
-                    'password': self.password,
-                    'host': self.host,
-                    'port': self.port
-                }
-                
-            self.connection = psycopg2.connect(**connection_params)
+            with telemetry.span("db.connect", pooled=self.use_pool):
+                if self.use_pool:
+                    self.connection = self._get_pool().acquire()
+                    return True
 
-            self.connection.autocommit = False
+                self.connection = psycopg2.connect(**self._connection_params())
 
-            with self.connection.cursor() as cursor:
-                cursor.execute("SELECT 1")
+                self.connection.autocommit = False
                 
             return True
             
         except psycopg2.Error as e:
+            telemetry.increment("db.errors", operation="connect")
             print(f"Erro ao conectar ao banco de dados: {str(e)}")
             return False
+
+    def pool_stats(self) -> Optional[Dict[str, int]]:
+        """
+        Retorna as estatísticas do pool de conexões.
+
+        Returns:
+            Dict com as estatísticas do pool ou None se o pool não estiver em uso
+        """
+        if not self.use_pool:
+            return None
+        return self._get_pool().stats()
             
     def execute_query(
         self, 
         query: str, 
         params: Optional[Dict[str, Any]] = None,
-        fetch_all: bool = True
+        fetch_all: bool = True,
+        statement_timeout_ms: Optional[int] = None
     ) -> Union[List[Dict[str, Any]], Dict[str, Any], int, None]:
         """
         Executa uma consulta SQL no banco de dados.
@@ -117,6 +257,7 @@ class PostgreSQLConnector:
             fetch_all: Se True, retorna todos os registros; se False, 
                        retorna apenas um registro (útil para SELECT) ou 
                        o número de linhas afetadas (para INSERT/UPDATE/DELETE)
+            statement_timeout_ms: Tempo máximo de execução da consulta em milissegundos (opcional)
                        
         Returns:
             Lista de dicionários com os resultados da consulta (fetch_all=True),
@@ -126,6 +267,7 @@ class PostgreSQLConnector:
             
         Raises:
             ValueError: Se a conexão não foi estabelecida
+            QueryTimeoutError: Se a consulta exceder `statement_timeout_ms`
             psycopg2.Error: Em caso de erro na execução da consulta
         """
         if not self.connection:
@@ -133,24 +275,27 @@ class PostgreSQLConnector:
             
         cursor = None
         try:
-            cursor = self.connection.cursor(cursor_factory=RealDictCursor)
+            cursor = self.connection.cursor()
 
-            cursor.execute(query, params or {})
+            self._set_statement_timeout(cursor, statement_timeout_ms)
+            with telemetry.span("db.execute"):
+                cursor.execute(query, params or {})
             
-            is_select = query.lstrip().upper().startswith(("SELECT", "WITH"))
+            is_select = self.is_select_query(query)
             
             if is_select:
                 if fetch_all:
-                    results = cursor.fetchall()
-                    converted_results = []
-                    for row in results:
-                        converted_row = self._convert_types(dict(row))
-                        converted_results.append(converted_row)
-                    return converted_results
+                    with telemetry.span("db.fetch") as span:
+                        results = cursor.fetchall()
+                        span.set_attribute("rows", len(results))
+                    with telemetry.span("db.convert", rows=len(results)):
+                        return self._convert_rows(cursor.description, results)
                 else:
-                    row = cursor.fetchone()
+                    with telemetry.span("db.fetch", rows=1):
+                        row = cursor.fetchone()
                     if row:
-                        return self._convert_types(dict(row))
+                        with telemetry.span("db.convert", rows=1):
+                            return self._convert_rows(cursor.description, [row])[0]
                     return None
             else:
                 affected_rows = cursor.rowcount
@@ -160,16 +305,208 @@ class PostgreSQLConnector:
         except psycopg2.Error as e:
             if self.connection:
                 self.connection.rollback()
+            telemetry.increment("db.errors", operation="execute")
             print(f"Erro ao executar consulta: {str(e)}")
+            self._raise_if_timeout(e, statement_timeout_ms)
             raise
             
         finally:
             if cursor:
                 cursor.close()
 
+    @staticmethod
+    def _set_statement_timeout(cursor: Any, statement_timeout_ms: Optional[int]):
+        """Aplica statement_timeout apenas à transação corrente (SET LOCAL)."""
+        if statement_timeout_ms:
+            cursor.execute("SET LOCAL statement_timeout = %s", (int(statement_timeout_ms),))
+
+    @staticmethod
+    def _raise_if_timeout(error: psycopg2.Error, statement_timeout_ms: Optional[int]):
+        """Converte o cancelamento por statement_timeout em QueryTimeoutError."""
+        if statement_timeout_ms and getattr(error, 'pgcode', None) == QUERY_CANCELED_PGCODE:
+            raise QueryTimeoutError(
+                f"Consulta cancelada: excedeu o tempo limite de {statement_timeout_ms} ms. "
+                "Simplifique a consulta, adicione filtros (WHERE) ou agregue os dados."
+            ) from error
+
+    @staticmethod
+    def is_select_query(query: str) -> bool:
+        """
+        Verifica se a consulta é de leitura (SELECT/WITH), ignorando comentários iniciais.
+
+        Args:
+            query: Consulta SQL
+
+        Returns:
+            bool: True se a consulta começar com SELECT ou WITH
+        """
+        statement = _LEADING_COMMENTS.sub('', query, count=1)
+        return statement.upper().startswith(("SELECT", "WITH"))
+
+    def execute_query_bounded(
+        self,
+        query: str,
+        params: Optional[Dict[str, Any]] = None,
+        max_rows: int = 1000,
+        max_bytes: int = 1_000_000,
+        batch_size: int = 500,
+        as_dicts: bool = True,
+        statement_timeout_ms: Optional[int] = None,
+        row_estimate: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Executa uma consulta de leitura com cursor no servidor, buscando em lotes
+        e parando ao atingir o limite de linhas ou de bytes.
+
+        A memória usada fica limitada por `max_rows`/`max_bytes`, independente do
+        tamanho total do resultado.
+
+        Args:
+            query: Consulta SELECT/WITH a ser executada
+            params: Dicionário com parâmetros para a consulta (opcional)
+            max_rows: Número máximo de linhas retornadas
+            max_bytes: Tamanho máximo aproximado (JSON) das linhas retornadas
+            batch_size: Número de linhas buscadas por ida ao servidor
+            as_dicts: Se False, retorna as linhas como tuplas na ordem de `columns`
+            statement_timeout_ms: Tempo máximo de execução da consulta em milissegundos (opcional)
+            row_estimate: Estimativa de linhas já conhecida, usada se o resultado for truncado
+
+        Returns:
+            Dict com as chaves:
+                columns: nomes das colunas
+                rows: linhas convertidas (lista de dicionários ou de tuplas)
+                row_count: número de linhas retornadas
+                truncated: True se o resultado foi cortado
+                bytes: tamanho aproximado das linhas retornadas
+                estimated_total_rows: total de linhas (estimado pelo planejador se truncado)
+
+        Raises:
+            ValueError: Se a conexão não foi estabelecida
+            QueryTimeoutError: Se a consulta exceder `statement_timeout_ms`
+            psycopg2.Error: Em caso de erro na execução da consulta
+        """
+        if not self.connection:
+            raise ValueError("Conexão não estabelecida. Execute o método connect() primeiro.")
+
+        cursor = None
+        rows = []
+        columns = []
+        total_bytes = 0
+        truncated = False
+        try:
+            with self.connection.cursor() as setup_cursor:
+                self._set_statement_timeout(setup_cursor, statement_timeout_ms)
+
+            cursor = self.connection.cursor(name=f"cemig_stream_{uuid.uuid4().hex}")
+            cursor.itersize = batch_size
+            with telemetry.span("db.execute", streaming=True):
+                cursor.execute(query, params or {})
+
+            while not truncated:
+                with telemetry.span("db.fetch", streaming=True) as span:
+                    batch = cursor.fetchmany(min(batch_size, max_rows - len(rows) + 1))
+                    span.set_attribute("rows", len(batch))
+                if cursor.description and not columns:
+                    columns = [column.name for column in cursor.description]
+                if not batch:
+                    break
+
+                with telemetry.span("db.convert", rows=len(batch)):
+                    converted_rows = self._convert_rows(cursor.description, batch, as_dicts)
+
+                # o lote é serializado uma única vez; só o lote que cruza o limite
+                # de bytes é medido linha a linha para achar o ponto de corte
+                fits_rows = len(rows) + len(converted_rows) <= max_rows
+                batch_bytes = self._json_size(converted_rows) - 2 * len(converted_rows)
+                if fits_rows and total_bytes + batch_bytes <= max_bytes:
+                    rows.extend(converted_rows)
+                    total_bytes += batch_bytes
+                    continue
+
+                for converted_row in converted_rows:
+                    row_bytes = self._json_size(converted_row)
+                    if len(rows) >= max_rows or total_bytes + row_bytes > max_bytes:
+                        truncated = True
+                        break
+                    rows.append(converted_row)
+                    total_bytes += row_bytes
+
+            cursor.close()
+            cursor = None
+
+            telemetry.observe("db.rows_returned", len(rows))
+            estimated_total_rows = len(rows)
+            if truncated:
+                estimated_total_rows = row_estimate
+                if estimated_total_rows is None:
+                    estimated_total_rows = self.estimate_row_count(query, params)
+
+            return {
+                "columns": columns,
+                "rows": rows,
+                "row_count": len(rows),
+                "truncated": truncated,
+                "bytes": total_bytes,
+                "estimated_total_rows": estimated_total_rows,
+            }
+
+        except psycopg2.Error as e:
+            telemetry.increment("db.errors", operation="execute_bounded")
+            print(f"Erro ao executar consulta: {str(e)}")
+            self._raise_if_timeout(e, statement_timeout_ms)
+            raise
+
+        finally:
+            if cursor:
+                cursor.close()
+            if self.connection:
+                self.connection.rollback()
+
+    @staticmethod
+    def _json_size(value: Any) -> int:
+        """Tamanho em bytes (UTF-8) da serialização JSON do valor."""
+        return len(json.dumps(value, ensure_ascii=False, default=str).encode('utf-8'))
+
+    def explain(self, query: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Obtém o plano estimado da consulta (EXPLAIN FORMAT JSON), sem executá-la.
+
+        Args:
+            query: Consulta SQL
+            params: Dicionário com parâmetros para a consulta (opcional)
+
+        Returns:
+            Dict: Nó raiz do plano ("Plan") retornado pelo PostgreSQL
+        """
+        if not self.connection:
+            raise ValueError("Conexão não estabelecida. Execute o método connect() primeiro.")
+
+        with self.connection.cursor() as cursor:
+            cursor.execute("EXPLAIN (FORMAT JSON) " + query, params or {})
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]["Plan"]
+
+    def estimate_row_count(self, query: str, params: Optional[Dict[str, Any]] = None) -> Optional[int]:
+        """
+        Estima o número de linhas de uma consulta pelo planejador do PostgreSQL.
+
+        Returns:
+            int com a estimativa ou None se não for possível obtê-la
+        """
+        try:
+            return int(self.explain(query, params).get("Plan Rows", 0))
+        except (psycopg2.Error, KeyError, IndexError, TypeError, ValueError):
+            if self.connection:
+                self.connection.rollback()
+            return None
+
     def get_tables_and_columns(self):
         """
         Obtém informações básicas do schema: tabelas, colunas e tipos de dados.
+
+        Usa uma única consulta ao catálogo para todas as tabelas.
         
         Returns:
             Dict: Dicionário com estrutura de tabelas e suas colunas.
@@ -179,42 +516,106 @@ class PostgreSQLConnector:
         
         schema = {}
         
-        tables_query = """
-            SELECT table_name 
-            FROM information_schema.tables 
-            WHERE table_schema = 'public' AND table_type = 'BASE TABLE'
-            ORDER BY table_name
+        schema_query = """
+            SELECT 
+                t.table_name, 
+                c.column_name, 
+                c.data_type
+            FROM 
+                information_schema.tables t
+                LEFT JOIN information_schema.columns c
+                    ON c.table_schema = t.table_schema AND c.table_name = t.table_name
+            WHERE 
+                t.table_schema = 'public' AND t.table_type = 'BASE TABLE'
+            ORDER BY 
+                t.table_name, c.ordinal_position
         """
-        tables = self.execute_query(tables_query)
+        rows = self.execute_query(schema_query)
         
-        for table in tables:
-            table_name = table['table_name']
-            schema[table_name] = {}
-            
-            columns_query = """
-                SELECT 
-                    column_name, 
-                    data_type
-                FROM 
-                    information_schema.columns
-                WHERE 
-                    table_schema = 'public' AND table_name = %(table_name)s
-                ORDER BY 
-                    ordinal_position
-            """
-            columns = self.execute_query(columns_query, {'table_name': table_name})
-            
-            for column in columns:
-                column_name = column['column_name']
-                data_type = column['data_type']
-                schema[table_name][column_name] = data_type
+        for row in rows:
+            columns = schema.setdefault(row['table_name'], {})
+            if row['column_name'] is not None:
+                columns[row['column_name']] = row['data_type']
         
         return schema
+
+    def get_schema_fingerprint(self) -> str:
+        """
+        Calcula uma impressão digital barata do catálogo do schema public.
+
+        Muda sempre que uma tabela é criada, removida ou recriada, ou quando
+        colunas são adicionadas, removidas, renomeadas ou mudam de tipo.
+
+        Returns:
+            str: Hash MD5 do estado do catálogo
+        """
+        fingerprint_query = """
+            SELECT md5(coalesce(string_agg(
+                c.oid::text || ':' || c.relname || ':' || coalesce(a.attnum::text, '') || ':' ||
+                coalesce(a.attname, '') || ':' || coalesce(a.atttypid::text, ''),
+                ',' ORDER BY c.oid, a.attnum
+            ), '')) AS fingerprint
+            FROM pg_class c
+                JOIN pg_namespace n ON n.oid = c.relnamespace
+                LEFT JOIN pg_attribute a
+                    ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+            WHERE n.nspname = 'public' AND c.relkind IN ('r', 'p')
+        """
+        row = self.execute_query(fingerprint_query, fetch_all=False)
+        return row['fingerprint']
                     
+    def get_table_versions(self) -> Dict[str, str]:
+        """
+        Lê as versões de carga das tabelas gravadas pelo CSVToGCP em cemig_meta.table_versions.
+
+        Returns:
+            Dict: Tabela -> versão (vazio se a tabela de controle não existir)
+        """
+        exists = self.execute_query(
+            "SELECT to_regclass('cemig_meta.table_versions') IS NOT NULL AS exists",
+            fetch_all=False
+        )
+        if not exists or not exists['exists']:
+            return {}
+
+        rows = self.execute_query("SELECT table_name, version::text AS version FROM cemig_meta.table_versions")
+        return {row['table_name']: row['version'] for row in rows}
+
+    def get_materialized_views(self) -> Dict[str, Dict[str, str]]:
+        """
+        Lista as visões materializadas populadas do schema atual e os tipos das colunas.
+
+        Returns:
+            Dict: {visão: {coluna: tipo (format_type)}} das visões prontas para consulta
+        """
+        rows = self.execute_query(
+            """
+            SELECT c.relname AS matviewname, a.attname, format_type(a.atttypid, a.atttypmod) AS column_type
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+            WHERE c.relkind = 'm' AND c.relispopulated AND n.nspname = current_schema()
+            """
+        )
+        views: Dict[str, Dict[str, str]] = {}
+        for row in rows:
+            views.setdefault(row['matviewname'], {})[row['attname']] = row['column_type']
+        return views
+
+    def rollback(self):
+        """Desfaz a transação corrente (ex.: após um EXPLAIN que falhou)."""
+        if self.connection:
+            self.connection.rollback()
+
     def close(self):
         """
         Fecha a conexão com o banco de dados.
+
+        Conexões emprestadas do pool são devolvidas a ele em vez de fechadas.
         """
         if self.connection:
-            self.connection.close()
+            if self.use_pool:
+                self._get_pool().release(self.connection)
+            else:
+                self.connection.close()
             self.connection = None
\ No newline at end of file
@@ -0,0 +1,434 @@
+import re
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .sql_utils import extract_tables, normalize_sql
+
+_MEASURE = re.compile(r'^\s*(count|sum|avg|min|max)\s*\(\s*(\*|[^()]+?)\s*\)\s*$', re.IGNORECASE)
+
+_QUOTED_LITERAL = re.compile(r"('(?:[^']|'')*')")
+
+_IDENTIFIER = r'"(?:[^"]|"")+"|[a-z_][a-z0-9_$]*'
+
+_SIMPLE_AGGREGATE = re.compile(r'\b(count|sum|avg|min|max)\s*\(\s*(\*|' + _IDENTIFIER + r')\s*\)')
+
+_ANY_AGGREGATE = re.compile(
+    r'\b(count|sum|avg|min|max|string_agg|array_agg|json_agg|jsonb_agg|json_object_agg|'
+    r'bool_and|bool_or|every|bit_and|bit_or|stddev|stddev_pop|stddev_samp|variance|var_pop|'
+    r'var_samp|percentile_cont|percentile_disc|mode|corr|covar_pop|covar_samp|regr_[a-z]+)\s*\('
+)
+
+_UNSUPPORTED = re.compile(
+    r'\b(with|join|union|intersect|except|distinct|over|lateral|grouping|rollup|cube|filter|tablesample|'
+    r'random|setseed|now|clock_timestamp|statement_timestamp|transaction_timestamp|timeofday|'
+    r'current_date|current_time|current_timestamp|localtime|localtimestamp|nextval|setval|currval|'
+    r'gen_random_uuid|uuid_generate_v4|txid_current|pg_sleep)\b'
+)
+
+# agregação sem alias que ocupa um item inteiro da lista do SELECT (com casts opcionais)
+_BARE_AGGREGATE = re.compile(
+    r'^(count|sum|avg|min|max)\s*\(\s*(?:\*|' + _IDENTIFIER + r')\s*\)'
+    r'(?:\s*::\s*[a-z_][a-z0-9_]*(?:\s*\([\d,\s]*\))?)*$'
+)
+
+_WORD = re.compile(r'[a-z_][a-z0-9_$]*')
+
+# palavras permitidas fora das agregações numa consulta reescrita: palavras-chave,
+# funções imutáveis e tipos de cast; qualquer outra (coluna sem aspas, função
+# volátil ou desconhecida) impede a reescrita
+_ALLOWED_WORDS = {
+    "select", "from", "where", "and", "or", "not", "group", "by", "having", "order", "asc", "desc",
+    "nulls", "first", "last", "limit", "offset", "in", "is", "null", "isnull", "notnull", "between",
+    "like", "ilike", "similar", "to", "escape", "true", "false", "case", "when", "then", "else", "end",
+    "coalesce", "nullif", "round", "abs", "upper", "lower", "trim",
+    "bigint", "integer", "int", "smallint", "numeric", "decimal", "real", "float", "double",
+    "precision", "text", "varchar", "date", "boolean",
+}
+
+_ALIAS = re.compile(r'\bas\s+(' + _IDENTIFIER + r')')
+
+_QUOTED_IDENTIFIER = re.compile(r'"(?:[^"]|"")+"')
+
+
+def _quote_identifier(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _unquote(identifier: str) -> str:
+    if identifier.startswith('"') and identifier.endswith('"'):
+        return identifier[1:-1].replace('""', '"')
+    return identifier
+
+
+@dataclass(frozen=True)
+class Measure:
+    """Medida pré-agregada de uma visão materializada."""
+
+    function: str
+    column: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        """Nome da coluna da medida na visão (ex.: count_all, sum_MdaPotenciaOutorgadaKw)."""
+        return f"{self.function}_{self.column if self.column is not None else 'all'}"
+
+    def sql(self) -> str:
+        argument = "*" if self.column is None else _quote_identifier(self.column)
+        return f"{self.function.upper()}({argument})"
+
+
+@dataclass(frozen=True)
+class MaterializedViewDefinition:
+    """Visão materializada com contagens/somas agrupadas por dimensões de uma tabela."""
+
+    name: str
+    source: str
+    dimensions: Tuple[str, ...]
+    measures: Tuple[Measure, ...]
+
+    def measure(self, function: str, column: Optional[str]) -> Optional[Measure]:
+        for measure in self.measures:
+            if measure.function == function and measure.column == column:
+                return measure
+        return None
+
+    def create_sql(self) -> str:
+        dimensions = ", ".join(_quote_identifier(dimension) for dimension in self.dimensions)
+        measures = ", ".join(
+            f"{measure.sql()} AS {_quote_identifier(measure.name)}" for measure in self.measures
+        )
+        select_list = f"{dimensions}, {measures}" if dimensions else measures
+        group_by = f" GROUP BY {dimensions}" if dimensions else ""
+        return (
+            f"CREATE MATERIALIZED VIEW {_quote_identifier(self.name)} AS "
+            f"SELECT {select_list} FROM {_quote_identifier(self.source)}{group_by}"
+        )
+
+    def unique_index_sql(self) -> Optional[str]:
+        """Índice único nas dimensões, exigido pelo REFRESH MATERIALIZED VIEW CONCURRENTLY."""
+        if not self.dimensions:
+            return None
+        dimensions = ", ".join(_quote_identifier(dimension) for dimension in self.dimensions)
+        index_name = f"{self.name[:55]}__dims"
+        return (
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {_quote_identifier(index_name)} "
+            f"ON {_quote_identifier(self.name)} ({dimensions})"
+        )
+
+    def refresh_sql(self) -> str:
+        concurrently = " CONCURRENTLY" if self.dimensions else ""
+        return f"REFRESH MATERIALIZED VIEW{concurrently} {_quote_identifier(self.name)}"
+
+    def drop_sql(self) -> str:
+        return f"DROP MATERIALIZED VIEW IF EXISTS {_quote_identifier(self.name)}"
+
+
+def _parse_measure(expression: str) -> List[Measure]:
+    match = _MEASURE.match(str(expression))
+    if not match:
+        raise ValueError(f"Medida inválida: {expression}. Use count(*), count(col), sum(col), avg(col), min(col) ou max(col)")
+    function = match.group(1).lower()
+    argument = match.group(2).strip()
+    column = None if argument == "*" else _unquote(argument)
+    if function == "avg":
+        # média = soma / contagem, reagregável a partir da visão
+        return [Measure("sum", column), Measure("count", column)]
+    if column is None and function != "count":
+        raise ValueError(f"Medida inválida: {expression}")
+    return [Measure(function, column)]
+
+
+def load_view_definitions(path: str) -> List[MaterializedViewDefinition]:
+    """
+    Lê as definições das visões materializadas (materialized_views.yaml).
+
+    Formato:
+        views:
+          mv_nome:
+            source: tabela
+            dimensions: [ColunaA, ColunaB]
+            measures: ["count(*)", "sum(ColunaValor)", "avg(ColunaValor)"]
+
+    Returns:
+        Lista de definições (vazia se o arquivo não existir)
+    """
+    file_path = Path(path)
+    if not path or not file_path.exists():
+        return []
+
+    import yaml
+
+    with open(file_path, "r", encoding="utf-8") as definitions_file:
+        data = yaml.safe_load(definitions_file) or {}
+
+    definitions = []
+    for name, entry in (data.get("views") or {}).items():
+        measures: List[Measure] = []
+        for expression in entry.get("measures") or ["count(*)"]:
+            for measure in _parse_measure(expression):
+                if measure not in measures:
+                    measures.append(measure)
+        definitions.append(MaterializedViewDefinition(
+            name=name,
+            source=entry["source"],
+            dimensions=tuple(entry.get("dimensions") or ()),
+            measures=tuple(measures),
+        ))
+    return definitions
+
+
+@dataclass
+class RewriteResult:
+    """Consulta reescrita para ler de uma visão materializada."""
+
+    query: str
+    view: str
+
+
+def _split_literals(sql: str) -> List[str]:
+    """Divide a consulta em trechos; os de índice ímpar são literais de texto."""
+    return _QUOTED_LITERAL.split(sql)
+
+
+def _select_items(sql: str) -> List[Tuple[int, int]]:
+    """
+    Posições (início, fim) dos itens da lista do SELECT de uma consulta
+    normalizada, ignorando vírgulas dentro de parênteses, literais e
+    identificadores entre aspas.
+    """
+    items = []
+    depth = 0
+    quote = None
+    start = index = len("select")
+    while index < len(sql):
+        char = sql[index]
+        if quote:
+            if char == quote:
+                if sql.startswith(quote * 2, index):
+                    index += 2
+                    continue
+                quote = None
+        elif char in ("'", '"'):
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif depth == 0 and char == ",":
+            items.append((start, index))
+            start = index + 1
+        elif depth == 0 and re.match(r'from\b', sql[index:]) and not re.match(r'[a-z0-9_$]', sql[index - 1]):
+            break
+        index += 1
+    items.append((start, index))
+    return items
+
+
+def _alias_bare_aggregates(sql: str) -> str:
+    """
+    Dá às agregações sem alias da lista do SELECT o nome que o PostgreSQL daria
+    à coluna (count, sum, avg...), para que a consulta reescrita, cujas
+    expressões são outras, devolva as mesmas chaves.
+    """
+    for start, end in reversed(_select_items(sql)):
+        item = sql[start:end]
+        match = _BARE_AGGREGATE.match(item.strip())
+        if match:
+            item_end = start + len(item.rstrip())
+            sql = f"{sql[:item_end]} as {_quote_identifier(match.group(1))}{sql[item_end:]}"
+    return sql
+
+
+class AggregateRewriter:
+    """
+    Reescreve consultas de agregação simples (COUNT/SUM/AVG/MIN/MAX agrupados
+    por colunas de uma única tabela) para lerem de uma visão materializada
+    pré-agregada, muito menor que a tabela original.
+
+    Só reescreve quando todas as agregações têm medida correspondente na visão
+    e, fora delas, a consulta só cita dimensões entre aspas, literais,
+    operadores e palavras-chave; caso contrário a consulta segue inalterada.
+    Somas reagregadas são convertidas de volta ao tipo do SUM original (o da
+    coluna da visão), então expressões como SUM(x) / COUNT(*) não mudam de tipo.
+    Agregações sem alias recebem o nome original da coluna (count, avg...),
+    então o formato do resultado não muda. A consulta reescrita é validada
+    pelo EXPLAIN do QueryGuard antes da execução.
+    """
+
+    def __init__(
+        self,
+        definitions: List[MaterializedViewDefinition],
+        enabled: bool = True,
+        check_interval: float = 60.0
+    ):
+        """
+        Inicializa o rewriter.
+
+        Args:
+            definitions: Visões materializadas declaradas
+            enabled: Se False, nenhuma consulta é reescrita
+            check_interval: Segundos entre consultas a pg_matviews
+        """
+        self.definitions = definitions
+        self.enabled = enabled and bool(definitions)
+        self.check_interval = check_interval
+        self._available: Dict[str, Dict[str, str]] = {}
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._stats = {"rewrites": 0, "fallbacks": 0}
+
+    def refresh_due(self) -> bool:
+        """Indica se a lista de visões disponíveis no banco deve ser relida."""
+        if not self.enabled:
+            return False
+        with self._lock:
+            return self._checked_at is None or time.monotonic() - self._checked_at >= self.check_interval
+
+    def refresh_available(self, connector: Any):
+        """Relê as visões materializadas populadas do banco e os tipos das colunas."""
+        available = connector.get_materialized_views()
+        with self._lock:
+            self._available = dict(available)
+            self._checked_at = time.monotonic()
+
+    def record_fallback(self):
+        """Registra uma reescrita descartada (ex.: EXPLAIN falhou na visão)."""
+        with self._lock:
+            self._stats["fallbacks"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "available_views": len(self._available), "enabled": self.enabled}
+
+    def _rewrite_for_view(
+        self,
+        sql: str,
+        view: MaterializedViewDefinition,
+        column_types: Dict[str, str]
+    ) -> Optional[str]:
+        source_reference = re.compile(
+            r'\bfrom\s+(?:public\s*\.\s*)?(?:' + re.escape(_quote_identifier(view.source)) + r'|'
+            + re.escape(view.source) + r')(?![a-z0-9_$"])'
+        )
+        dimensions = set(view.dimensions)
+        lowercase_dimensions = {dimension for dimension in dimensions if _WORD.fullmatch(dimension)}
+        segments = _split_literals(sql)
+        rewritten_segments = []
+        aggregates = 0
+        references: Set[str] = set()
+        aliases: Set[str] = set()
+
+        for index, segment in enumerate(segments):
+            if index % 2 == 1:
+                rewritten_segments.append(segment)
+                continue
+
+            unmapped = False
+
+            def replace_aggregate(match):
+                nonlocal aggregates, unmapped
+                function, argument = match.group(1), match.group(2)
+                column = None if argument == "*" else _unquote(argument)
+                aggregates += 1
+                if function == "avg":
+                    total = view.measure("sum", column)
+                    count = view.measure("count", column)
+                    if total is None or count is None:
+                        unmapped = True
+                        return match.group(0)
+                    return (
+                        f"(sum({_quote_identifier(total.name)}) / "
+                        f"nullif(sum({_quote_identifier(count.name)}), 0))"
+                    )
+                measure = view.measure(function, column)
+                if measure is None:
+                    unmapped = True
+                    return match.group(0)
+                if function == "count":
+                    return f"coalesce(sum({_quote_identifier(measure.name)}), 0)::bigint"
+                if function == "sum":
+                    # a coluna da visão tem o tipo do SUM original; somá-la de novo
+                    # promove bigint a numeric e mudaria, por exemplo, a divisão inteira
+                    # em SUM(x) / COUNT(*)
+                    column_type = column_types.get(measure.name)
+                    if column_type is None:
+                        unmapped = True
+                        return match.group(0)
+                    return f"sum({_quote_identifier(measure.name)})::{column_type}"
+                return f"{function}({_quote_identifier(measure.name)})"
+
+            segment_aggregates = len(_ANY_AGGREGATE.findall(segment))
+            replaced, simple = _SIMPLE_AGGREGATE.subn(replace_aggregate, segment)
+            if unmapped or simple != segment_aggregates:
+                return None
+
+            replaced, sources = source_reference.subn(f"from {_quote_identifier(view.name)}", replaced)
+            if sources > 1:
+                return None
+
+            aliases.update(_unquote(alias) for alias in _ALIAS.findall(replaced))
+            without_measures = _SIMPLE_AGGREGATE.sub("", _ALIAS.sub("", replaced))
+            references.update(_unquote(identifier) for identifier in _QUOTED_IDENTIFIER.findall(without_measures))
+            # fora das agregações só podem restar dimensões entre aspas, números,
+            # operadores e palavras permitidas: o resto seria avaliado sobre as
+            # linhas já agregadas da visão e mudaria o resultado
+            words = _WORD.findall(re.sub(r'\b\d+(?:\.\d+)?\b', '', _QUOTED_IDENTIFIER.sub('', without_measures)))
+            if any(word not in _ALLOWED_WORDS and word not in lowercase_dimensions and word not in aliases for word in words):
+                return None
+            rewritten_segments.append(replaced)
+
+        if aggregates == 0:
+            return None
+
+        references.discard(view.name)
+        if not references - aliases <= dimensions:
+            return None
+
+        rewritten = "".join(rewritten_segments)
+        if _quote_identifier(view.name) not in rewritten:
+            return None
+        return rewritten
+
+    def rewrite(self, query: str) -> Optional[RewriteResult]:
+        """
+        Tenta reescrever a consulta para uma visão materializada disponível.
+
+        Args:
+            query: Consulta SQL do agente
+
+        Returns:
+            RewriteResult com a consulta reescrita ou None se nenhuma visão a atende
+        """
+        if not self.enabled:
+            return None
+
+        sql = normalize_sql(query)
+        code = "".join(segment for index, segment in enumerate(_split_literals(sql)) if index % 2 == 0)
+        if not code.startswith("select") or len(re.findall(r'\bselect\b', code)) != 1:
+            return None
+        if _UNSUPPORTED.search(code):
+            return None
+
+        tables = extract_tables(sql)
+        if len(tables) != 1:
+            return None
+        source = next(iter(tables))
+
+        with self._lock:
+            available = dict(self._available)
+
+        candidates = sorted(
+            (view for view in self.definitions if view.source == source and view.name in available),
+            key=lambda view: len(view.dimensions)
+        )
+        aliased_sql = _alias_bare_aggregates(sql)
+        for view in candidates:
+            rewritten = self._rewrite_for_view(aliased_sql, view, available[view.name])
+            if rewritten is not None:
+                with self._lock:
+                    self._stats["rewrites"] += 1
+                return RewriteResult(query=rewritten, view=view.name)
+        return None
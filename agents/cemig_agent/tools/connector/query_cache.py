@@ -0,0 +1,161 @@
+import json
+import threading
+import time
+from typing import Any, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+from ...common.cache import LRUCache
+from .sql_utils import extract_tables, is_cacheable_query, normalize_sql
+
+
+def _result_size(entry: Tuple[Set[str], Any]) -> int:
+    _, result = entry
+    return len(json.dumps(result, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+class QueryResultCache:
+    """
+    Cache de resultados de consultas somente leitura.
+
+    A chave é a consulta normalizada (sem comentários, espaços redundantes e
+    diferenças de caixa fora de literais) mais os parâmetros. As entradas
+    expiram por TTL, são removidas por LRU dentro de um orçamento de memória
+    e são invalidadas quando uma tabela consultada é recarregada.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 256,
+        ttl: Optional[float] = 300.0,
+        max_bytes: Optional[int] = 64 * 1024 * 1024,
+        version_check_interval: float = 30.0,
+        enabled: bool = True
+    ):
+        """
+        Inicializa o cache.
+
+        Args:
+            maxsize: Número máximo de resultados em cache
+            ttl: Segundos até um resultado expirar
+            max_bytes: Orçamento de memória (tamanho JSON aproximado dos resultados)
+            version_check_interval: Segundos entre verificações das versões das tabelas
+            enabled: Se False, o cache nunca armazena nem retorna resultados
+        """
+        self.enabled = enabled
+        self.version_check_interval = version_check_interval
+        self._cache = LRUCache(maxsize=maxsize, ttl=ttl, max_bytes=max_bytes, sizeof=_result_size)
+        self._table_versions: Optional[Dict[str, str]] = None
+        self._last_version_check = 0.0
+        self._lock = threading.Lock()
+        self._invalidations = 0
+
+    @staticmethod
+    def make_key(query: str, params: Optional[Dict[str, Any]] = None, variant: Hashable = None) -> Tuple:
+        """
+        Monta a chave de cache de uma consulta.
+
+        Args:
+            query: Consulta SQL
+            params: Parâmetros da consulta
+            variant: Diferencia resultados da mesma consulta obtidos com opções distintas
+
+        Returns:
+            Tuple usada como chave do cache
+        """
+        params_key = json.dumps(params or {}, sort_keys=True, default=str)
+        return (normalize_sql(query), params_key, variant)
+
+    def is_cacheable(self, query: str) -> bool:
+        """Indica se o resultado da consulta pode ser armazenado."""
+        return self.enabled and is_cacheable_query(query)
+
+    def get(self, query: str, params: Optional[Dict[str, Any]] = None, variant: Hashable = None) -> Any:
+        """
+        Retorna o resultado em cache de uma consulta.
+
+        Returns:
+            Resultado armazenado ou None
+        """
+        if not self.enabled:
+            return None
+        entry = self._cache.get(self.make_key(query, params, variant))
+        if entry is None:
+            return None
+        return entry[1]
+
+    def set(self, query: str, result: Any, params: Optional[Dict[str, Any]] = None, variant: Hashable = None):
+        """
+        Armazena o resultado de uma consulta somente leitura.
+
+        Args:
+            query: Consulta SQL executada
+            result: Resultado a armazenar
+            params: Parâmetros da consulta
+            variant: Diferencia resultados da mesma consulta obtidos com opções distintas
+        """
+        if not self.is_cacheable(query):
+            return
+        tables = extract_tables(query)
+        self._cache.set(self.make_key(query, params, variant), (tables, result))
+
+    def invalidate_tables(self, tables: Iterable[str]) -> int:
+        """
+        Remove os resultados que consultaram alguma das tabelas informadas.
+
+        Returns:
+            int: Número de resultados removidos
+        """
+        changed = {table.lower() for table in tables}
+        if not changed:
+            return 0
+        removed = self._cache.discard_where(
+            lambda key, entry: any(table.lower() in changed for table in entry[0])
+        )
+        with self._lock:
+            self._invalidations += removed
+        return removed
+
+    def version_check_due(self) -> bool:
+        """Indica se já passou o intervalo para consultar novamente as versões das tabelas."""
+        if not self.enabled:
+            return False
+        return time.monotonic() - self._last_version_check >= self.version_check_interval
+
+    def sync_table_versions(self, versions: Dict[str, str]) -> int:
+        """
+        Compara as versões das tabelas (gravadas pelo CSVToGCP a cada carga) com
+        as vistas anteriormente e invalida os resultados das tabelas recarregadas.
+
+        Args:
+            versions: Tabela -> versão atual
+
+        Returns:
+            int: Número de resultados removidos
+        """
+        with self._lock:
+            previous = self._table_versions
+            self._table_versions = dict(versions)
+            self._last_version_check = time.monotonic()
+
+        if previous is None:
+            return 0
+
+        changed = {
+            table for table in set(previous) | set(versions)
+            if previous.get(table) != versions.get(table)
+        }
+        return self.invalidate_tables(changed)
+
+    def clear(self):
+        """Remove todos os resultados."""
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna métricas do cache.
+
+        Returns:
+            Dict: Acertos, falhas, taxa de acerto, remoções, invalidações e bytes ocupados
+        """
+        with self._lock:
+            invalidations = self._invalidations
+        return {**self._cache.stats(), "invalidations": invalidations, "enabled": self.enabled}
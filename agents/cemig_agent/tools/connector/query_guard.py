@@ -0,0 +1,114 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from .sql_utils import mask_quoted
+
+
+class QueryRejectedError(ValueError):
+    """Erro levantado quando a consulta excede os limites de custo/linhas estimados."""
+
+
+class QueryTimeoutError(Exception):
+    """Erro levantado quando a consulta é cancelada pelo statement_timeout."""
+
+
+@dataclass
+class GuardDecision:
+    """Resultado da verificação de uma consulta pelo QueryGuard."""
+
+    query: str
+    estimated_rows: Optional[int]
+    estimated_cost: Optional[float]
+    limited: bool = False
+
+
+class QueryGuard:
+    """
+    Verificação pré-execução de consultas geradas pelo agente.
+
+    Usa o plano estimado do PostgreSQL (EXPLAIN FORMAT JSON, sem executar a
+    consulta) para limitar automaticamente consultas que retornariam linhas
+    demais e rejeitar consultas cujo custo estimado excede o limite.
+    """
+
+    def __init__(
+        self,
+        max_cost: Optional[float] = None,
+        max_rows: Optional[int] = None,
+        auto_limit: bool = True,
+        enabled: bool = True
+    ):
+        """
+        Inicializa o guard.
+
+        Args:
+            max_cost: Custo total estimado máximo (unidades do planejador); None desativa
+            max_rows: Número estimado de linhas acima do qual a consulta é limitada ou rejeitada
+            auto_limit: Se True, aplica LIMIT max_rows + 1 em vez de rejeitar
+            enabled: Se False, as consultas passam sem verificação
+        """
+        self.max_cost = max_cost
+        self.max_rows = max_rows
+        self.auto_limit = auto_limit
+        self.enabled = enabled
+
+    @staticmethod
+    def _plan_estimates(plan: Dict[str, Any]):
+        return int(plan.get("Plan Rows", 0)), float(plan.get("Total Cost", 0.0))
+
+    @staticmethod
+    def limit_query(query: str, limit: int) -> Optional[str]:
+        """
+        Envolve a consulta em uma subconsulta com LIMIT.
+
+        Returns:
+            Consulta limitada ou None se a consulta contiver mais de um comando
+        """
+        statement = query.strip().rstrip(';').rstrip()
+        # ';' dentro de literais, identificadores entre aspas ou comentários não separa comandos
+        if ';' in mask_quoted(statement):
+            return None
+        return f"SELECT * FROM (\n{statement}\n) AS limited_query LIMIT {int(limit)}"
+
+    def check(self, connector: Any, query: str, params: Optional[Dict[str, Any]] = None) -> GuardDecision:
+        """
+        Verifica a consulta antes da execução.
+
+        Args:
+            connector: PostgreSQLConnector conectado
+            query: Consulta SELECT/WITH gerada pelo agente
+            params: Parâmetros da consulta
+
+        Returns:
+            GuardDecision com a consulta a executar (original ou limitada) e as estimativas
+
+        Raises:
+            QueryRejectedError: Se o custo ou o número de linhas estimados excederem os limites
+        """
+        if not self.enabled:
+            return GuardDecision(query=query, estimated_rows=None, estimated_cost=None)
+
+        estimated_rows, estimated_cost = self._plan_estimates(connector.explain(query, params))
+        decision = GuardDecision(query=query, estimated_rows=estimated_rows, estimated_cost=estimated_cost)
+
+        if self.max_rows is not None and estimated_rows > self.max_rows:
+            limited_query = self.limit_query(query, self.max_rows + 1) if self.auto_limit else None
+            if limited_query is None:
+                raise QueryRejectedError(
+                    f"Consulta rejeitada: o plano estima {estimated_rows} linhas, acima do limite de "
+                    f"{self.max_rows}. Use filtros (WHERE), agregações (GROUP BY) ou LIMIT."
+                )
+            _, limited_cost = self._plan_estimates(connector.explain(limited_query, params))
+            decision.query = limited_query
+            decision.estimated_cost = limited_cost
+            decision.limited = True
+
+        if self.max_cost is not None and decision.estimated_cost > self.max_cost:
+            raise QueryRejectedError(
+                f"Consulta rejeitada: custo estimado {decision.estimated_cost:.0f} excede o limite de "
+                f"{self.max_cost:.0f} (aproximadamente {estimated_rows} linhas processadas). "
+                "Evite produtos cartesianos e varreduras completas: adicione condições de JOIN, "
+                "filtros (WHERE) ou agregações mais seletivas."
+            )
+
+        return decision
@@ -0,0 +1,308 @@
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .sql_utils import extract_tables, mask_literals, normalize_sql
+
+_NUMBER = re.compile(r'''("(?:[^"]|"")*"|'\?')|(?<![\w$])[+-]?\d+(?:\.\d+)?(?![\w$])''')
+
+_IN_LIST = re.compile(r"\bin \((?:\?|'\?')(?:, (?:\?|'\?'))*\)")
+
+# operadores e separadores com espaçamento canônico ("Ano"=? e "Ano" = ? viram o mesmo texto)
+_OPERATOR = re.compile(r'("(?:[^"]|"")*")|\s*(->>|->|<=|>=|<>|!=|::|\|\||[=<>+\-/%,])\s*|(\()\s+|\s+(\))')
+
+_REPEATED_SPACES = re.compile(r'("(?:[^"]|"")*")| {2,}')
+
+
+def _space_operator(match) -> str:
+    quoted, operator, opening, closing = match.groups()
+    if quoted:
+        return quoted
+    if operator == "::":
+        return "::"
+    if operator == ",":
+        return ", "
+    if operator:
+        return f" {operator} "
+    return opening or closing
+
+
+ORDERINGS = {
+    "slowest": "mean_ms",
+    "frequent": "calls",
+    "total": "total_ms",
+}
+
+_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS fingerprints (
+        fingerprint TEXT PRIMARY KEY,
+        query TEXT NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS fingerprint_tables (
+        fingerprint TEXT NOT NULL,
+        table_name TEXT NOT NULL,
+        PRIMARY KEY (fingerprint, table_name)
+    )""",
+    """CREATE TABLE IF NOT EXISTS query_runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ts REAL NOT NULL,
+        fingerprint TEXT NOT NULL,
+        duration_ms REAL NOT NULL,
+        rows INTEGER,
+        status TEXT NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS query_runs_fingerprint ON query_runs (fingerprint)",
+]
+
+
+def fingerprint_query(query: str) -> Tuple[str, str]:
+    """
+    Normaliza a consulta trocando literais (texto e números) por '?' e listas
+    IN por um único '?', com espaçamento canônico em volta de operadores e
+    vírgulas, de modo que consultas que só diferem nos valores ou nos espaços
+    compartilhem o mesmo fingerprint.
+
+    Returns:
+        (hash do fingerprint, consulta normalizada)
+    """
+    masked = mask_literals(normalize_sql(query))
+    masked = _OPERATOR.sub(_space_operator, masked)
+    masked = _REPEATED_SPACES.sub(lambda match: match.group(1) or " ", masked)
+    masked = _NUMBER.sub(lambda match: match.group(1) or "?", masked)
+    masked = _IN_LIST.sub("in (?)", masked)
+    return hashlib.sha1(masked.encode("utf-8")).hexdigest()[:16], masked
+
+
+class QueryStatsStore:
+    """
+    Registro local (SQLite) das consultas executadas pelo agente: fingerprint,
+    duração, linhas retornadas, situação (ok/timeout/cached) e tabelas envolvidas.
+
+    O número de execuções guardadas é limitado por `max_entries`; as mais
+    antigas são descartadas, junto com os fingerprints que nenhuma execução
+    restante usa. Serve de base para decidir índices e visões
+    pré-agregadas a partir do tráfego real.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100000, prune_every: int = 1000):
+        """
+        Inicializa o registro.
+
+        Args:
+            path: Arquivo SQLite (criado se não existir)
+            max_entries: Máximo de execuções mantidas
+            prune_every: Intervalo, em inserções, entre as limpezas das execuções antigas
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.prune_every = max(1, prune_every)
+        self._inserts = 0
+        self._lock = threading.Lock()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        with self._connection:
+            for statement in _SCHEMA:
+                self._connection.execute(statement)
+
+    def record(self, query: str, duration_ms: float, row_count: Optional[int] = None, status: str = "ok"):
+        """Registra uma execução da consulta."""
+        fingerprint, normalized = fingerprint_query(query)
+        with self._lock, self._connection:
+            # o fingerprint pode ter sido removido pela limpeza (deste ou de outro processo)
+            inserted = self._connection.execute(
+                "INSERT OR IGNORE INTO fingerprints (fingerprint, query) VALUES (?, ?)",
+                (fingerprint, normalized)
+            ).rowcount
+            if inserted:
+                self._connection.executemany(
+                    "INSERT OR IGNORE INTO fingerprint_tables (fingerprint, table_name) VALUES (?, ?)",
+                    [(fingerprint, table) for table in sorted(extract_tables(query))]
+                )
+            self._connection.execute(
+                "INSERT INTO query_runs (ts, fingerprint, duration_ms, rows, status) VALUES (?, ?, ?, ?, ?)",
+                (time.time(), fingerprint, round(duration_ms, 3), row_count, status)
+            )
+            self._inserts += 1
+            if self._inserts % self.prune_every == 0:
+                self._prune()
+
+    def _prune(self):
+        self._connection.execute(
+            "DELETE FROM query_runs WHERE id <= (SELECT MAX(id) FROM query_runs) - ?",
+            (self.max_entries,)
+        )
+        self._connection.execute(
+            "DELETE FROM fingerprints WHERE fingerprint NOT IN (SELECT fingerprint FROM query_runs)"
+        )
+        self._connection.execute(
+            "DELETE FROM fingerprint_tables WHERE fingerprint NOT IN (SELECT fingerprint FROM fingerprints)"
+        )
+
+    def fingerprint_stats(self, table: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Estatísticas agregadas por (tabela, fingerprint).
+
+        Args:
+            table: Restringe a uma tabela
+
+        Returns:
+            Lista de dicionários com table_name, fingerprint, query, calls,
+            cached, timeouts, mean_ms, max_ms, total_ms e mean_rows. calls
+            inclui as respostas do cache; mean_ms e max_ms consideram só as
+            execuções no banco
+        """
+        sql = """
+            SELECT COALESCE(t.table_name, '-') AS table_name, f.fingerprint, f.query,
+                   COUNT(*) AS calls,
+                   SUM(r.status = 'cached') AS cached,
+                   SUM(r.status = 'timeout') AS timeouts,
+                   COALESCE(AVG(CASE WHEN r.status <> 'cached' THEN r.duration_ms END), 0) AS mean_ms,
+                   COALESCE(MAX(CASE WHEN r.status <> 'cached' THEN r.duration_ms END), 0) AS max_ms,
+                   SUM(r.duration_ms) AS total_ms,
+                   AVG(r.rows) AS mean_rows
+            FROM query_runs r
+            JOIN fingerprints f ON f.fingerprint = r.fingerprint
+            LEFT JOIN fingerprint_tables t ON t.fingerprint = r.fingerprint
+        """
+        params: Tuple[Any, ...] = ()
+        if table:
+            sql += " WHERE t.table_name = ?"
+            params = (table,)
+        sql += " GROUP BY COALESCE(t.table_name, '-'), f.fingerprint"
+
+        with self._lock:
+            cursor = self._connection.execute(sql, params)
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def table_summary(self) -> List[Dict[str, Any]]:
+        """Carga de trabalho por tabela: execuções, respostas do cache, fingerprints distintos, tempo total e timeouts."""
+        sql = """
+            SELECT COALESCE(t.table_name, '-') AS table_name,
+                   COUNT(*) AS calls,
+                   SUM(r.status = 'cached') AS cached,
+                   COUNT(DISTINCT r.fingerprint) AS fingerprints,
+                   SUM(r.duration_ms) AS total_ms,
+                   COALESCE(AVG(CASE WHEN r.status <> 'cached' THEN r.duration_ms END), 0) AS mean_ms,
+                   SUM(r.status = 'timeout') AS timeouts
+            FROM query_runs r
+            LEFT JOIN fingerprint_tables t ON t.fingerprint = r.fingerprint
+            GROUP BY COALESCE(t.table_name, '-')
+            ORDER BY total_ms DESC
+        """
+        with self._lock:
+            cursor = self._connection.execute(sql)
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def top_by_table(self, order: str = "slowest", limit: int = 10, table: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Top-N fingerprints de cada tabela.
+
+        Args:
+            order: slowest (maior duração média), frequent (mais execuções)
+                   ou total (maior tempo acumulado)
+            limit: Fingerprints por tabela
+            table: Restringe a uma tabela
+
+        Returns:
+            Tabela -> lista ordenada de estatísticas (ver fingerprint_stats)
+        """
+        if order not in ORDERINGS:
+            raise ValueError(f"Ordenação inválida: {order}. Use uma de: {', '.join(ORDERINGS)}")
+        key = ORDERINGS[order]
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        for entry in self.fingerprint_stats(table):
+            grouped.setdefault(entry["table_name"], []).append(entry)
+        return {
+            table_name: sorted(entries, key=lambda entry: entry[key], reverse=True)[:limit]
+            for table_name, entries in sorted(grouped.items())
+        }
+
+    def workload(self) -> List[Tuple[str, int]]:
+        """Consultas normalizadas (literais como '?') com o número de execuções de cada uma (cache incluído)."""
+        with self._lock:
+            return _workload(self._connection)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+def _workload(connection: sqlite3.Connection) -> List[Tuple[str, int]]:
+    return connection.execute(
+        """
+        SELECT f.query, COUNT(*)
+        FROM query_runs r
+        JOIN fingerprints f ON f.fingerprint = r.fingerprint
+        GROUP BY f.fingerprint, f.query
+        """
+    ).fetchall()
+
+
+def read_query_stats_workload(path: str) -> List[Tuple[str, int]]:
+    """
+    Lê, sem alterar o arquivo, a carga de trabalho registrada em um QUERY_STATS_DB.
+
+    Returns:
+        Lista de (consulta normalizada, número de execuções), usada pelo index advisor
+    """
+    if not Path(path).is_file():
+        return []
+    connection = sqlite3.connect(Path(path).resolve().as_uri() + "?mode=ro", uri=True)
+    try:
+        return _workload(connection)
+    except sqlite3.OperationalError:
+        return []
+    finally:
+        connection.close()
+
+
+_stores: Dict[str, QueryStatsStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_query_stats_store(path: str, max_entries: int = 100000) -> QueryStatsStore:
+    """Retorna o registro do processo para `path`, abrindo-o na primeira chamada."""
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = QueryStatsStore(path, max_entries=max_entries)
+            _stores[path] = store
+        return store
+
+
+def record_query_stats(
+    path: str,
+    query: str,
+    duration_ms: float,
+    row_count: Optional[int] = None,
+    status: str = "ok",
+    max_entries: int = 100000
+):
+    """
+    Registra uma consulta do agente no registro de estatísticas.
+
+    Falhas são ignoradas para nunca afetar a resposta da ferramenta.
+
+    Args:
+        path: Arquivo SQLite; vazio desativa o registro
+        query: Consulta SQL enviada pelo agente
+        duration_ms: Tempo de execução em milissegundos
+        row_count: Número de linhas retornadas
+        status: ok, timeout ou cached (resposta do cache de resultados)
+        max_entries: Máximo de execuções mantidas
+    """
+    if not path:
+        return
+    try:
+        get_query_stats_store(path, max_entries).record(query, duration_ms, row_count, status)
+    except (sqlite3.Error, OSError):
+        pass
@@ -0,0 +1,95 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class SchemaCache:
+    """
+    Cache em memória do schema do banco de dados.
+
+    Dentro do TTL o schema é servido direto da memória, sem acessar o banco.
+    Após o TTL, apenas a impressão digital do catálogo é consultada; o schema
+    completo só é recarregado se o catálogo tiver mudado.
+    """
+
+    def __init__(self, ttl: float = 60.0):
+        """
+        Inicializa o cache.
+
+        Args:
+            ttl: Segundos durante os quais o schema é considerado válido sem revalidação
+        """
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._schema: Optional[Dict[str, Dict[str, str]]] = None
+        self._rendered: Optional[str] = None
+        self._fingerprint: Optional[str] = None
+        self._validated_at = 0.0
+        self._stats = {"hits": 0, "revalidations": 0, "reloads": 0}
+
+    def get_fresh(self) -> Optional[str]:
+        """
+        Retorna o schema renderizado se ainda estiver dentro do TTL.
+
+        Returns:
+            Schema como string ou None se o cache estiver vazio ou expirado
+        """
+        with self._lock:
+            if self._rendered is None:
+                return None
+            if time.monotonic() - self._validated_at > self.ttl:
+                return None
+            self._stats["hits"] += 1
+            return self._rendered
+
+    def refresh(self, connector: Any) -> str:
+        """
+        Revalida o cache usando a impressão digital do catálogo e recarrega se necessário.
+
+        Args:
+            connector: PostgreSQLConnector já conectado
+
+        Returns:
+            Schema como string
+        """
+        fingerprint = connector.get_schema_fingerprint()
+
+        with self._lock:
+            if self._rendered is not None and fingerprint == self._fingerprint:
+                self._validated_at = time.monotonic()
+                self._stats["revalidations"] += 1
+                return self._rendered
+
+        schema = connector.get_tables_and_columns()
+
+        with self._lock:
+            self._schema = schema
+            self._rendered = str(schema)
+            self._fingerprint = fingerprint
+            self._validated_at = time.monotonic()
+            self._stats["reloads"] += 1
+            return self._rendered
+
+    @property
+    def fingerprint(self) -> Optional[str]:
+        """Impressão digital do catálogo correspondente ao schema em cache."""
+        return self._fingerprint
+
+    def invalidate(self):
+        """Descarta o schema em cache."""
+        with self._lock:
+            self._schema = None
+            self._rendered = None
+            self._fingerprint = None
+            self._validated_at = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna estatísticas de uso do cache.
+
+        Returns:
+            Dict: Acertos, revalidações, recargas e idade do schema em cache
+        """
+        with self._lock:
+            age = time.monotonic() - self._validated_at if self._rendered is not None else None
+            return {**self._stats, "age": age, "tables": len(self._schema or {})}
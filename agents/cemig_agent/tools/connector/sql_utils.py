@@ -0,0 +1,213 @@
+import re
+from typing import List, Set
+
+_QUOTED_LITERAL = re.compile(r"'(?:[^']|'')*'")
+
+_QUOTED_IDENTIFIER = re.compile(r'"(?:[^"]|"")*"')
+
+_IDENTIFIER = r'(?:"(?:[^"]|"")+"|[a-z_][a-z0-9_$]*)'
+
+_TABLE_NAME = r'(' + _IDENTIFIER + r'(?:\s*\.\s*' + _IDENTIFIER + r')?)(?![a-z0-9_$."])(?!\s*[(.])'
+
+_JOIN_REFERENCE = re.compile(r'\bjoin\s+' + _TABLE_NAME)
+
+_FROM_KEYWORD = re.compile(r'\bfrom\b')
+
+_FROM_ITEM = re.compile(r'\s*(?:only\s+)?' + _TABLE_NAME)
+
+# cláusulas que encerram a lista de itens do FROM (os JOINs seguem na lista)
+_FROM_LIST_END = re.compile(
+    r'(?:where|group|order|having|limit|offset|union|intersect|except|window|fetch|for|returning)'
+    r'(?![a-z0-9_$])'
+)
+
+_FROM_IN_FUNCTION = re.compile(r'\b(?:extract|substring|trim|overlay|position)\s*\([^()]*\)')
+
+_CTE_NAME = re.compile(r'(?:\bwith|,)\s*(?:recursive\s+)?(' + _IDENTIFIER + r')\s+as\s*(?:not\s+)?(?:materialized\s+)?\(')
+
+_WRITE_KEYWORDS = re.compile(
+    r'\b(insert|update|delete|merge|create|drop|alter|truncate|grant|revoke|copy|call|'
+    r'lock|vacuum|analyze|refresh|into|set|reset|listen|notify|do)\b'
+)
+
+_VOLATILE_FUNCTIONS = re.compile(
+    r'\b(random|now|clock_timestamp|statement_timestamp|transaction_timestamp|timeofday|'
+    r'current_date|current_time|current_timestamp|localtime|localtimestamp|nextval|setval|'
+    r'currval|gen_random_uuid|uuid_generate_v4|txid_current|pg_sleep)\b'
+)
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Normaliza uma consulta SQL para uso como chave de cache.
+
+    Remove comentários, colapsa espaços, converte para minúsculas tudo que
+    está fora de literais e identificadores entre aspas e descarta o
+    ponto e vírgula final. Literais e identificadores entre aspas são
+    mantidos exatamente como escritos.
+
+    Args:
+        sql: Consulta SQL original
+
+    Returns:
+        str: Consulta normalizada
+    """
+    tokens = []
+    pending_space = False
+    index = 0
+    length = len(sql)
+
+    while index < length:
+        char = sql[index]
+
+        if sql.startswith('--', index):
+            newline = sql.find('\n', index)
+            index = length if newline < 0 else newline + 1
+            pending_space = True
+            continue
+
+        if sql.startswith('/*', index):
+            end = sql.find('*/', index + 2)
+            index = length if end < 0 else end + 2
+            pending_space = True
+            continue
+
+        if char.isspace():
+            pending_space = True
+            index += 1
+            continue
+
+        if char in ("'", '"'):
+            end = index + 1
+            while end < length:
+                if sql[end] == char:
+                    if end + 1 < length and sql[end + 1] == char:
+                        end += 2
+                        continue
+                    break
+                end += 1
+            token = sql[index:end + 1]
+            index = end + 1
+        else:
+            token = char.lower()
+            index += 1
+
+        if pending_space and tokens:
+            tokens.append(' ')
+        pending_space = False
+        tokens.append(token)
+
+    normalized = ''.join(tokens).strip()
+    while normalized.endswith(';'):
+        normalized = normalized[:-1].rstrip()
+    return normalized
+
+
+def mask_literals(normalized_sql: str) -> str:
+    """Substitui literais de texto por '?' em uma consulta já normalizada."""
+    return _QUOTED_LITERAL.sub("'?'", normalized_sql)
+
+
+def mask_quoted(sql: str) -> str:
+    """
+    Normaliza a consulta e troca literais e identificadores entre aspas por
+    marcadores, deixando só a estrutura do comando (palavras-chave, operadores,
+    separadores) para inspeção.
+    """
+    return _QUOTED_IDENTIFIER.sub('""', mask_literals(normalize_sql(sql)))
+
+
+def _unquote(identifier: str) -> str:
+    if identifier.startswith('"') and identifier.endswith('"'):
+        return identifier[1:-1].replace('""', '"')
+    return identifier
+
+
+def _from_list_items(masked: str, start: int) -> List[str]:
+    """Itens separados por vírgula no nível de parênteses do FROM que começa em `start`."""
+    items = []
+    depth = 0
+    item_start = start
+    index = start
+    length = len(masked)
+
+    while index < length:
+        char = masked[index]
+        if char == '"':
+            end = masked.find('"', index + 1)
+            index = length if end < 0 else end + 1
+            continue
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            if depth == 0:
+                break
+            depth -= 1
+        elif depth == 0:
+            if char == ';':
+                break
+            if char == ',':
+                items.append(masked[item_start:index])
+                item_start = index + 1
+            elif (
+                not (masked[index - 1].isalnum() or masked[index - 1] in '_$')
+                and _FROM_LIST_END.match(masked, index)
+            ):
+                break
+        index += 1
+
+    items.append(masked[item_start:index])
+    return items
+
+
+def extract_tables(sql: str) -> Set[str]:
+    """
+    Extrai os nomes das tabelas referenciadas em cláusulas FROM/JOIN,
+    incluindo todos os itens de um FROM separado por vírgulas
+    (FROM a, b). Nomes de CTEs e chamadas de função não são considerados tabelas; o
+    schema (ex.: public.) é descartado.
+
+    Args:
+        sql: Consulta SQL (normalizada ou não)
+
+    Returns:
+        Conjunto com os nomes das tabelas
+    """
+    masked = _FROM_IN_FUNCTION.sub('?', mask_literals(normalize_sql(sql)))
+    cte_names = {_unquote(name) for name in _CTE_NAME.findall(masked)}
+
+    references = _JOIN_REFERENCE.findall(masked)
+    for keyword in _FROM_KEYWORD.finditer(masked):
+        for item in _from_list_items(masked, keyword.end()):
+            match = _FROM_ITEM.match(item)
+            if match:
+                references.append(match.group(1))
+
+    tables = set()
+    for reference in references:
+        parts = re.findall(_IDENTIFIER, reference)
+        name = _unquote(parts[-1]) if parts else _unquote(reference)
+        if name not in cte_names and name not in ('select', 'lateral'):
+            tables.add(name)
+    return tables
+
+
+def is_cacheable_query(sql: str) -> bool:
+    """
+    Verifica se o resultado da consulta pode ser reaproveitado: apenas leitura
+    (SELECT/WITH) e sem funções voláteis como now() ou random().
+
+    Args:
+        sql: Consulta SQL
+
+    Returns:
+        bool: True se a consulta for somente leitura e determinística
+    """
+    masked = mask_quoted(sql)
+    if not masked.startswith(('select', 'with')):
+        return False
+    if _WRITE_KEYWORDS.search(masked):
+        return False
+    if _VOLATILE_FUNCTIONS.search(masked):
+        return False
+    return True
@@ -0,0 +1,279 @@
+import hashlib
+import json
+import mmap
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+BUNDLE_MAGIC = b"CEMIGDD"
+BUNDLE_FORMAT_VERSION = 2
+
+
+class DictionaryBundleError(Exception):
+    """Erro levantado quando o arquivo do pacote de dicionários é inválido."""
+
+
+class DictionaryBundle:
+    """
+    Pacote pré-compilado com o markdown de todos os dicionários de dados.
+
+    Layout do arquivo:
+        linha 1: assinatura + versão do formato (ex.: b"CEMIGDD2")
+        linha 2: cabeçalho JSON com o índice (tabela -> PDF -> offset/tamanho
+                 do markdown e do índice de campos)
+        resto:   documentos markdown e índices de campos (JSON) em UTF-8, concatenados
+
+    O arquivo é mapeado em memória (mmap) e só o trecho do documento pedido é
+    decodificado, então abrir o pacote não exige ler todos os documentos.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Abre o pacote e lê seu índice.
+
+        Args:
+            path: Caminho do arquivo gerado por build_dictionary_bundle
+
+        Raises:
+            DictionaryBundleError: Se o arquivo não for um pacote válido
+        """
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:
+            self._file.close()
+            raise DictionaryBundleError(f"Pacote vazio: {self.path}") from e
+
+        magic_end = self._mmap.find(b"\n")
+        expected = BUNDLE_MAGIC + str(BUNDLE_FORMAT_VERSION).encode()
+        if magic_end < 0 or self._mmap[:magic_end] != expected:
+            self.close()
+            raise DictionaryBundleError(f"Formato de pacote não suportado: {self.path}")
+
+        header_end = self._mmap.find(b"\n", magic_end + 1)
+        if header_end < 0:
+            self.close()
+            raise DictionaryBundleError(f"Cabeçalho do pacote corrompido: {self.path}")
+
+        self.header: Dict[str, Any] = json.loads(self._mmap[magic_end + 1:header_end])
+        self._body_start = header_end + 1
+
+    @property
+    def tables(self) -> Dict[str, str]:
+        """Mapeamento tabela -> arquivo PDF usado na geração do pacote."""
+        return self.header.get("tables", {})
+
+    @property
+    def sources(self) -> Dict[str, str]:
+        """Hash SHA-256 de cada PDF de origem."""
+        return self.header.get("sources", {})
+
+    def get_document(self, pdf_file: str) -> Optional[str]:
+        """
+        Retorna o markdown renderizado de um PDF.
+
+        Args:
+            pdf_file: Nome do arquivo PDF
+
+        Returns:
+            Markdown do documento ou None se o PDF não estiver no pacote
+        """
+        location = self.header.get("documents", {}).get(pdf_file)
+        if location is None:
+            return None
+        offset, length = location
+        start = self._body_start + offset
+        return self._mmap[start:start + length].decode("utf-8")
+
+    def get_fields(self, pdf_file: str) -> Optional[List[Dict[str, str]]]:
+        """
+        Retorna o índice de campos de um PDF (nome, tipo, tamanho e descrição).
+
+        Args:
+            pdf_file: Nome do arquivo PDF
+
+        Returns:
+            Lista de campos ou None se o PDF não estiver no pacote
+        """
+        location = self.header.get("fields", {}).get(pdf_file)
+        if location is None:
+            return None
+        offset, length = location
+        start = self._body_start + offset
+        return json.loads(self._mmap[start:start + length].decode("utf-8"))
+
+    def get(self, table_name: str) -> Optional[str]:
+        """
+        Retorna o markdown do dicionário de uma tabela.
+
+        Args:
+            table_name: Nome da tabela no banco
+
+        Returns:
+            Markdown do dicionário ou None se a tabela não estiver no pacote
+        """
+        pdf_file = self.tables.get(table_name)
+        if pdf_file is None:
+            return None
+        return self.get_document(pdf_file)
+
+    def close(self):
+        """Libera o mapeamento de memória e o arquivo."""
+        if getattr(self, "_mmap", None) is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+
+def file_sha256(path: Path) -> str:
+    """Calcula o SHA-256 de um arquivo."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_bundle(
+    output_path: Path,
+    documents: Dict[str, str],
+    tables: Dict[str, str],
+    sources: Dict[str, str],
+    fields: Optional[Dict[str, List[Dict[str, str]]]] = None
+) -> Path:
+    """
+    Grava um pacote de dicionários de forma atômica.
+
+    Args:
+        output_path: Caminho do arquivo de saída
+        documents: Arquivo PDF -> markdown renderizado
+        tables: Tabela -> arquivo PDF
+        sources: Arquivo PDF -> hash SHA-256 do PDF
+        fields: Arquivo PDF -> índice de campos extraído do PDF
+
+    Returns:
+        Path do pacote gravado
+    """
+    output_path = Path(output_path)
+    body = bytearray()
+    index = {}
+    fields_index = {}
+    for pdf_file in sorted(documents):
+        encoded = documents[pdf_file].encode("utf-8")
+        index[pdf_file] = [len(body), len(encoded)]
+        body.extend(encoded)
+        if fields and pdf_file in fields:
+            encoded = json.dumps(fields[pdf_file], ensure_ascii=False).encode("utf-8")
+            fields_index[pdf_file] = [len(body), len(encoded)]
+            body.extend(encoded)
+
+    header = {
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "built_at": datetime.now().isoformat(timespec="seconds"),
+        "sources": sources,
+        "tables": {table: pdf for table, pdf in tables.items() if pdf in documents},
+        "documents": index,
+        "fields": fields_index,
+    }
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = output_path.with_suffix(output_path.suffix + ".tmp")
+    with open(temp_path, "wb") as file:
+        file.write(BUNDLE_MAGIC + str(BUNDLE_FORMAT_VERSION).encode() + b"\n")
+        file.write(json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n")
+        file.write(body)
+    os.replace(temp_path, output_path)
+    return output_path
+
+
+def build_dictionary_bundle(
+    pdf_dir: Path,
+    output_path: Path,
+    tables: Dict[str, str],
+    force: bool = False
+) -> Dict[str, Any]:
+    """
+    Converte todos os PDFs de `pdf_dir` para markdown e grava o pacote indexado.
+
+    Se o pacote existente já foi gerado a partir dos mesmos PDFs e do mesmo
+    mapeamento, nada é refeito (a menos que `force=True`).
+
+    Args:
+        pdf_dir: Diretório com os PDFs dos dicionários de dados
+        output_path: Caminho do pacote gerado
+        tables: Mapeamento tabela -> arquivo PDF (mapping_tables.yaml)
+        force: Regera o pacote mesmo sem mudanças nos PDFs
+
+    Returns:
+        Dict: Resumo da geração (documentos, tabelas, erros, se foi regerado)
+    """
+    from .get_schema_dictionary import read_pdf_document
+
+    pdf_dir = Path(pdf_dir)
+    output_path = Path(output_path)
+    pdf_files = sorted(p for p in pdf_dir.glob("*.pdf") if p.is_file())
+    sources = {pdf.name: file_sha256(pdf) for pdf in pdf_files}
+
+    if not force and output_path.exists():
+        try:
+            existing = DictionaryBundle(output_path)
+            unchanged = existing.sources == sources and existing.tables == {
+                table: pdf for table, pdf in tables.items() if pdf in sources
+            }
+            existing.close()
+            if unchanged:
+                return {"rebuilt": False, "documents": len(sources), "tables": len(tables), "errors": {}}
+        except (DictionaryBundleError, ValueError):
+            pass
+
+    documents = {}
+    fields = {}
+    errors = {}
+    for pdf in pdf_files:
+        markdown, pdf_fields = read_pdf_document(str(pdf))
+        if pdf_fields is None:
+            errors[pdf.name] = markdown
+            continue
+        documents[pdf.name] = markdown
+        fields[pdf.name] = pdf_fields
+
+    missing = sorted({pdf for pdf in tables.values() if pdf not in sources})
+    for pdf_file in missing:
+        errors[pdf_file] = "Arquivo PDF não encontrado no diretório de origem"
+
+    write_bundle(output_path, documents, tables, {name: sources[name] for name in documents}, fields)
+    return {"rebuilt": True, "documents": len(documents), "tables": len(tables), "errors": errors}
+
+
+_bundle: Optional[DictionaryBundle] = None
+_bundle_loaded = False
+_bundle_lock = threading.Lock()
+
+
+def get_bundle(path: Path) -> Optional[DictionaryBundle]:
+    """
+    Abre o pacote na primeira chamada e o reutiliza nas seguintes.
+
+    Args:
+        path: Caminho do pacote
+
+    Returns:
+        DictionaryBundle ou None se o pacote não existir ou for inválido
+    """
+    global _bundle, _bundle_loaded
+    if _bundle_loaded:
+        return _bundle
+
+    with _bundle_lock:
+        if not _bundle_loaded:
+            try:
+                if Path(path).exists():
+                    _bundle = DictionaryBundle(path)
+            except (DictionaryBundleError, OSError, ValueError) as e:
+                print(f"Aviso: pacote de dicionários ignorado: {str(e)}")
+                _bundle = None
+            _bundle_loaded = True
+    return _bundle
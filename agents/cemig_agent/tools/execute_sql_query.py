@@ -1,40 +1,205 @@
-from .connector.database_connector import PostgreSQLConnector
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional
+from .connector.materialized_views import AggregateRewriter, load_view_definitions
+from .connector.query_cache import QueryResultCache
+from .connector.query_guard import QueryGuard, QueryRejectedError, QueryTimeoutError
+from .connector.query_stats import record_query_stats
+from .result_format import RESULT_FORMATS, format_result
 from ..common.config import Config
 
-def execute_sql_query(query_sql: str): 
+if TYPE_CHECKING:
+    from .connector.database_connector import PostgreSQLConnector
+
+query_cache = QueryResultCache(
+    maxsize=Config.QUERY_CACHE_SIZE,
+    ttl=Config.QUERY_CACHE_TTL,
+    max_bytes=Config.QUERY_CACHE_MAX_BYTES,
+    version_check_interval=Config.QUERY_CACHE_VERSION_CHECK_INTERVAL,
+    enabled=Config.QUERY_CACHE_ENABLED
+)
+
+query_guard = QueryGuard(
+    max_cost=Config.QUERY_GUARD_MAX_COST,
+    max_rows=Config.QUERY_GUARD_MAX_ROWS,
+    auto_limit=Config.QUERY_GUARD_AUTO_LIMIT,
+    enabled=Config.QUERY_GUARD_ENABLED
+)
+
+_aggregate_rewriter: Optional[AggregateRewriter] = None
+_aggregate_rewriter_lock = threading.Lock()
+
+def get_aggregate_rewriter() -> AggregateRewriter:
+    """Retorna o rewriter, lendo as definições das visões (yaml) na primeira consulta."""
+    global _aggregate_rewriter
+    if _aggregate_rewriter is None:
+        with _aggregate_rewriter_lock:
+            if _aggregate_rewriter is None:
+                _aggregate_rewriter = AggregateRewriter(
+                    load_view_definitions(Config.MATERIALIZED_VIEWS_FILE),
+                    enabled=Config.AGGREGATE_REWRITE_ENABLED,
+                    check_interval=Config.AGGREGATE_REWRITE_CHECK_INTERVAL
+                )
+    return _aggregate_rewriter
+
+def _check_with_rewrite(db: "PostgreSQLConnector", query_sql: str):
+    """
+    Verifica a consulta no QueryGuard, tentando antes respondê-la a partir de uma
+    visão materializada pré-agregada. Se a consulta reescrita falhar no EXPLAIN
+    (visão ausente, coluna inexistente), segue com a consulta original.
+    """
+    aggregate_rewriter = get_aggregate_rewriter()
+    if aggregate_rewriter.refresh_due():
+        aggregate_rewriter.refresh_available(db)
+
+    reescrita = aggregate_rewriter.rewrite(query_sql)
+    if reescrita is not None:
+        try:
+            if not query_guard.enabled:
+                db.explain(reescrita.query)
+            return query_guard.check(db, reescrita.query)
+        except QueryRejectedError:
+            raise
+        except Exception:
+            db.rollback()
+            aggregate_rewriter.record_fallback()
+
+    return query_guard.check(db, query_sql)
+
+def _record_stats(query_sql: str, inicio: float, row_count: Optional[int] = None, status: str = "ok"):
+    """Registra a execução (ou resposta do cache) no QUERY_STATS_DB, também usado pelo index advisor."""
+    record_query_stats(
+        Config.QUERY_STATS_DB,
+        query_sql,
+        (time.perf_counter() - inicio) * 1000,
+        row_count,
+        status=status,
+        max_entries=Config.QUERY_STATS_MAX_ENTRIES
+    )
+
+def _build_response(resultado: Dict[str, Any], result_format: str):
+    """Monta a resposta da ferramenta a partir do resultado do execute_query_bounded."""
+    if result_format == "records":
+        linhas = resultado["rows"]
+    else:
+        linhas = format_result(resultado["columns"], resultado["rows"], result_format)
+
+    if not resultado["truncated"]:
+        return linhas
+
+    aviso = (
+        f"Resultado truncado em {resultado['row_count']} linhas "
+        f"(limite de {Config.QUERY_MAX_ROWS} linhas / {Config.QUERY_MAX_BYTES} bytes). "
+        "Refine a consulta com filtros, agregações ou LIMIT."
+    )
+
+    if isinstance(linhas, str):
+        return (
+            f"{linhas}\n\n{aviso} "
+            f"Total estimado de linhas: {resultado['estimated_total_rows']}"
+        )
+
+    if isinstance(linhas, dict):
+        truncado = dict(linhas)
+    else:
+        truncado = {"rows": linhas}
+
+    truncado.update({
+        "row_count": resultado["row_count"],
+        "truncated": True,
+        "estimated_total_rows": resultado["estimated_total_rows"],
+        "aviso": aviso,
+    })
+    return truncado
+
+def execute_sql_query(query_sql: str, result_format: str = "records"): 
     """
     Executa uma consulta SQL em um banco de dados PostgreSQL.
 
     Parâmetros:
     - query_sql (str): Consulta SQL a ser executada. Deve ser uma string completa e válida em SQL.
+    - result_format (str): Formato do resultado: "records" (lista de dicionários, padrão),
+      "columnar" (nomes das colunas uma vez + linhas como listas), "csv" ou "markdown".
+      Prefira "columnar" ou "markdown" para resultados com muitas colunas ou linhas.
 
     Retorno:
     - Resultado da execução da consulta SQL, que pode ser uma lista de dicionários ou uma mensagem de erro.
+    - Se o resultado for grande demais, retorna um dicionário com as primeiras linhas em "rows",
+      "truncated": true e o total estimado em "estimated_total_rows". Nesse caso, refine a consulta
+      com filtros, agregações ou LIMIT.
     """
+    if result_format not in RESULT_FORMATS:
+        return f"Erro: formato de resultado inválido '{result_format}'. Use um de: {', '.join(RESULT_FORMATS)}"
+
+    as_dicts = result_format == "records"
+    cacheable = query_cache.is_cacheable(query_sql)
+
+    if cacheable and not query_cache.version_check_due():
+        inicio = time.perf_counter()
+        resultado = query_cache.get(query_sql, variant=as_dicts)
+        if resultado is not None:
+            _record_stats(query_sql, inicio, resultado["row_count"], status="cached")
+            return _build_response(resultado, result_format)
     
-    db_config = {
-        "host": Config.POSTGRES_HOST,
-        "database": Config.POSTGRES_DATABASE,
-        "user": Config.POSTGRES_USER,
-        "password": Config.POSTGRES_PASSWORD,
-        "port": Config.POSTGRES_PORT
-    }
-
-    #print(f'DB Config: {db_config}')
+    # importado sob demanda para não carregar o psycopg2 no import do agente
+    from .connector.database_connector import PostgreSQLConnector
+
+    db_config = Config.get_db_config()
+
     db = PostgreSQLConnector(**db_config)
     
     try:
         if db.connect():
-            resultados = db.execute_query(query_sql)
-            
-            #print(f'Resultado do banco de dados: {resultados}')
-            return resultados
+            if not PostgreSQLConnector.is_select_query(query_sql):
+                inicio = time.perf_counter()
+                try:
+                    resultado = db.execute_query(query_sql, statement_timeout_ms=Config.QUERY_STATEMENT_TIMEOUT_MS)
+                except QueryTimeoutError:
+                    _record_stats(query_sql, inicio, status="timeout")
+                    raise
+                _record_stats(query_sql, inicio, resultado if isinstance(resultado, int) else None)
+                return resultado
+
+            if cacheable:
+                inicio = time.perf_counter()
+                if query_cache.version_check_due():
+                    query_cache.sync_table_versions(db.get_table_versions())
+                resultado = query_cache.get(query_sql, variant=as_dicts)
+                if resultado is not None:
+                    _record_stats(query_sql, inicio, resultado["row_count"], status="cached")
+                    return _build_response(resultado, result_format)
+
+            decisao = _check_with_rewrite(db, query_sql)
+
+            inicio = time.perf_counter()
+            try:
+                resultado = db.execute_query_bounded(
+                    decisao.query,
+                    max_rows=Config.QUERY_MAX_ROWS,
+                    max_bytes=Config.QUERY_MAX_BYTES,
+                    batch_size=Config.QUERY_FETCH_BATCH_SIZE,
+                    as_dicts=as_dicts,
+                    statement_timeout_ms=Config.QUERY_STATEMENT_TIMEOUT_MS,
+                    row_estimate=decisao.estimated_rows
+                )
+            except QueryTimeoutError:
+                _record_stats(query_sql, inicio, status="timeout")
+                raise
+
+            _record_stats(query_sql, inicio, resultado["row_count"])
+
+            if cacheable:
+                query_cache.set(query_sql, resultado, variant=as_dicts)
+
+            return _build_response(resultado, result_format)
         else:
             return "Erro: Não foi possível conectar ao banco de dados"
             
+    except (QueryRejectedError, QueryTimeoutError) as e:
+        return f"Erro: {str(e)}"
+
     except Exception as e:
         return f"Erro ao executar consulta SQL: {str(e)}"
         
     finally:
         db.close()
-
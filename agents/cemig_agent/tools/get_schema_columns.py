@@ -0,0 +1,106 @@
+import re
+import unicodedata
+from typing import Dict, List, Set
+
+from ..common.config import Config
+from .get_schema_dictionary import (
+    get_dictionary_fields,
+    get_schema_dictionary,
+    get_table_mapping,
+)
+
+STOPWORDS = {
+    "a", "as", "o", "os", "de", "da", "das", "do", "dos", "e", "em", "na", "nas", "no", "nos",
+    "um", "uma", "por", "para", "com", "sem", "que", "qual", "quais", "quantos", "quantas",
+    "cada", "mais", "menos", "entre", "sobre", "ao", "aos", "se", "ou", "foi", "foram",
+    "ser", "sao", "tem", "ter", "mostre", "liste", "quero", "saber", "total", "valor",
+}
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in text if not unicodedata.combining(char)).lower()
+
+
+def _tokenize(text: str) -> Set[str]:
+    text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)
+    tokens = re.findall(r'[a-z0-9]+', _normalize(text))
+    # siglas de duas letras (UF, TE, kW) são filtros comuns e precisam ser mantidas
+    return {token for token in tokens if len(token) >= 2 and token not in STOPWORDS}
+
+
+def _tokens_match(a: str, b: str) -> bool:
+    if a == b:
+        return True
+    shorter, longer = sorted((a, b), key=len)
+    return len(shorter) >= 4 and longer.startswith(shorter)
+
+
+def _score_field(field: Dict[str, str], keywords: Set[str]) -> int:
+    name_tokens = _tokenize(field["name"])
+    description_tokens = _tokenize(field["description"])
+    score = 0
+    for keyword in keywords:
+        if any(_tokens_match(keyword, token) for token in name_tokens):
+            score += 3
+        if any(_tokens_match(keyword, token) for token in description_tokens):
+            score += 1
+    return score
+
+
+def _format_fields(fields: List[Dict[str, str]]) -> str:
+    lines = [
+        "| Nome do Campo | Tipo do dado | Tamanho do Campo | Descrição |",
+        "| --- | --- | --- | --- |",
+    ]
+    for field in fields:
+        cells = [field[key].replace("|", "\\|") for key in ("name", "type", "size", "description")]
+        lines.append("| " + " | ".join(cells) + " |")
+    return "\n".join(lines)
+
+
+def get_schema_columns(table_name: str, columns: str, question: str) -> str:
+    """
+    Obtém a documentação apenas das colunas relevantes de uma tabela, em vez do dicionário completo.
+
+    Parâmetros:
+    - table_name (str): Nome da tabela no banco.
+    - columns (str): Nomes das colunas desejadas separados por vírgula (ex.: "SigUF, NomMunicipio"). Use "" para buscar pela pergunta.
+    - question (str): Pergunta do usuário ou palavras-chave, usada para escolher as colunas mais relevantes quando "columns" estiver vazio.
+
+    Retorno:
+    - Tabela em markdown com nome, tipo, tamanho e descrição das colunas selecionadas, ou uma mensagem de erro.
+    """
+    if table_name not in get_table_mapping():
+        return f"# Erro\n\nTabela não encontrada: {table_name}"
+
+    fields = get_dictionary_fields(table_name)
+    if not fields:
+        return get_schema_dictionary(table_name)
+
+    requested = [column.strip().strip('"') for column in (columns or "").split(",") if column.strip()]
+    if requested:
+        by_name = {field["name"].lower(): field for field in fields}
+        selected = [by_name[name.lower()] for name in requested if name.lower() in by_name]
+        missing = [name for name in requested if name.lower() not in by_name]
+
+        result = _format_fields(selected) if selected else ""
+        if missing:
+            result += f"\n\nColunas não encontradas no dicionário: {', '.join(missing)}"
+        return result.strip()
+
+    keywords = _tokenize(question or "")
+    if not keywords:
+        return _format_fields(fields[:Config.DICTIONARY_TOP_K_COLUMNS])
+
+    scored = [(score, position, field) for position, field in enumerate(fields)
+              if (score := _score_field(field, keywords)) > 0]
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    selected = [field for _, _, field in scored[:Config.DICTIONARY_TOP_K_COLUMNS]]
+
+    if not selected:
+        return (
+            "Nenhuma coluna corresponde às palavras-chave informadas.\n\n"
+            + _format_fields(fields[:Config.DICTIONARY_TOP_K_COLUMNS])
+        )
+    return _format_fields(selected)
@@ -1,29 +1,30 @@
 from typing import List, Dict, Any, Optional
 from ..common.config import Config
 
-from .connector.database_connector import PostgreSQLConnector
+from .connector.schema_cache import SchemaCache
+
+schema_cache = SchemaCache(ttl=Config.SCHEMA_CACHE_TTL)
 
 def get_schema_db():
     """Retorna o esquema do banco de dados PostgreSQL."""
 
-    db_config = {
-        "host": Config.POSTGRES_HOST,
-        "database": Config.POSTGRES_DATABASE,
-        "user": Config.POSTGRES_USER,
-        "password": Config.POSTGRES_PASSWORD,
-        "port": Config.POSTGRES_PORT
-    }
+    cached_schema = schema_cache.get_fresh()
+    if cached_schema is not None:
+        return cached_schema
+
+    # importado sob demanda para não carregar o psycopg2 no import do agente
+    from .connector.database_connector import PostgreSQLConnector
+
+    db_config = Config.get_db_config()
 
     db = PostgreSQLConnector(**db_config)
 
     try:
         if db.connect():
-            shema = db.get_tables_and_columns()
-            return str(shema) 
+            return schema_cache.refresh(db)
         else:
             return "Erro ao conectar ao banco de dados."
     except Exception as e:
         return f"Erro ao obter o esquema do banco de dados: {str(e)}"
-    
-    
-    
\ No newline at end of file
+    finally:
+        db.close()
\ No newline at end of file
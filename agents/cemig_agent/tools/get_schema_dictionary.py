@@ -1,11 +1,14 @@
+import json
 import os
 import re
 import tempfile
-from google.cloud import storage
-import PyPDF2
-from typing import Dict, List, Tuple
-import yaml
+import threading
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
+from ..common.cache import LRUCache
+from ..common.config import Config
+from ..common.telemetry import telemetry
+from .dictionary_bundle import get_bundle
 
 BUCKET_NAME = "application-case-engenharia"
 PATH_PREFIX = "dicionario_de_dados/"
@@ -14,68 +17,253 @@ BASE_DIR = Path(__file__).parent
 UTILS_DIR = BASE_DIR / "utils"
 MAPPING_FILE = UTILS_DIR / "mapping_tables.yaml"
 
-try:
-    if MAPPING_FILE.exists():
-        with open(MAPPING_FILE, "r", encoding="utf-8") as f:
-            tabela_para_arquivo = yaml.safe_load(f) or {}
-    else:
-        tabela_para_arquivo = {}
-except Exception as e:
-    tabela_para_arquivo = {}
+dictionary_cache = LRUCache(maxsize=Config.DICTIONARY_CACHE_SIZE)
+fields_cache = LRUCache(maxsize=Config.DICTIONARY_CACHE_SIZE)
+_storage_client = None
+_table_mapping = None
+_table_mapping_lock = threading.Lock()
+
+
+def get_table_mapping() -> Dict[str, str]:
+    """
+    Retorna o mapeamento tabela -> PDF do dicionário (mapping_tables.yaml).
+
+    O arquivo é lido uma única vez, na primeira chamada, e não no import do
+    módulo (o yaml só é carregado quando uma ferramenta precisa dele).
+    """
+    global _table_mapping
+    if _table_mapping is None:
+        with _table_mapping_lock:
+            if _table_mapping is None:
+                try:
+                    import yaml
+
+                    with open(MAPPING_FILE, "r", encoding="utf-8") as f:
+                        _table_mapping = yaml.safe_load(f) or {}
+                except Exception:
+                    _table_mapping = {}
+    return _table_mapping
+
+
+def _get_bucket():
+    """Retorna o bucket dos dicionários, reutilizando o cliente do GCS entre chamadas."""
+    global _storage_client
+    if _storage_client is None:
+        # importado sob demanda: google.cloud.storage pesa no cold start e só é
+        # necessário quando o dicionário não está em cache nem no pacote
+        from google.cloud import storage
+
+        _storage_client = storage.Client()
+    return _storage_client.bucket(BUCKET_NAME)
+
+
+def _disk_cache_path(pdf_file: str, version: str) -> Path:
+    """Caminho do markdown renderizado em disco para uma versão do PDF."""
+    safe_version = re.sub(r'[^A-Za-z0-9_-]', '', str(version))
+    return Path(Config.DICTIONARY_CACHE_DIR) / f"{Path(pdf_file).stem}-{safe_version}.md"
+
+
+def _read_disk_cache(pdf_file: str, version: str) -> Optional[Tuple[str, List[Dict[str, str]]]]:
+    cache_path = _disk_cache_path(pdf_file, version)
+    try:
+        markdown = cache_path.read_text(encoding="utf-8")
+        fields = json.loads(cache_path.with_suffix(".fields.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return markdown, fields
+
+
+def _write_disk_cache(pdf_file: str, version: str, markdown: str, fields: List[Dict[str, str]]):
+    cache_path = _disk_cache_path(pdf_file, version)
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        # o índice de campos é gravado antes: o markdown em disco indica que os dois estão completos
+        for path, content in (
+            (cache_path.with_suffix(".fields.json"), json.dumps(fields, ensure_ascii=False)),
+            (cache_path, markdown),
+        ):
+            temp_cache = path.with_suffix(f".{os.getpid()}.tmp")
+            temp_cache.write_text(content, encoding="utf-8")
+            os.replace(temp_cache, path)
+    except OSError as e:
+        print(f"Aviso: não foi possível gravar o cache do dicionário: {str(e)}")
+
+
+def _render_from_gcs(pdf_file: str) -> Tuple[str, Optional[List[Dict[str, str]]]]:
+    """
+    Renderiza o dicionário a partir do GCS, usando o cache em disco por geração do blob.
+
+    Returns:
+        (markdown, campos); em caso de erro, (mensagem "# Erro", None)
+    """
+    blob = _get_bucket().get_blob(PATH_PREFIX + pdf_file)
+    
+    if blob is None:
+        return f"# Erro\n\nArquivo PDF não encontrado: {pdf_file}", None
+
+    version = blob.generation or blob.etag
+    cached = _read_disk_cache(pdf_file, version)
+    if cached is not None:
+        return cached
+
+    temp_path = None
+    try:
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as temp_file:
+            temp_path = temp_file.name
+        
+        with telemetry.span("gcs.download", file=pdf_file, bytes=blob.size):
+            blob.download_to_filename(temp_path)
+
+        markdown, fields = read_pdf_document(temp_path)
+    finally:
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    if fields is not None:
+        _write_disk_cache(pdf_file, version, markdown, fields)
+    return markdown, fields
 
 
 def get_schema_dictionary(table_name: str) -> str:
     """Obtém o dicionário de dados para uma tabela específica."""
-    pdf_file = tabela_para_arquivo.get(table_name)
+    pdf_file = get_table_mapping().get(table_name)
     
     if not pdf_file:
         return f"# Erro\n\nTabela não encontrada: {table_name}"
+
+    cached_markdown = dictionary_cache.get(pdf_file)
+    if cached_markdown is not None:
+        telemetry.increment("dictionary.lookups", source="memory")
+        return cached_markdown
+
+    bundle = get_bundle(Config.DICTIONARY_BUNDLE_PATH)
+    if bundle is not None:
+        markdown = bundle.get_document(pdf_file)
+        if markdown is not None:
+            telemetry.increment("dictionary.lookups", source="bundle")
+            dictionary_cache.set(pdf_file, markdown)
+            return markdown
     
+    telemetry.increment("dictionary.lookups", source="gcs")
     try:
-        client = storage.Client()
-        bucket = client.bucket(BUCKET_NAME)
-        blob = bucket.blob(PATH_PREFIX + pdf_file)
-        
-        if not blob.exists():
-            return f"# Erro\n\nArquivo PDF não encontrado: {pdf_file}"
-        
-        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as temp_file:
-            temp_path = temp_file.name
-        
-        blob.download_to_filename(temp_path)
-
-        return read_pdf_to_markdown(temp_path)
+        markdown, fields = _render_from_gcs(pdf_file)
     except Exception as e:
+        telemetry.increment("dictionary.errors")
         return f"# Erro\n\nErro ao processar o PDF: {str(e)}"
-    finally:
-        if 'temp_path' in locals() and os.path.exists(temp_path):
-            os.remove(temp_path)
 
-def read_pdf_to_markdown(pdf_path: str) -> str:
+    if fields is not None:
+        dictionary_cache.set(pdf_file, markdown)
+        fields_cache.set(pdf_file, fields)
+    return markdown
+
+
+def get_dictionary_fields(table_name: str) -> List[Dict[str, str]]:
+    """
+    Retorna o índice estruturado de campos do dicionário de uma tabela.
+
+    O índice é extraído das linhas da tabela de campos do PDF (extract_table_row)
+    e guardado junto do markdown no pacote e no cache em disco.
+
+    Returns:
+        Lista de campos (nome, tipo, tamanho, descrição); vazia se o dicionário não estiver disponível
+    """
+    pdf_file = get_table_mapping().get(table_name)
+    if not pdf_file:
+        return []
+
+    fields = fields_cache.get(pdf_file)
+    if fields is not None:
+        return fields
+
+    bundle = get_bundle(Config.DICTIONARY_BUNDLE_PATH)
+    if bundle is not None:
+        fields = bundle.get_fields(pdf_file)
+
+    if fields is None:
+        try:
+            markdown, fields = _render_from_gcs(pdf_file)
+        except Exception:
+            telemetry.increment("dictionary.errors")
+            return []
+        if fields is None:
+            return []
+        dictionary_cache.set(pdf_file, markdown)
+
+    fields_cache.set(pdf_file, fields)
+    return fields
+
+
+def warm_dictionary_cache() -> Dict[str, bool]:
+    """
+    Renderiza antecipadamente todos os dicionários listados em mapping_tables.yaml.
+
+    Returns:
+        Dict: Arquivo PDF -> True se foi renderizado e armazenado em cache
+    """
+    results = {}
+    for table_name, pdf_file in get_table_mapping().items():
+        if pdf_file in results:
+            continue
+        markdown = get_schema_dictionary(table_name)
+        results[pdf_file] = not markdown.startswith("# Erro")
+    return results
+
+def read_pdf_document(pdf_path: str) -> Tuple[str, Optional[List[Dict[str, str]]]]:
+    """
+    Lê o PDF do dicionário e retorna o markdown renderizado e o índice de campos.
+
+    Returns:
+        (markdown, campos); em caso de erro, (mensagem "# Erro", None)
+    """
+    import PyPDF2
+
     try:
         with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            full_text = ""
-            
-            for page in pdf_reader.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    full_text += page_text + "\n"
+            with telemetry.span("pdf.parse") as span:
+                pdf_reader = PyPDF2.PdfReader(file)
+                full_text = ""
+                
+                for page in pdf_reader.pages:
+                    page_text = page.extract_text()
+                    if page_text:
+                        full_text += page_text + "\n"
+                span.set_attribute("pages", len(pdf_reader.pages))
             
-            return process_structured_document(full_text)
+            with telemetry.span("markdown.render", chars=len(full_text)):
+                return parse_structured_document(full_text)
             
     except FileNotFoundError:
-        return f"# Erro\n\nArquivo não encontrado: {pdf_path}"
+        return f"# Erro\n\nArquivo não encontrado: {pdf_path}", None
     except Exception as e:
-        return f"# Erro\n\nErro ao ler o PDF: {str(e)}"
+        return f"# Erro\n\nErro ao ler o PDF: {str(e)}", None
+
+def read_pdf_to_markdown(pdf_path: str) -> str:
+    return read_pdf_document(pdf_path)[0]
 
 def process_structured_document(text: str) -> str:
+    return parse_structured_document(text)[0]
+
+def parse_structured_document(text: str) -> Tuple[str, List[Dict[str, str]]]:
+    """
+    Converte o texto do PDF em markdown e extrai os campos das tabelas.
+
+    Os campos vêm diretamente das linhas de extract_table_row (as mesmas
+    formatadas por format_table), sem depender do markdown gerado.
+
+    Returns:
+        (markdown, lista de campos com nome, tipo, tamanho e descrição)
+    """
     lines = text.split('\n')
     processed_lines = []
+    fields = []
     
     in_table = False
     table_headers = []
     table_rows = []
+
+    def flush_table():
+        processed_lines.extend(format_table(table_headers, table_rows))
+        fields.extend(table_fields(table_headers, table_rows))
     
     for i, line in enumerate(lines):
         line = line.strip()
@@ -84,7 +272,7 @@ def process_structured_document(text: str) -> str:
             
         if is_main_title(line):
             if in_table:
-                processed_lines.extend(format_table(table_headers, table_rows))
+                flush_table()
                 in_table = False
                 table_headers = []
                 table_rows = []
@@ -92,7 +280,7 @@ def process_structured_document(text: str) -> str:
             
         elif is_section_title(line):
             if in_table:
-                processed_lines.extend(format_table(table_headers, table_rows))
+                flush_table()
                 in_table = False
                 table_headers = []
                 table_rows = []
@@ -100,7 +288,7 @@ def process_structured_document(text: str) -> str:
             
         elif is_subsection_title(line):
             if in_table:
-                processed_lines.extend(format_table(table_headers, table_rows))
+                flush_table()
                 in_table = False
                 table_headers = []
                 table_rows = []
@@ -108,7 +296,7 @@ def process_structured_document(text: str) -> str:
             
         elif is_table_header(line, i, lines):
             if in_table:
-                processed_lines.extend(format_table(table_headers, table_rows))
+                flush_table()
             table_headers = extract_table_headers(line, i, lines)
             table_rows = []
             in_table = True
@@ -127,16 +315,16 @@ def process_structured_document(text: str) -> str:
             
         else:
             if in_table:
-                processed_lines.extend(format_table(table_headers, table_rows))
+                flush_table()
                 in_table = False
                 table_headers = []
                 table_rows = []
             processed_lines.append(line)
     
     if in_table:
-        processed_lines.extend(format_table(table_headers, table_rows))
+        flush_table()
     
-    return '\n'.join(processed_lines)
+    return '\n'.join(processed_lines), fields
 
 def is_main_title(text: str) -> bool:
     main_titles = ["Dicionário de Metadados", "Conjunto de Dados", "Metadados", "Detalhamento dos campos"]
@@ -195,6 +383,24 @@ def extract_table_row(line: str, index: int, lines: list) -> list:
     
     return []
 
+def table_fields(headers: list, rows: list) -> List[Dict[str, str]]:
+    """
+    Converte as linhas de extract_table_row de uma tabela de campos em dicionários.
+
+    Só entram as linhas que format_table também renderiza (tabela com cabeçalho
+    de quatro colunas).
+
+    Returns:
+        Lista de dicionários com nome, tipo, tamanho e descrição de cada campo
+    """
+    if len(headers) != 4:
+        return []
+    return [
+        {"name": row[0], "type": row[1], "size": row[2], "description": row[3]}
+        for row in rows
+        if len(row) == 4
+    ]
+
 def format_table(headers: list, rows: list) -> list:
     if not headers or not rows:
         return []
@@ -0,0 +1,74 @@
+import csv
+import io
+from typing import Any, Dict, List, Sequence, Union
+
+RESULT_FORMATS = ("records", "columnar", "csv", "markdown")
+
+
+def _cell_to_text(value: Any) -> str:
+    if value is None:
+        return ""
+    return str(value)
+
+
+def to_columnar(columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> Dict[str, Any]:
+    """
+    Codifica o resultado com os nomes das colunas uma única vez e as linhas como listas.
+
+    Returns:
+        Dict: {"columns": [...], "rows": [[...], ...]}
+    """
+    return {"columns": list(columns), "rows": [list(row) for row in rows]}
+
+
+def to_csv(columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> str:
+    """Renderiza o resultado como CSV com cabeçalho."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    writer.writerows([[_cell_to_text(value) for value in row] for row in rows])
+    return buffer.getvalue()
+
+
+def to_markdown(columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> str:
+    """Renderiza o resultado como tabela markdown."""
+    def escape(value: Any) -> str:
+        return _cell_to_text(value).replace("|", "\\|").replace("\n", " ")
+
+    lines = [
+        "| " + " | ".join(escape(column) for column in columns) + " |",
+        "| " + " | ".join(["---"] * len(columns)) + " |",
+    ]
+    for row in rows:
+        lines.append("| " + " | ".join(escape(value) for value in row) + " |")
+    return "\n".join(lines)
+
+
+def format_result(
+    columns: Sequence[str],
+    rows: Sequence[Sequence[Any]],
+    result_format: str
+) -> Union[List[Dict[str, Any]], Dict[str, Any], str]:
+    """
+    Converte linhas em tuplas para o formato de resposta pedido.
+
+    Args:
+        columns: Nomes das colunas
+        rows: Linhas como tuplas na ordem de `columns`
+        result_format: "records", "columnar", "csv" ou "markdown"
+
+    Returns:
+        Lista de dicionários (records), dicionário colunar ou texto (csv/markdown)
+
+    Raises:
+        ValueError: Se o formato não for suportado
+    """
+    if result_format == "records":
+        return [dict(zip(columns, row)) for row in rows]
+    if result_format == "columnar":
+        return to_columnar(columns, rows)
+    if result_format == "csv":
+        return to_csv(columns, rows)
+    if result_format == "markdown":
+        return to_markdown(columns, rows)
+    raise ValueError(f"Formato de resultado não suportado: {result_format}. Use um de {', '.join(RESULT_FORMATS)}")
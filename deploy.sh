@@ -11,6 +11,9 @@ AGENT_PATH="agents/cemig_agent"
 
 echo "Iniciando deploy da aplicação CEMIG..."
 
+echo "Gerando pacote dos dicionários de dados..."
+python scripts/build_dictionary_bundle.py || exit 1
+
 adk deploy cloud_run \
   --project="$PROJECT" \
   --region="$REGION" \
@@ -0,0 +1,49 @@
+"""
+Mostra os índices recomendados pelo index advisor a partir da carga de
+trabalho configurada em agents/cemig_agent/data/index_config.yaml (consultas
+do benchmark e estatísticas das consultas do agente), sem acessar o banco.
+
+As recomendações aplicadas após cada carga também consideram as estatísticas
+das tabelas (seletividade e correlação física para BRIN).
+
+Uso:
+    python scripts/advise_indexes.py [--config caminho/index_config.yaml] [--stats-db query_stats.db]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from agents.cemig_agent.data.index_advisor import (
+    build_advisor,
+    configured_indexes,
+    load_index_config,
+)
+from agents.cemig_agent.tools.connector.query_stats import read_query_stats_workload
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recomendações de índices a partir da carga de trabalho")
+    parser.add_argument("--config", default=None, help="Arquivo index_config.yaml")
+    parser.add_argument("--stats-db", action="append", default=[], help="Registro de estatísticas extra (QUERY_STATS_DB)")
+    args = parser.parse_args()
+
+    config = load_index_config(args.config)
+    advisor = build_advisor(config)
+    for stats_db in args.stats_db:
+        advisor.add_weighted_queries(read_query_stats_workload(stats_db))
+
+    tables = sorted({table for parsed in advisor.queries for table in parsed.tables} | set(config["tables"]))
+    print(f"{sum(advisor.queries.values())} consultas analisadas\n")
+    for table in tables:
+        specs = configured_indexes(config, table)
+        specs += advisor.recommend(table, existing=[spec.columns for spec in specs])
+        if not specs:
+            continue
+        print(table)
+        for spec in specs:
+            print(f"  {spec.method:<5} ({', '.join(spec.columns)}) - {spec.reason}")
+            print(f"        {spec.create_sql()};")
+        print()
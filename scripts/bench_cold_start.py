@@ -0,0 +1,146 @@
+"""
+Mede o tempo de import do agente (cold start do Cloud Run) com
+`python -X importtime` em processos novos e compara com um orçamento.
+
+Mostra a mediana do tempo de import, os módulos mais pesados e quais
+dependências que deveriam ser carregadas só no primeiro uso das ferramentas
+(psycopg2, google.cloud.storage, PyPDF2, yaml) foram importadas no startup.
+Com --history, cada execução é acrescentada a um arquivo JSON lines para
+acompanhar a evolução.
+
+Uso:
+    python scripts/bench_cold_start.py
+    python scripts/bench_cold_start.py --runs 10 --budget-ms 2500 --history startup_history.jsonl
+    python scripts/bench_cold_start.py --strict
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+
+DEFAULT_MODULE = "agents.cemig_agent.agent"
+DEFERRED_MODULES = ("psycopg2", "google.cloud.storage", "PyPDF2", "yaml")
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+_IMPORT_SNIPPET = (
+    "import time\n"
+    "started = time.perf_counter()\n"
+    "import {module}\n"
+    "print((time.perf_counter() - started) * 1000)\n"
+)
+
+
+def run_import(module, env):
+    """Importa o módulo em um processo novo; retorna (ms, linhas do -X importtime)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _IMPORT_SNIPPET.format(module=module)],
+        cwd=project_root,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Falha ao importar {module}:\n{result.stderr[-2000:]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append({
+                "module": name,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+                "depth": len(indent) // 2,
+            })
+    return float(result.stdout.strip().splitlines()[-1]), entries
+
+
+def heaviest(entries, top, own_prefix):
+    """Módulos de topo (pacotes de terceiros) e módulos do projeto com maior tempo cumulativo."""
+    top_level = {}
+    own = {}
+    for entry in entries:
+        if entry["module"].startswith(own_prefix):
+            own[entry["module"]] = entry["cumulative_ms"]
+        root = entry["module"].split(".")[0]
+        if entry["depth"] == 0 or entry["module"] == root:
+            top_level[root] = max(top_level.get(root, 0.0), entry["cumulative_ms"])
+    by_time = lambda items: sorted(items.items(), key=lambda item: item[1], reverse=True)[:top]
+    return by_time(top_level), by_time(own)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de import do agente (cold start)")
+    parser.add_argument("--module", default=DEFAULT_MODULE, help=f"Módulo importado (padrão: {DEFAULT_MODULE})")
+    parser.add_argument("--runs", type=int, default=5, help="Processos medidos (padrão: 5)")
+    parser.add_argument("--top", type=int, default=15, help="Módulos mais pesados exibidos")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "3000")),
+                        help="Orçamento da mediana do tempo de import (padrão: STARTUP_IMPORT_BUDGET_MS ou 3000)")
+    parser.add_argument("--strict", action="store_true", help="Também falha se alguma dependência adiada for importada")
+    parser.add_argument("--history", default=None, help="Arquivo JSON lines onde o resultado é acrescentado")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env["DICTIONARY_PREWARM"] = "false"
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+
+    # um import descartado para aquecer o cache de bytecode e do sistema de arquivos
+    run_import(args.module, env)
+
+    durations = []
+    entries = []
+    for _ in range(args.runs):
+        duration, entries = run_import(args.module, env)
+        durations.append(duration)
+
+    median = statistics.median(durations)
+    imported = {entry["module"] for entry in entries}
+    deferred_loaded = [module for module in DEFERRED_MODULES if module in imported]
+    top_level, own = heaviest(entries, args.top, args.module.split(".")[0] + ".")
+
+    print(f"Import de {args.module}: mediana {median:.1f} ms | mín {min(durations):.1f} ms | máx {max(durations):.1f} ms ({args.runs} execuções)")
+    print(f"Orçamento: {args.budget_ms:.0f} ms")
+
+    print("\nPacotes mais pesados (cumulativo):")
+    for name, cumulative in top_level:
+        print(f"  {cumulative:9.1f} ms  {name}")
+    print("\nMódulos do projeto (cumulativo):")
+    for name, cumulative in own:
+        print(f"  {cumulative:9.1f} ms  {name}")
+
+    if deferred_loaded:
+        print(f"\nDependências adiadas importadas no startup: {', '.join(deferred_loaded)}")
+    else:
+        print("\nNenhuma dependência adiada foi importada no startup")
+
+    if args.history:
+        record = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "module": args.module,
+            "median_ms": round(median, 1),
+            "runs": args.runs,
+            "budget_ms": args.budget_ms,
+            "deferred_loaded": deferred_loaded,
+            "python": sys.version.split()[0],
+        }
+        with open(args.history, "a", encoding="utf-8") as history_file:
+            history_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        print(f"\nResultado acrescentado a {args.history}")
+
+    failed = median > args.budget_ms or (args.strict and deferred_loaded)
+    if median > args.budget_ms:
+        print(f"\nOrçamento excedido: {median:.1f} ms > {args.budget_ms:.0f} ms")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
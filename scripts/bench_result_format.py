@@ -0,0 +1,72 @@
+"""
+Mede o tamanho das respostas de execute_sql_query em cada formato de
+resultado (records, columnar, csv, markdown) para um resultado largo
+sintético com nomes de colunas no padrão das tabelas da ANEEL.
+
+O número de tokens é aproximado por bytes / 4.
+
+Uso:
+    python scripts/bench_result_format.py
+    python scripts/bench_result_format.py --rows 500 --columns 20
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from agents.cemig_agent.tools.result_format import RESULT_FORMATS, format_result
+
+COLUMN_NAMES = [
+    "DatGeracaoConjuntoDados", "SigAgente", "NumCNPJDistribuidora", "NomAgente", "SigUF",
+    "NomMunicipio", "DscSubGrupoTarifario", "DscModalidadeTarifaria", "DscClasseConsumidor",
+    "DscDetalheConsumidor", "DatInicioVigencia", "DatFimVigencia", "VlrTUSD", "VlrTE",
+    "DscUnidadeTerciaria", "NomPostoTarifario", "DscBaseTarifaria", "DscREH", "SigSolicitacao",
+    "NomDecisao",
+]
+
+
+def generate_result(rows, columns):
+    names = [COLUMN_NAMES[i % len(COLUMN_NAMES)] + ("" if i < len(COLUMN_NAMES) else str(i)) for i in range(columns)]
+    data = []
+    for row in range(rows):
+        values = []
+        for index in range(columns):
+            if index % 4 == 0:
+                values.append(round(row * 1.37 + index, 2))
+            elif index % 4 == 1:
+                values.append(f"2024-{(row % 12) + 1:02d}-01")
+            else:
+                values.append(f"valor {row % 17}")
+        data.append(tuple(values))
+    return names, data
+
+
+def payload_size(result):
+    if isinstance(result, str):
+        return len(result.encode("utf-8"))
+    return len(json.dumps(result, ensure_ascii=False).encode("utf-8"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara o tamanho dos formatos de resultado')
+    parser.add_argument('--rows', type=int, default=200, help='Número de linhas')
+    parser.add_argument('--columns', type=int, default=12, help='Número de colunas')
+    args = parser.parse_args()
+
+    columns, rows = generate_result(args.rows, args.columns)
+    baseline = payload_size(format_result(columns, rows, "records"))
+
+    print(f"Linhas: {args.rows} | Colunas: {args.columns}")
+    for result_format in RESULT_FORMATS:
+        size = payload_size(format_result(columns, rows, result_format))
+        print(
+            f"{result_format:<10} {size:>10} bytes  ~{size // 4:>8} tokens  "
+            f"({(1 - size / baseline) * 100:5.1f}% menor que records)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark da conversão de linhas do PostgreSQLConnector: conversão legada
+(_convert_types recursivo por linha) vs. conversão por coluna (_convert_rows).
+
+Não precisa de banco: gera linhas sintéticas com os tipos retornados pelo
+psycopg2 para NUMERIC, DATE, TIMESTAMP, TEXT e INTEGER.
+
+Uso:
+    python scripts/bench_row_conversion.py
+    python scripts/bench_row_conversion.py --rows 200000 --repeat 5
+"""
+import argparse
+import sys
+import time
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from agents.cemig_agent.tools.connector.database_connector import PostgreSQLConnector
+
+Column = namedtuple("Column", ["name", "type_code"])
+
+DESCRIPTION = [
+    Column("SigUF", 1043),
+    Column("NomMunicipio", 25),
+    Column("QtdSolicitacoes", 23),
+    Column("VlrTarifa", 1700),
+    Column("DatInicioVigencia", 1082),
+    Column("DatGeracaoConjuntoDados", 1114),
+]
+
+
+def generate_rows(count):
+    base_date = date(2020, 1, 1)
+    base_datetime = datetime(2024, 1, 1, 12, 0, 0)
+    rows = []
+    for i in range(count):
+        rows.append((
+            "MG",
+            f"Municipio {i % 853}",
+            i,
+            Decimal(f"{i % 1000}.{i % 100:02d}") if i % 10 else None,
+            base_date + timedelta(days=i % 365),
+            base_datetime + timedelta(seconds=i),
+        ))
+    return rows
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da conversão de linhas do PostgreSQLConnector')
+    parser.add_argument('--rows', type=int, default=100_000, help='Número de linhas sintéticas')
+    parser.add_argument('--repeat', type=int, default=3, help='Repetições (usa o melhor tempo)')
+    args = parser.parse_args()
+
+    connector = PostgreSQLConnector(host="", database="", user="", password="")
+    rows = generate_rows(args.rows)
+    names = [column.name for column in DESCRIPTION]
+
+    legacy_time, legacy = best_of(
+        args.repeat,
+        lambda: [connector._convert_types(dict(zip(names, row))) for row in rows]
+    )
+    columnar_time, columnar = best_of(
+        args.repeat,
+        lambda: connector._convert_rows(DESCRIPTION, rows)
+    )
+
+    if legacy != columnar:
+        print("ERRO: as conversões produziram resultados diferentes")
+        sys.exit(1)
+
+    print(f"Linhas: {args.rows} | Colunas: {len(DESCRIPTION)}")
+    print(f"Legado (_convert_types por linha): {legacy_time * 1000:.1f} ms")
+    print(f"Por coluna (_convert_rows):        {columnar_time * 1000:.1f} ms")
+    print(f"Speedup: {legacy_time / columnar_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
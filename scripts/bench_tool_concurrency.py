@@ -0,0 +1,60 @@
+"""
+Compara a vazão das ferramentas com N sessões concorrentes: versão síncrona
+(executada no event loop, como antes) vs. versão assíncrona (pool de threads
++ pool de conexões).
+
+Requer acesso ao banco configurado no .env.
+
+Uso:
+    python scripts/bench_tool_concurrency.py --sessions 8
+    python scripts/bench_tool_concurrency.py --sessions 16 --query "SELECT COUNT(*) FROM tarifas_subsidios_tarifarios"
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from agents.cemig_agent.common.config import Config
+from agents.cemig_agent.tools.async_tools import execute_sql_query_async
+from agents.cemig_agent.tools.execute_sql_query import execute_sql_query, query_cache
+
+DEFAULT_QUERY = "SELECT pg_sleep(0.2), 1 AS ok"
+
+
+async def run_sync(query, sessions):
+    async def session():
+        return execute_sql_query(query)
+    return await asyncio.gather(*(session() for _ in range(sessions)))
+
+
+async def run_async(query, sessions):
+    return await asyncio.gather(*(execute_sql_query_async(query) for _ in range(sessions)))
+
+
+def measure(label, coroutine_factory, sessions):
+    start = time.perf_counter()
+    results = asyncio.run(coroutine_factory())
+    elapsed = time.perf_counter() - start
+    errors = sum(1 for result in results if isinstance(result, str) and result.startswith("Erro"))
+    print(f"{label:<8} {elapsed * 1000:8.1f} ms  {sessions / elapsed:7.2f} chamadas/s  erros: {errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de concorrência das ferramentas do agente')
+    parser.add_argument('--sessions', type=int, default=8, help='Número de chamadas concorrentes')
+    parser.add_argument('--query', default=DEFAULT_QUERY, help='Consulta executada por cada sessão')
+    args = parser.parse_args()
+
+    query_cache.enabled = False
+
+    print(f"Sessões: {args.sessions} | Workers: {Config.TOOL_MAX_WORKERS} | Pool: {Config.POSTGRES_POOL_MAX_SIZE}")
+    measure("sync", lambda: run_sync(args.query, args.sessions), args.sessions)
+    measure("async", lambda: run_async(args.query, args.sessions), args.sessions)
+
+
+if __name__ == "__main__":
+    main()
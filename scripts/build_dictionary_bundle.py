@@ -0,0 +1,52 @@
+"""
+Pré-compila os PDFs de agents/cemig_agent/data/dicionario_de_dados/ em um
+pacote markdown indexado por tabela, lido por get_schema_dictionary sem
+acesso à rede nem parsing de PDF.
+
+Uso:
+    python scripts/build_dictionary_bundle.py
+    python scripts/build_dictionary_bundle.py --force
+    python scripts/build_dictionary_bundle.py --output /tmp/dicionario.bundle
+"""
+import argparse
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from agents.cemig_agent.common.config import Config
+from agents.cemig_agent.tools.dictionary_bundle import build_dictionary_bundle
+from agents.cemig_agent.tools.get_schema_dictionary import get_table_mapping
+
+DEFAULT_PDF_DIR = project_root / "agents" / "cemig_agent" / "data" / "dicionario_de_dados"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera o pacote pré-compilado dos dicionários de dados')
+    parser.add_argument('--pdf-dir', default=str(DEFAULT_PDF_DIR), help='Diretório com os PDFs')
+    parser.add_argument('--output', default=Config.DICTIONARY_BUNDLE_PATH, help='Arquivo do pacote gerado')
+    parser.add_argument('--force', action='store_true', help='Regera mesmo sem mudanças nos PDFs')
+    args = parser.parse_args()
+
+    summary = build_dictionary_bundle(
+        pdf_dir=Path(args.pdf_dir),
+        output_path=Path(args.output),
+        tables=get_table_mapping(),
+        force=args.force
+    )
+
+    if summary["rebuilt"]:
+        print(f"Pacote gerado: {args.output}")
+    else:
+        print(f"Pacote já atualizado: {args.output}")
+    print(f"Documentos: {summary['documents']} | Tabelas: {summary['tables']}")
+
+    for pdf_file, error in summary["errors"].items():
+        print(f"ERRO: {pdf_file}: {error}")
+
+    sys.exit(1 if summary["errors"] else 0)
+
+
+if __name__ == "__main__":
+    main()
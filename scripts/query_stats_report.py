@@ -0,0 +1,81 @@
+"""
+Relatório das consultas registradas pelo execute_sql_query em QUERY_STATS_DB:
+carga de trabalho por tabela e, para cada tabela, os fingerprints mais lentos
+e os mais frequentes.
+
+Uso:
+    python scripts/query_stats_report.py [--db /tmp/cemig_agent/query_stats.db] [--top 10]
+    python scripts/query_stats_report.py --table distribuicao_ouvidoria_aneel --order total
+    python scripts/query_stats_report.py --json > query_stats.json
+"""
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from agents.cemig_agent.common.config import Config
+from agents.cemig_agent.tools.connector.query_stats import ORDERINGS, QueryStatsStore
+
+
+def shorten(query, width=110):
+    return query if len(query) <= width else query[:width - 3] + "..."
+
+
+def print_ranking(title, entries):
+    print(f"  {title}")
+    for entry in entries:
+        timeouts = f" | {entry['timeouts']} timeouts" if entry["timeouts"] else ""
+        cached = f" | {entry['cached']} do cache" if entry["cached"] else ""
+        mean_rows = f"{entry['mean_rows']:.0f}" if entry["mean_rows"] is not None else "-"
+        print(
+            f"    {entry['calls']:>6}x  média {entry['mean_ms']:9.1f} ms  máx {entry['max_ms']:9.1f} ms  "
+            f"total {entry['total_ms'] / 1000:8.1f} s  linhas {mean_rows}{cached}{timeouts}"
+        )
+        print(f"            {shorten(entry['query'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consultas mais lentas e mais frequentes por tabela")
+    parser.add_argument("--db", default=Config.QUERY_STATS_DB, help="Arquivo SQLite (padrão: QUERY_STATS_DB)")
+    parser.add_argument("--top", type=int, default=10, help="Fingerprints por tabela (padrão: 10)")
+    parser.add_argument("--table", default=None, help="Mostra apenas esta tabela")
+    parser.add_argument("--order", choices=list(ORDERINGS), default=None,
+                        help="Um único ranking: slowest, frequent ou total (padrão: slowest e frequent)")
+    parser.add_argument("--json", action="store_true", help="Saída em JSON")
+    args = parser.parse_args()
+
+    if not args.db or not os.path.exists(args.db):
+        print(f"Arquivo de estatísticas não encontrado: {args.db or '(QUERY_STATS_DB vazio)'}")
+        sys.exit(1)
+
+    store = QueryStatsStore(args.db)
+    orders = [args.order] if args.order else ["slowest", "frequent"]
+    rankings = {order: store.top_by_table(order, args.top, args.table) for order in orders}
+    summary = [entry for entry in store.table_summary() if not args.table or entry["table_name"] == args.table]
+    store.close()
+
+    if args.json:
+        print(json.dumps({"tables": summary, "rankings": rankings}, ensure_ascii=False, indent=2))
+        return
+
+    titles = {"slowest": "Mais lentas (duração média)", "frequent": "Mais frequentes", "total": "Maior tempo acumulado"}
+    print(f"{'Tabela':<60} {'Execuções':>10} {'Cache':>8} {'Fingerprints':>13} {'Total (s)':>10} {'Timeouts':>9}")
+    for entry in summary:
+        print(
+            f"{entry['table_name'][:60]:<60} {entry['calls']:>10} {entry['cached']:>8} {entry['fingerprints']:>13} "
+            f"{entry['total_ms'] / 1000:>10.1f} {entry['timeouts']:>9}"
+        )
+
+    for entry in summary:
+        table_name = entry["table_name"]
+        print(f"\n{table_name}")
+        for order in orders:
+            print_ranking(titles[order], rankings[order].get(table_name, []))
+
+
+if __name__ == "__main__":
+    main()
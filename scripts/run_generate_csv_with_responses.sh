@@ -9,10 +9,17 @@ echo "Input: $INPUT_CSV"
 echo "Output: $OUTPUT_CSV"
 echo "----------------------------------------"
 
+# Demais opções (ex.: --concurrency 8 --timeout 60) são repassadas ao script
 if [ "$1" == "--preview" ]; then
-    python $SCRIPT_PATH $INPUT_CSV $OUTPUT_CSV --preview ${2:-10}
+    shift
+    PREVIEW=10
+    if [[ "$1" =~ ^[0-9]+$ ]]; then
+        PREVIEW=$1
+        shift
+    fi
+    python $SCRIPT_PATH $INPUT_CSV $OUTPUT_CSV --preview $PREVIEW "$@"
 else
-    python $SCRIPT_PATH $INPUT_CSV $OUTPUT_CSV
+    python $SCRIPT_PATH $INPUT_CSV $OUTPUT_CSV "$@"
 fi
 
 echo "----------------------------------------"
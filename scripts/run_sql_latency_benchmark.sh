@@ -0,0 +1,34 @@
+#!/bin/bash
+
+SCRIPT_PATH="agents/cemig_agent/evals/utils/benchmark_sql_latency.py"
+INPUT_CSV="agents/cemig_agent/evals/data_for_benchmark/queries.csv"
+OUTPUT_JSON="agents/cemig_agent/evals/data_for_benchmark/sql_latency_results.json"
+BASELINE_JSON="agents/cemig_agent/evals/data_for_benchmark/sql_latency_baseline.json"
+
+cd "$(dirname "$0")/.."
+
+echo "Benchmark de latência SQL..."
+echo "Input: $INPUT_CSV"
+echo "Output: $OUTPUT_JSON"
+echo "----------------------------------------"
+
+# baseline: grava os resultados como novo baseline
+# demais opções (ex.: --runs 20 --warmup 3 --max-regression 0.15) são repassadas ao script
+if [ "$1" == "baseline" ]; then
+    shift
+    python $SCRIPT_PATH $INPUT_CSV --output $OUTPUT_JSON --save-baseline $BASELINE_JSON "$@"
+elif [ -f "$BASELINE_JSON" ]; then
+    python $SCRIPT_PATH $INPUT_CSV --output $OUTPUT_JSON --baseline $BASELINE_JSON "$@"
+else
+    echo "Baseline não encontrado; execute '$0 baseline' para criá-lo"
+    python $SCRIPT_PATH $INPUT_CSV --output $OUTPUT_JSON "$@"
+fi
+STATUS=$?
+
+echo "----------------------------------------"
+if [ $STATUS -eq 0 ]; then
+    echo "Processo concluído!"
+else
+    echo "Regressões ou erros encontrados"
+fi
+exit $STATUS
@@ -0,0 +1,22 @@
+"""
+Pré-aquece o cache dos dicionários de dados (memória + disco) para todas as
+tabelas de agents/cemig_agent/tools/utils/mapping_tables.yaml.
+
+Uso:
+    python scripts/warm_dictionary_cache.py
+"""
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from agents.cemig_agent.tools.get_schema_dictionary import warm_dictionary_cache
+
+
+if __name__ == "__main__":
+    results = warm_dictionary_cache()
+    for pdf_file, ok in results.items():
+        print(f"{'OK' if ok else 'ERRO'}: {pdf_file}")
+    print(f"{sum(results.values())}/{len(results)} dicionários em cache")
+    sys.exit(0 if all(results.values()) else 1)